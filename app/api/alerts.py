@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from pydantic import BaseModel
 from typing import List
 
-from app.core.db import get_db
-from app.models.alert import Alert, AlertType, AlertSeverity
-from app.models.workflow import Organization
-from app.api.auth import get_current_user
+from app.core.db import get_async_db
+from app.core.fields import FIELDS_DESCRIPTION, fields_response, parse_fields, partial, select_columns
+from app.core.pagination import paginate_async, set_next_cursor
+from app.models.alert import Alert
+from app.models.workflow import Organization, Repository, Workflow
+from app.api.auth import check_installation_access, get_current_user, require_installation_access, require_organization
 from app.services.subscription import is_pro_user
+from app.services.response_cache import bump_data_version, etag_dependency
 
 router = APIRouter()
 
@@ -30,88 +33,103 @@ class AlertResponse(BaseModel):
         from_attributes = True
 
 
+# Sparse fieldset columns (see core.fields)
+ALERT_COLUMNS = {
+    "id": Alert.id,
+    "workflow_id": Alert.workflow_id,
+    "alert_type": Alert.alert_type,
+    "severity": Alert.severity,
+    "message": Alert.message,
+    "detected_at": Alert.detected_at,
+    "acknowledged": Alert.acknowledged,
+    "acknowledged_at": Alert.acknowledged_at,
+    "workflow_name": Workflow.name,
+    "repository_name": Repository.full_name,
+}
+
+
 class AcknowledgeRequest(BaseModel):
     acknowledged: bool
 
 
-@router.get("/", response_model=List[AlertResponse])
+@router.get(
+    "/",
+    response_model=List[AlertResponse],
+    dependencies=[Depends(etag_dependency(auth=require_installation_access))],
+)
 async def get_alerts(
-    installation_id: int = Query(...),
+    response: Response,
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
     limit: int = Query(50, ge=1, le=200),
     alert_type: str | None = Query(None),
     acknowledged: bool | None = Query(None),
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user)
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    org = Depends(require_organization)
 ):
-    """Get alerts for an installation."""
-    # Get organization
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    
+    """Get alerts for an installation, most recent first."""
     # Check if user has Pro subscription
-    if not is_pro_user(org.id, db):
+    if not await is_pro_user(org.id, db):
         raise HTTPException(
             status_code=403, 
             detail="Alert History requires a Pro subscription. Upgrade to unlock this feature."
         )
     
-    # Build query
-    query = db.query(Alert).filter(Alert.organization_id == org.id)
+    # Build query over the requested columns, joining the workflow and repo
+    # names in only when asked for
+    selected = parse_fields(fields, AlertResponse)
+    query = select(*select_columns(ALERT_COLUMNS, selected)).select_from(Alert)
+    if "workflow_name" in selected or "repository_name" in selected:
+        query = query.outerjoin(Workflow, Alert.workflow_id == Workflow.id)
+        if "repository_name" in selected:
+            query = query.outerjoin(Repository, Workflow.repo_id == Repository.id)
+    query = query.where(Alert.organization_id == org.id)
     
     # Apply filters
     if alert_type:
-        query = query.filter(Alert.alert_type == alert_type)
+        query = query.where(Alert.alert_type == alert_type)
     if acknowledged is not None:
-        query = query.filter(Alert.acknowledged == acknowledged)
-    
-    # Order by most recent first
-    query = query.order_by(desc(Alert.detected_at)).limit(limit)
+        query = query.where(Alert.acknowledged == acknowledged)
     
-    alerts = query.all()
+    rows, next_cursor = await paginate_async(
+        db,
+        query.add_columns(Alert.detected_at.label("_detected_at")),
+        [Alert.detected_at, Alert.id],
+        cursor,
+        limit,
+        key=lambda row: (row._detected_at, row.id),
+    )
+    set_next_cursor(response, next_cursor)
     
     # Format response
-    result = []
-    for alert in alerts:
-        workflow_name = None
-        repository_name = None
-        if alert.workflow:
-            workflow_name = alert.workflow.name
-            if alert.workflow.repository:
-                repository_name = alert.workflow.repository.full_name
-        
-        result.append(AlertResponse(
-            id=alert.id,
-            workflow_id=alert.workflow_id,
-            alert_type=alert.alert_type.value,
-            severity=alert.severity.value,
-            message=alert.message,
-            detected_at=alert.detected_at,
-            acknowledged=alert.acknowledged,
-            acknowledged_at=alert.acknowledged_at,
-            workflow_name=workflow_name,
-            repository_name=repository_name
-        ))
-    
-    return result
+    items = []
+    for row in rows:
+        values = {name: getattr(row, name) for name in selected}
+        for enum_field in ("alert_type", "severity"):
+            if enum_field in values:
+                values[enum_field] = values[enum_field].value
+        items.append(partial(AlertResponse, values))
+    return fields_response(AlertResponse, items, selected, headers=response.headers)
 
 
 @router.patch("/{alert_id}/acknowledge")
 async def acknowledge_alert(
     alert_id: int,
     request: AcknowledgeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     """Mark an alert as acknowledged."""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = await db.get(Alert, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
+    org = await db.get(Organization, alert.organization_id)
+    await check_installation_access(user, org.installation_id)
     
     alert.acknowledged = request.acknowledged
     alert.acknowledged_at = datetime.utcnow() if request.acknowledged else None
     
-    db.commit()
-    db.refresh(alert)
+    await db.commit()
+    bump_data_version(org.installation_id)
     
     return {"success": True, "acknowledged": alert.acknowledged}
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Float, and_, cast, func, select
+from datetime import date, datetime, time, timedelta, timezone
 from pydantic import BaseModel
 from typing import List
 
-from app.core.db import get_db
+from app.core.db import get_async_db
+from app.core.quantile_sketch import QuantileSketch
 from app.models.workflow_run import WorkflowRun
-from app.models.workflow import Workflow, Repository, Organization
-from app.api.auth import get_current_user
+from app.models.workflow_run_daily import WorkflowRunDaily
+from app.models.workflow import Workflow, Repository
+from app.api.auth import require_installation_access, require_organization
+from app.services.run_rollups import COUNTED_RUNS
 from app.services.subscription import is_pro_user
+from app.services.response_cache import etag_dependency
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(etag_dependency(per_day=True, auth=require_installation_access))])
 
 class SuccessRateDataPoint(BaseModel):
     date: str
@@ -29,56 +33,94 @@ class DurationStats(BaseModel):
     max_duration_ms: int | None
     avg_duration_ms: float | None
     p50_duration_ms: float | None
+    p90_duration_ms: float | None
     p95_duration_ms: float | None
+    p99_duration_ms: float | None
     total_runs: int
 
+def _org_workflows(org_id: int):
+    # Ids of the organization's workflows, for a workflow_id.in_()
+    return select(Workflow.id).join(Repository).where(Repository.org_id == org_id)
+
+def _start_day(days: int) -> date:
+    # The window's first UTC day; rollups are per day
+    return (datetime.now(timezone.utc) - timedelta(days=days)).date()
+
+PERCENTILES = {"p50": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99}
+
+def _percentile_query(org_id: int, start_day: date):
+    # Exact percentiles of the window's runs, sorted by Postgres
+    start = datetime.combine(start_day, time.min, tzinfo=timezone.utc)
+    return (
+        select(*(
+            func.percentile_cont(q).within_group(WorkflowRun.duration_ms).label(name)
+            for name, q in PERCENTILES.items()
+        ))
+        .where(
+            COUNTED_RUNS,
+            WorkflowRun.workflow_id.in_(_org_workflows(org_id)),
+            WorkflowRun.started_at >= start,
+            WorkflowRun.duration_ms.isnot(None)
+        )
+    )
+
+async def _duration_percentiles(db: AsyncSession, org_id: int, start_day: date, stats) -> dict:
+    """
+    PERCENTILES of the window's run durations, without loading them: with
+    percentile_cont on Postgres, else estimated from the merged daily
+    sketches (within their relative accuracy, in at most a few hundred
+    buckets whatever the run count).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        row = (await db.execute(_percentile_query(org_id, start_day))).first()
+        values = {name: getattr(row, name) for name in PERCENTILES}
+    else:
+        sketch = QuantileSketch()
+        for encoded in await db.scalars(
+            select(WorkflowRunDaily.duration_sketch).where(
+                WorkflowRunDaily.workflow_id.in_(_org_workflows(org_id)),
+                WorkflowRunDaily.day >= start_day,
+                WorkflowRunDaily.duration_count > 0
+            )
+        ):
+            sketch.merge_encoded(encoded)
+        # Keep estimates within the exact range
+        values = {
+            name: None if value is None else min(max(value, stats.min_duration), stats.max_duration)
+            for name, value in ((name, sketch.quantile(q)) for name, q in PERCENTILES.items())
+        }
+    return {name: None if value is None else round(value, 2) for name, value in values.items()}
+
 @router.get("/success-rate", response_model=List[SuccessRateDataPoint])
 async def get_success_rate(
-    installation_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    org = Depends(require_organization)
 ):
     """Get success/failure rate over time for workflows in an installation."""
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    
     # Check if user has Pro subscription
-    if not is_pro_user(org.id, db):
+    if not await is_pro_user(org.id, db):
         raise HTTPException(
             status_code=403, 
             detail="Analytics requires a Pro subscription. Upgrade to unlock this feature."
         )
     
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    # Get all workflows for this installation
-    workflows = (
-        db.query(Workflow.id)
-        .join(Repository)
-        .join(Organization)
-        .filter(Organization.installation_id == installation_id)
-        .subquery()
-    )
-    
-    # Query runs grouped by date
-    results = (
-        db.query(
-            func.date(WorkflowRun.started_at).label("date"),
-            func.count().filter(WorkflowRun.conclusion == "success").label("success"),
-            func.count().filter(WorkflowRun.conclusion == "failure").label("failure"),
-            func.count().label("total")
+    # Daily rollups (see services/run_rollups): one row per workflow and day
+    results = await db.execute(
+        select(
+            WorkflowRunDaily.day.label("date"),
+            func.sum(WorkflowRunDaily.success).label("success"),
+            func.sum(WorkflowRunDaily.failure).label("failure"),
+            func.sum(WorkflowRunDaily.total).label("total")
         )
-        .filter(
+        .where(
             and_(
-                WorkflowRun.workflow_id.in_(workflows),
-                WorkflowRun.started_at >= start_date
+                WorkflowRunDaily.workflow_id.in_(_org_workflows(org.id)),
+                WorkflowRunDaily.day >= _start_day(days)
             )
         )
-        .group_by(func.date(WorkflowRun.started_at))
-        .order_by(func.date(WorkflowRun.started_at))
-        .all()
+        .group_by(WorkflowRunDaily.day)
+        .order_by(WorkflowRunDaily.day)
     )
     
     return [
@@ -93,49 +135,33 @@ async def get_success_rate(
 
 @router.get("/runtime-trends", response_model=List[RuntimeTrendDataPoint])
 async def get_runtime_trends(
-    installation_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    org = Depends(require_organization)
 ):
     """Get average runtime trends over time."""
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    
     # Check if user has Pro subscription
-    if not is_pro_user(org.id, db):
+    if not await is_pro_user(org.id, db):
         raise HTTPException(
             status_code=403, 
             detail="Analytics requires a Pro subscription. Upgrade to unlock this feature."
         )
     
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    workflows = (
-        db.query(Workflow.id)
-        .join(Repository)
-        .join(Organization)
-        .filter(Organization.installation_id == installation_id)
-        .subquery()
-    )
-    
-    results = (
-        db.query(
-            func.date(WorkflowRun.started_at).label("date"),
-            func.avg(WorkflowRun.duration_ms).label("avg_duration_ms"),
-            func.count().label("run_count")
+    results = await db.execute(
+        select(
+            WorkflowRunDaily.day.label("date"),
+            (cast(func.sum(WorkflowRunDaily.sum_duration_ms), Float) / func.sum(WorkflowRunDaily.duration_count)).label("avg_duration_ms"),
+            func.sum(WorkflowRunDaily.duration_count).label("run_count")
         )
-        .filter(
+        .where(
             and_(
-                WorkflowRun.workflow_id.in_(workflows),
-                WorkflowRun.started_at >= start_date,
-                WorkflowRun.duration_ms.isnot(None)
+                WorkflowRunDaily.workflow_id.in_(_org_workflows(org.id)),
+                WorkflowRunDaily.day >= _start_day(days),
+                WorkflowRunDaily.duration_count > 0
             )
         )
-        .group_by(func.date(WorkflowRun.started_at))
-        .order_by(func.date(WorkflowRun.started_at))
-        .all()
+        .group_by(WorkflowRunDaily.day)
+        .order_by(WorkflowRunDaily.day)
     )
     
     return [
@@ -149,80 +175,45 @@ async def get_runtime_trends(
 
 @router.get("/duration-stats", response_model=DurationStats)
 async def get_duration_stats(
-    installation_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    org = Depends(require_organization)
 ):
     """Get duration statistics (min/max/avg/percentiles)."""
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    
     # Check if user has Pro subscription
-    if not is_pro_user(org.id, db):
+    if not await is_pro_user(org.id, db):
         raise HTTPException(
             status_code=403, 
             detail="Analytics requires a Pro subscription. Upgrade to unlock this feature."
         )
     
-    workflows = (
-        db.query(Workflow.id)
-        .join(Repository)
-        .join(Organization)
-        .filter(Organization.installation_id == installation_id)
-        .subquery()
-    )
+    start_day = _start_day(days)
     
     # Get basic stats
-    stats = (
-        db.query(
-            func.min(WorkflowRun.duration_ms).label("min_duration"),
-            func.max(WorkflowRun.duration_ms).label("max_duration"),
-            func.avg(WorkflowRun.duration_ms).label("avg_duration"),
-            func.count().label("total_runs")
+    stats = (await db.execute(
+        select(
+            func.min(WorkflowRunDaily.min_duration_ms).label("min_duration"),
+            func.max(WorkflowRunDaily.max_duration_ms).label("max_duration"),
+            func.sum(WorkflowRunDaily.sum_duration_ms).label("sum_duration"),
+            func.sum(WorkflowRunDaily.duration_count).label("total_runs")
         )
-        .filter(
-            and_(
-                WorkflowRun.workflow_id.in_(workflows),
-                WorkflowRun.started_at >= start_date,
-                WorkflowRun.duration_ms.isnot(None)
-            )
+        .where(
+            WorkflowRunDaily.workflow_id.in_(_org_workflows(org.id)),
+            WorkflowRunDaily.day >= start_day,
+            WorkflowRunDaily.duration_count > 0
         )
-        .first()
-    )
-    
-    # Get percentiles (p50, p95)
-    # Note: PostgreSQL has percentile_cont, but for simplicity we'll approximate
-    durations = (
-        db.query(WorkflowRun.duration_ms)
-        .filter(
-            and_(
-                WorkflowRun.workflow_id.in_(workflows),
-                WorkflowRun.started_at >= start_date,
-                WorkflowRun.duration_ms.isnot(None)
-            )
-        )
-        .order_by(WorkflowRun.duration_ms)
-        .all()
-    )
+    )).first()
     
-    p50 = None
-    p95 = None
-    if durations:
-        sorted_durations = [d[0] for d in durations]
-        p50_idx = int(len(sorted_durations) * 0.5)
-        p95_idx = int(len(sorted_durations) * 0.95)
-        p50 = sorted_durations[p50_idx] if p50_idx < len(sorted_durations) else None
-        p95 = sorted_durations[p95_idx] if p95_idx < len(sorted_durations) else None
+    percentiles = await _duration_percentiles(db, org.id, start_day, stats)
     
+    total_runs = stats.total_runs or 0
     return DurationStats(
         min_duration_ms=stats.min_duration,
         max_duration_ms=stats.max_duration,
-        avg_duration_ms=round(stats.avg_duration, 2) if stats.avg_duration else None,
-        p50_duration_ms=p50,
-        p95_duration_ms=p95,
-        total_runs=stats.total_runs
+        avg_duration_ms=round(stats.sum_duration / total_runs, 2) if total_runs else None,
+        p50_duration_ms=percentiles["p50"],
+        p90_duration_ms=percentiles["p90"],
+        p95_duration_ms=percentiles["p95"],
+        p99_duration_ms=percentiles["p99"],
+        total_runs=total_runs
     )
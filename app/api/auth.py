@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Header, Cookie
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 from pydantic import BaseModel
 
 from app.core.config import settings
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.models.workflow import Organization
+from app.services.github_client import GitHubRateLimitError, get_github_client
+from app.services.github_identity import InvalidTokenError, get_identity, recently_denied, remember_denied
+from app.services.organizations import CachedOrganization, get_organization
 
 router = APIRouter()
 
@@ -26,11 +30,14 @@ class AuthResponse(BaseModel):
     installations: list[Installation]
 
 
-def get_current_user(
+async def get_current_user(
     authorization: str | None = Header(None),
     gh_token: str | None = Cookie(None)
 ):
-    """Dependency to get current user from Authorization header or Cookie."""
+    """
+    Dependency to get current user from Authorization header or Cookie. The
+    token is checked against GitHub (cached, see services/github_identity).
+    """
     token = None
     if authorization and authorization.startswith("Bearer "):
         token = authorization.replace("Bearer ", "")
@@ -39,15 +46,72 @@ def get_current_user(
         
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    return {"token": token}
+
+    return {"token": token, "identity": await _identity(token)}
+
+
+async def _identity(token: str, refresh: bool = False):
+    try:
+        return await get_identity(token, get_github_client(), refresh=refresh)
+    except InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="GitHub API timeout")
+    except GitHubRateLimitError:
+        raise  # 503 with Retry-After, see main
+    except Exception as e:
+        print(f"[auth] Identity lookup failed: {e}")
+        raise HTTPException(status_code=502, detail="Failed to verify token with GitHub")
+
+
+async def check_installation_access(user_info: dict, installation_id: int):
+    """
+    403 unless the user can access `installation_id`. Their installations are
+    re-fetched once before refusing, in case it was installed since they
+    were cached; a refusal is then remembered for a while, so polling a
+    refused installation doesn't call GitHub each time.
+    """
+    if installation_id in user_info["identity"].installation_ids:
+        return
+    if recently_denied(user_info["token"], installation_id):
+        raise HTTPException(status_code=403, detail="No access to this installation")
+    identity = await _identity(user_info["token"], refresh=True)
+    if installation_id not in identity.installation_ids:
+        remember_denied(user_info["token"], installation_id)
+        raise HTTPException(status_code=403, detail="No access to this installation")
+    user_info["identity"] = identity
+
+
+async def require_installation_access(installation_id: int, user_info = Depends(get_current_user)):
+    """
+    Dependency for installation-scoped endpoints (`installation_id` path or
+    query param): the current user, if they can access the installation.
+    """
+    await check_installation_access(user_info, installation_id)
+    return user_info
+
+
+async def require_organization(
+    installation_id: int,
+    user_info = Depends(require_installation_access),
+    db: AsyncSession = Depends(get_async_db),
+) -> CachedOrganization:
+    """
+    Dependency for installation-scoped endpoints: the installation's
+    organization (cached, see services/organizations), once access to it is
+    checked. 404 if the installation has none.
+    """
+    org = await get_organization(installation_id, db)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return org
 
 
 @router.get("/login")
 async def login():
     """Redirect to GitHub OAuth."""
     github_auth_url = (
-        f"https://github.com/login/oauth/authorize"
+        f"{settings.GITHUB_WEB_URL}/login/oauth/authorize"
         f"?client_id={settings.GITHUB_CLIENT_ID}"
         f"&redirect_uri={settings.GITHUB_REDIRECT_URI}"
         f"&scope=read:user,read:org"
@@ -56,11 +120,12 @@ async def login():
 
 
 @router.get("/callback")
-async def callback(code: str, response: Response, db: Session = Depends(get_db)):
+async def callback(code: str, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Handle GitHub OAuth callback."""
     # Exchange code for access token
-    token_response = httpx.post(
-        "https://github.com/login/oauth/access_token",
+    token_response = await get_github_client().request(
+        "POST",
+        f"{settings.GITHUB_WEB_URL}/login/oauth/access_token",
         headers={"Accept": "application/json"},
         data={
             "client_id": settings.GITHUB_CLIENT_ID,
@@ -97,89 +162,57 @@ async def callback(code: str, response: Response, db: Session = Depends(get_db))
 
 
 @router.get("/me")
-async def get_me(db: Session = Depends(get_db), user_info = Depends(get_current_user)):
+async def get_me(db: AsyncSession = Depends(get_async_db), user_info = Depends(get_current_user)):
     """Get current user info and their installations with subscription status."""
     from app.services.subscription import get_subscription_info
     
-    token = user_info["token"]
-    
-    try:
-        # Get user info
-        user_response = httpx.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github.v3+json"
-            },
-            timeout=10.0
-        )
-        
-        if user_response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        user_data = user_response.json()
-        
-        # Get user's GitHub installations
-        installations_response = httpx.get(
-            "https://api.github.com/user/installations",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github.v3+json"
-            },
-            timeout=10.0
-        )
-        
-        if installations_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to fetch installations")
-        
-        installations_data = installations_response.json()
+    # The user and their installations come from the identity cache
+    identity = user_info["identity"]
+    user_data = identity.user
+    installations = identity.installations
+
+    orgs = {
+        org.installation_id: org
+        for org in (await db.scalars(
+            select(Organization).where(Organization.installation_id.in_(identity.installation_ids))
+        )).all()
+    }
+
+    # Upsert organizations from installations
+    installation_list = []
+    for inst in installations:
+        account = inst.get("account", {})
+        installation_id = inst.get("id")
         
-        # Upsert organizations from installations
-        installation_list = []
-        for inst in installations_data.get("installations", []):
-            account = inst.get("account", {})
-            installation_id = inst.get("id")
-            
-            # Upsert organization
-            org = db.query(Organization).filter(
-                Organization.installation_id == installation_id
-            ).first()
-            
-            if not org:
-                org = Organization(
-                    github_org_id=account.get("id"),
-                    installation_id=installation_id,
-                    name=account.get("login")
-                )
-                db.add(org)
-                db.commit()
-                db.refresh(org)
-            
-            # Get subscription info for this org
-            subscription_info = get_subscription_info(org.id, db)
-            
-            installation_list.append({
-                "id": installation_id,
-                "account_login": account.get("login"),
-                "account_avatar_url": account.get("avatar_url"),
-                "subscription": subscription_info
-            })
+        org = orgs.get(installation_id)
+        if not org:
+            org = Organization(
+                github_org_id=account.get("id"),
+                installation_id=installation_id,
+                name=account.get("login")
+            )
+            db.add(org)
+            await db.commit()
         
-        return {
-            "user": {
-                "id": user_data["id"],
-                "login": user_data["login"],
-                "avatar_url": user_data["avatar_url"],
-                "name": user_data.get("name")
-            },
-            "installations": installation_list
-        }
+        # Get subscription info for this org
+        subscription_info = await get_subscription_info(org.id, db)
         
-    except httpx.TimeoutException:
-        raise HTTPException(status_code=504, detail="GitHub API timeout")
-    except Exception as e:
-        print(f"Error in get_me: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        installation_list.append({
+            "id": installation_id,
+            "account_login": account.get("login"),
+            "account_avatar_url": account.get("avatar_url"),
+            "subscription": subscription_info
+        })
+    
+    return {
+        "user": {
+            "id": user_data["id"],
+            "login": user_data["login"],
+            "avatar_url": user_data["avatar_url"],
+            "name": user_data.get("name")
+        },
+        "installations": installation_list
+    }
 
 
 @router.post("/logout")
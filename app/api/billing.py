@@ -7,6 +7,8 @@ from app.core.config import get_settings
 from app.core.db import get_db
 from app.models.subscription import Subscription
 from app.models.workflow import Organization
+from app.services.response_cache import bump_data_version
+from app.services.subscription import invalidate_entitlements
 
 router = APIRouter()
 settings = get_settings()
@@ -28,12 +30,12 @@ async def create_checkout_session(req: CheckoutRequest, db: Session = Depends(ge
         raise HTTPException(status_code=500, detail="Stripe not configured")
 
     # Check if org exists
-    org = db.query(Organization).filter(Organization.github_org_id == req.installation_id).first()
+    org = db.query(Organization).filter(Organization.installation_id == req.installation_id).first()
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
     # Check if subscription exists
-    sub = db.query(Subscription).filter(Subscription.installation_id == req.installation_id).first()
+    sub = db.query(Subscription).filter(Subscription.organization_id == org.id).first()
     
     customer_id = sub.stripe_customer_id if sub else None
 
@@ -67,7 +69,8 @@ async def create_portal_session(req: PortalRequest, db: Session = Depends(get_db
     if not settings.STRIPE_SECRET_KEY:
         raise HTTPException(status_code=500, detail="Stripe not configured")
 
-    sub = db.query(Subscription).filter(Subscription.installation_id == req.installation_id).first()
+    org = db.query(Organization).filter(Organization.installation_id == req.installation_id).first()
+    sub = db.query(Subscription).filter(Subscription.organization_id == org.id).first() if org else None
     if not sub or not sub.stripe_customer_id:
         raise HTTPException(status_code=400, detail="No subscription found")
 
@@ -112,6 +115,17 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None),
 
     return {"status": "success"}
 
+def _subscription_changed(sub: Subscription, db: Session):
+    """
+    Drop the organization's cached entitlement and responses after its
+    subscription changed.
+    """
+    invalidate_entitlements(sub.organization_id)
+    org = db.get(Organization, sub.organization_id)
+    if org and org.installation_id:
+        bump_data_version(org.installation_id)
+
+
 def handle_checkout_completed(session, db: Session):
     installation_id = session.get("client_reference_id")
     customer_id = session.get("customer")
@@ -121,16 +135,22 @@ def handle_checkout_completed(session, db: Session):
         print("No installation_id in session")
         return
 
+    org = db.query(Organization).filter(Organization.installation_id == int(installation_id)).first()
+    if not org:
+        print(f"No organization for installation {installation_id}")
+        return
+
     # Upsert subscription
-    sub = db.query(Subscription).filter(Subscription.installation_id == int(installation_id)).first()
+    sub = db.query(Subscription).filter(Subscription.organization_id == org.id).first()
     if not sub:
-        sub = Subscription(installation_id=int(installation_id), stripe_customer_id=customer_id)
+        sub = Subscription(organization_id=org.id, stripe_customer_id=customer_id)
         db.add(sub)
     
     sub.stripe_customer_id = customer_id
     sub.stripe_subscription_id = subscription_id
     sub.status = "active" # Assume active on success
     db.commit()
+    _subscription_changed(sub, db)
 
 def handle_subscription_updated(subscription, db: Session):
     sub_id = subscription.get("id")
@@ -143,6 +163,7 @@ def handle_subscription_updated(subscription, db: Session):
         sub.status = status
         sub.plan_id = plan_id
         db.commit()
+        _subscription_changed(sub, db)
 
 def handle_subscription_deleted(subscription, db: Session):
     sub_id = subscription.get("id")
@@ -150,3 +171,4 @@ def handle_subscription_deleted(subscription, db: Session):
     if sub:
         sub.status = "canceled"
         db.commit()
+        _subscription_changed(sub, db)
@@ -1,140 +1,132 @@
 # app/api/dashboard.py
-from datetime import datetime, timedelta, timezone
 from typing import List
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
-from app.models.workflow import Workflow
-from app.models.workflow_run import WorkflowRun
+from app.core.fields import FIELDS_DESCRIPTION, dump_fields, parse_fields, partial, select_columns
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_status import WorkflowState
 from app.schemas.dashboard import WorkflowStatus, SummaryStats
-
-router = APIRouter()
-
-
-def compute_status(
-    wf: Workflow,
-    now: datetime,
-    missed_runs: list[WorkflowRun],
-) -> WorkflowStatus:
-    last_run_at = wf.last_run_at
-    last_missed_at = (
-        missed_runs[0].started_at if missed_runs else None
-    )  # assuming started_at ~ expected time
-
-    # Simple status logic for now:
-    if last_missed_at:
-        status = "MISSED"
-    else:
-        status = "HEALTHY"
-
-    return WorkflowStatus(
-        id=wf.id,
-        repo_full_name=wf.repository.full_name if wf.repository else "",
-        name=wf.name,
-        cron_expression=wf.cron_expression,
-        last_run_at=last_run_at,
-        last_missed_at=last_missed_at,
-        missed_count_24h=len(missed_runs),
-        status=status,
+from app.services.response_cache import cached_response, etag_dependency
+from app.services.workflow_search import search_workflows
+from app.services.workflow_status import STATUS_HEALTHY
+
+# Conditional GETs: unchanged polls are answered 304 from the data version
+router = APIRouter(dependencies=[Depends(etag_dependency())])
+
+
+# Sparse fieldset columns (see core.fields)
+STATUS_COLUMNS = {
+    "id": Workflow.id,
+    "repo_full_name": Repository.full_name,
+    "name": Workflow.name,
+    "cron_expression": Workflow.cron_expression,
+    "last_run_at": Workflow.last_run_at,
+    "last_missed_at": WorkflowState.last_missed_at,
+    "missed_count_24h": WorkflowState.missed_count_24h,
+    "status": WorkflowState.status,
+}
+_STATE_FIELDS = {"last_missed_at", "missed_count_24h", "status"}
+
+
+def workflow_status_items(
+    db: Session,
+    q: str | None = None,
+    installation_id: int | None = None,
+    limit: int | None = None,
+    fields: List[str] | None = None,
+) -> List[WorkflowStatus]:
+    """
+    Status of every workflow (of one installation if given), read from the
+    materialized `workflow_status` rows. Workflows without a row yet have had
+    no runs or misses. With `q`, only matching workflows, best match first.
+    With `fields`, the items hold only those fields.
+    """
+    fields = fields or list(STATUS_COLUMNS)
+    query = (
+        db.query(*select_columns(STATUS_COLUMNS, fields))
+        .select_from(Workflow)
+        .join(Repository, Workflow.repo_id == Repository.id)
     )
+    if _STATE_FIELDS.intersection(fields):
+        query = query.outerjoin(WorkflowState, WorkflowState.workflow_id == Workflow.id)
 
-
-@router.get("/workflows/status", response_model=List[WorkflowStatus])
-def list_workflows_status(
-    q: str | None = Query(None, description="Search by repo or workflow name"),
-    db: Session = Depends(get_db),
-):
-    now = datetime.now(timezone.utc)
-    since_24h = now - timedelta(hours=24)
-
-    query = db.query(Workflow).join(Workflow.repository)
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            (Workflow.name.ilike(like))
-            | (WorkflowRepository.full_name.ilike(like))  # type: ignore
-        )
-
-    workflows: list[Workflow] = query.all()
-    items: list[WorkflowStatus] = []
-
-    for wf in workflows:
-        missed_runs = (
-            db.query(WorkflowRun)
-            .filter(WorkflowRun.workflow_id == wf.id)
-            .filter(WorkflowRun.conclusion == "missed")  # if you store misses this way
-            .filter(WorkflowRun.started_at >= since_24h)
-            .order_by(WorkflowRun.started_at.desc())
-            .all()
+    if installation_id is not None:
+        query = query.join(Organization, Repository.org_id == Organization.id).filter(
+            Organization.installation_id == installation_id
         )
 
-        items.append(compute_status(wf, now, missed_runs))
-
+    if q:
+        rows = search_workflows(query, q, limit)
+    else:
+        rows = query.order_by(Workflow.id).limit(limit).all()
+
+    items = []
+    for row in rows:
+        values = row._asdict()
+        if "missed_count_24h" in values:
+            values["missed_count_24h"] = values["missed_count_24h"] or 0
+        if "status" in values:
+            values["status"] = values["status"] or STATUS_HEALTHY
+        items.append(partial(WorkflowStatus, values))
     return items
 
 
-@router.get("/summary", response_model=SummaryStats)
-def get_summary(db: Session = Depends(get_db)):
-    now = datetime.now(timezone.utc)
-    since_24h = now - timedelta(hours=24)
-
-    total_workflows = db.query(Workflow).count()
-
-    # crude approximation: consider “healthy” those without any misses in last 24h
-    workflows_with_misses = (
-        db.query(WorkflowRun.workflow_id)
-        .filter(WorkflowRun.conclusion == "missed")
-        .filter(WorkflowRun.started_at >= since_24h)
-        .distinct()
-        .all()
-    )
-    workflows_with_misses_ids = {row[0] for row in workflows_with_misses}
-    healthy_workflows = total_workflows - len(workflows_with_misses_ids)
-
-    last_missed = (
-        db.query(WorkflowRun)
-        .filter(WorkflowRun.conclusion == "missed")
-        .order_by(WorkflowRun.started_at.desc())
-        .first()
+def summary_stats(db: Session, installation_id: int | None = None) -> SummaryStats:
+    workflows = db.query(Workflow.id)
+    if installation_id is not None:
+        workflows = (
+            workflows.join(Repository, Workflow.repo_id == Repository.id)
+            .join(Organization, Repository.org_id == Organization.id)
+            .filter(Organization.installation_id == installation_id)
+        )
+    total_workflows = workflows.count()
+
+    # “healthy” here means no misses in the last 24h
+    misses = db.query(
+        func.count(WorkflowState.workflow_id).filter(WorkflowState.missed_count_24h > 0),
+        func.max(WorkflowState.last_missed_at),
     )
-    last_missed_at = last_missed.started_at if last_missed else None
+    if installation_id is not None:
+        misses = misses.filter(WorkflowState.workflow_id.in_(workflows.scalar_subquery()))
+    workflows_with_misses, last_missed_at = misses.one()
 
     return SummaryStats(
         total_workflows=total_workflows,
-        healthy_workflows=healthy_workflows,
-        workflows_with_misses_24h=len(workflows_with_misses_ids),
+        healthy_workflows=total_workflows - workflows_with_misses,
+        workflows_with_misses_24h=workflows_with_misses,
         last_missed_at=last_missed_at,
     )
 
 
-@router.get("/workflows/{workflow_id}/runs")
-def get_workflow_runs(
-    workflow_id: int,
-    limit: int = 50,
+@router.get("/workflows/status", response_model=List[WorkflowStatus])
+async def list_workflows_status(
+    response: Response,
+    q: str | None = Query(None, description="Search by repo or workflow name"),
+    installation_id: int | None = Query(None, description="Limit to one installation"),
+    limit: int | None = Query(None, ge=1, le=500, description="Top matches only (e.g. for type-ahead search)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    selected = parse_fields(fields, WorkflowStatus)
+    return await cached_response(
+        "workflows_status",
+        installation_id,
+        {"q": q, "limit": limit, "fields": ",".join(selected)},
+        lambda: dump_fields(WorkflowStatus, workflow_status_items(db, q, installation_id, limit, selected), selected),
+        headers=response.headers,
+    )
+
+
+@router.get("/summary", response_model=SummaryStats)
+async def get_summary(
+    response: Response,
+    installation_id: int | None = Query(None, description="Limit to one installation"),
     db: Session = Depends(get_db),
 ):
-    runs = (
-        db.query(WorkflowRun)
-        .filter(WorkflowRun.workflow_id == workflow_id)
-        .order_by(WorkflowRun.started_at.desc())
-        .limit(limit)
-        .all()
+    return await cached_response(
+        "summary", installation_id, {}, lambda: summary_stats(db, installation_id), headers=response.headers
     )
-    # simple raw dicts for now
-    return {
-        "workflow_id": workflow_id,
-        "runs": [
-            {
-                "id": r.id,
-                "status": r.status,
-                "conclusion": r.conclusion,
-                "started_at": r.started_at,
-                "completed_at": r.completed_at,
-                "duration_ms": r.duration_ms,
-            }
-            for r in runs
-        ],
-    }
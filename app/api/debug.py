@@ -5,7 +5,12 @@ from sqlalchemy.orm import Session
 
 from app.core.db import get_db
 from app.models.workflow import Workflow
+from app.services.github_identity import identity_stats
+from app.services.live_events import live_stats
+from app.services.organizations import organization_cache_stats
+from app.services.response_cache import cache_stats
 from app.services.scheduling import check_scheduled_workflows
+from app.services.subscription import entitlement_stats
 
 router = APIRouter()
 
@@ -32,3 +37,43 @@ def force_missed(workflow_id: int, db: Session = Depends(get_db)):
         "status": "ok",
         "message": "Forced last_run_at to yesterday and ran monitor once",
     }
+
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    """
+    Hit / miss counters of the read endpoint response cache.
+    """
+    return cache_stats()
+
+
+@router.get("/live-stats")
+def get_live_stats():
+    """
+    Subscriber and delivery counters of the live event hub.
+    """
+    return live_stats()
+
+
+@router.get("/identity-stats")
+def get_identity_stats():
+    """
+    Hit/miss counters of the GitHub identity cache.
+    """
+    return identity_stats()
+
+
+@router.get("/entitlement-stats")
+def get_entitlement_stats():
+    """
+    Hit/load counters of the Pro entitlement cache.
+    """
+    return entitlement_stats()
+
+
+@router.get("/organization-stats")
+def get_organization_stats():
+    """
+    Hit/miss counters of the installation organization cache.
+    """
+    return organization_cache_stats()
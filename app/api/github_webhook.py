@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.models.workflow import Organization, Repository, Workflow
-from app.models.workflow_run import WorkflowRun
+from app.services.github_sync import push_touches_workflows, sync_repo_workflows_async
+from app.services.organizations import invalidate_organization
+from app.services.response_cache import bump_data_version
+from app.services.run_reconcile import start_installation_backfill
+from app.services.workflow_runs import run_columns, upsert_workflow_runs
 
 
 router = APIRouter()
@@ -13,23 +17,31 @@ router = APIRouter()
 @router.post("/webhook")
 async def github_webhook(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # TODO: verify signature using GITHUB_WEBHOOK_SECRET
     event = request.headers.get("X-GitHub-Event")
     payload = await request.json()
 
     if event == "installation":
-        return await handle_installation(payload, db)
+        result = await handle_installation(payload, db)
+        # Organizations may have been created, moved to this installation or deleted
+        invalidate_organization()
     elif event == "installation_repositories":
-        return await handle_installation_repositories(payload, db)
+        result = await handle_installation_repositories(payload, db)
     elif event == "workflow_run":
-        return await handle_workflow_run(payload, db)
-    
-    return {"status": "ignored", "reason": "unsupported_event"}
+        result = await handle_workflow_run(payload, db)
+    elif event == "push":
+        result = await handle_push(payload, db)
+    else:
+        return {"status": "ignored", "reason": "unsupported_event"}
 
+    # Cached dashboard responses for this installation are stale now
+    bump_data_version((payload.get("installation") or {}).get("id"))
+    return result
 
-async def handle_installation(payload: dict, db: Session):
+
+async def handle_installation(payload: dict, db: AsyncSession):
     action = payload.get("action")
     installation = payload.get("installation")
     account = installation.get("account")
@@ -43,7 +55,7 @@ async def handle_installation(payload: dict, db: Session):
 
     if action in ["created", "new_permissions_accepted"]:
         # Upsert Organization
-        org = db.query(Organization).filter(Organization.github_org_id == github_org_id).one_or_none()
+        org = await db.scalar(select(Organization).where(Organization.github_org_id == github_org_id))
         if not org:
             org = Organization(
                 github_org_id=github_org_id,
@@ -55,25 +67,28 @@ async def handle_installation(payload: dict, db: Session):
             org.installation_id = installation_id
             org.name = name
         
-        db.commit()
+        await db.commit()
         
         # If repositories are included in the payload (sometimes in 'repositories' key)
         if "repositories" in payload:
             for repo_data in payload["repositories"]:
                 await upsert_repo(repo_data, org, db)
 
+        # Pull recent run history so new repos start with a baseline
+        start_installation_backfill(installation_id)
+
     elif action == "deleted":
         # Remove organization and its data
         # In a real app, you might want to soft-delete or keep data for a while
-        org = db.query(Organization).filter(Organization.github_org_id == github_org_id).one_or_none()
+        org = await db.scalar(select(Organization).where(Organization.github_org_id == github_org_id))
         if org:
-            db.delete(org)
-            db.commit()
+            await db.delete(org)
+            await db.commit()
     
     return {"status": "ok"}
 
 
-async def handle_installation_repositories(payload: dict, db: Session):
+async def handle_installation_repositories(payload: dict, db: AsyncSession):
     action = payload.get("action")
     installation = payload.get("installation")
     
@@ -81,7 +96,7 @@ async def handle_installation_repositories(payload: dict, db: Session):
         return {"status": "error", "message": "No installation in payload"}
 
     installation_id = installation.get("id")
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
+    org = await db.scalar(select(Organization).where(Organization.installation_id == installation_id).limit(1))
     
     if not org:
         # Should have been created by installation event, but maybe we missed it
@@ -91,19 +106,20 @@ async def handle_installation_repositories(payload: dict, db: Session):
     if action == "added":
         for repo_data in payload.get("repositories_added", []):
             await upsert_repo(repo_data, org, db)
+        start_installation_backfill(installation_id)
             
     elif action == "removed":
         for repo_data in payload.get("repositories_removed", []):
-            repo = db.query(Repository).filter(Repository.github_repo_id == repo_data["id"]).one_or_none()
+            repo = await db.scalar(select(Repository).where(Repository.github_repo_id == repo_data["id"]))
             if repo:
-                db.delete(repo)
-        db.commit()
+                await db.delete(repo)
+        await db.commit()
 
     return {"status": "ok"}
 
 
-async def upsert_repo(repo_data: dict, org: Organization, db: Session):
-    repo = db.query(Repository).filter(Repository.github_repo_id == repo_data["id"]).one_or_none()
+async def upsert_repo(repo_data: dict, org: Organization, db: AsyncSession):
+    repo = await db.scalar(select(Repository).where(Repository.github_repo_id == repo_data["id"]))
     if not repo:
         repo = Repository(
             github_repo_id=repo_data["id"],
@@ -116,10 +132,37 @@ async def upsert_repo(repo_data: dict, org: Organization, db: Session):
         repo.name = repo_data["name"]
         repo.full_name = repo_data["full_name"]
         repo.org_id = org.id
-    db.commit()
+    await db.commit()
+
+
+async def handle_push(payload: dict, db: AsyncSession):
+    """
+    Re-sync a repo's workflow files when a push to its default branch touches
+    .github/workflows, so schedule edits apply without a full resync.
+    """
+    repo_payload = payload.get("repository") or {}
+    installation = payload.get("installation")
+
+    if payload.get("deleted") or payload.get("ref") != f"refs/heads/{repo_payload.get('default_branch')}":
+        return {"status": "ignored", "reason": "not_default_branch"}
 
+    if not push_touches_workflows(payload):
+        return {"status": "ignored", "reason": "no_workflow_changes"}
 
-async def handle_workflow_run(payload: dict, db: Session):
+    repo = await db.scalar(select(Repository).where(Repository.github_repo_id == repo_payload.get("id")))
+    if not repo or not installation:
+        return {"status": "ignored", "reason": "repository_not_tracked"}
+
+    try:
+        stats = await sync_repo_workflows_async(db, repo, installation["id"], ref=payload.get("after") or "HEAD")
+    except Exception as e:
+        print(f"[github_webhook] Push sync failed for {repo.full_name}: {e}")
+        return {"status": "error", "message": str(e)}
+
+    return {"status": "ok", "workflows_updated": stats["workflows_updated"]}
+
+
+async def handle_workflow_run(payload: dict, db: AsyncSession):
     workflow_run = payload.get("workflow_run")
     repo_payload = payload.get("repository")
     installation = payload.get("installation")
@@ -135,7 +178,7 @@ async def handle_workflow_run(payload: dict, db: Session):
     org_payload = payload.get("organization") or repo_payload.get("owner")
     github_org_id = org_payload.get("id")
     
-    org = db.query(Organization).filter(Organization.github_org_id == github_org_id).one_or_none()
+    org = await db.scalar(select(Organization).where(Organization.github_org_id == github_org_id))
     if not org:
         # Create on the fly
         org = Organization(
@@ -144,20 +187,16 @@ async def handle_workflow_run(payload: dict, db: Session):
             installation_id=installation.get("id") if installation else None
         )
         db.add(org)
-        db.flush()
+        await db.flush()
     else:
         # Update installation_id if missing
         if installation and not org.installation_id:
             org.installation_id = installation["id"]
-            db.flush()
+            await db.flush()
 
     # Upsert repository
     github_repo_id = repo_payload["id"]
-    repo = (
-        db.query(Repository)
-        .filter(Repository.github_repo_id == github_repo_id)
-        .one_or_none()
-    )
+    repo = await db.scalar(select(Repository).where(Repository.github_repo_id == github_repo_id))
     if not repo:
         repo = Repository(
             github_repo_id=github_repo_id,
@@ -166,15 +205,11 @@ async def handle_workflow_run(payload: dict, db: Session):
             full_name=repo_payload["full_name"],
         )
         db.add(repo)
-        db.flush()
+        await db.flush()
 
     # Upsert workflow
     github_workflow_id = workflow_run["workflow_id"]
-    workflow = (
-        db.query(Workflow)
-        .filter(Workflow.github_workflow_id == github_workflow_id)
-        .one_or_none()
-    )
+    workflow = await db.scalar(select(Workflow).where(Workflow.github_workflow_id == github_workflow_id))
     if not workflow:
         workflow = Workflow(
             github_workflow_id=github_workflow_id,
@@ -183,54 +218,11 @@ async def handle_workflow_run(payload: dict, db: Session):
             path=workflow_run.get("path") or "",
         )
         db.add(workflow)
-        db.flush()
-
-    # Create or update workflow run
-    github_run_id = workflow_run["id"]
-    run = (
-        db.query(WorkflowRun)
-        .filter(WorkflowRun.github_run_id == github_run_id)
-        .one_or_none()
-    )
-
-    started_at = (
-        datetime.fromisoformat(workflow_run["run_started_at"].replace("Z", "+00:00"))
-        if workflow_run.get("run_started_at")
-        else datetime.utcnow()
-    )
-    completed_at = (
-        datetime.fromisoformat(workflow_run["updated_at"].replace("Z", "+00:00"))
-        if workflow_run.get("updated_at")
-        else None
-    )
-
-    duration_ms = None
-    if completed_at:
-        duration_ms = int((completed_at - started_at).total_seconds() * 1000)
-
-    if not run:
-        run = WorkflowRun(
-            github_run_id=github_run_id,
-            workflow_id=workflow.id,
-            status=workflow_run["status"],
-            conclusion=workflow_run.get("conclusion"),
-            started_at=started_at,
-            completed_at=completed_at,
-            duration_ms=duration_ms,
-            raw_payload=str(payload),
-        )
-        db.add(run)
-    else:
-        run.status = workflow_run["status"]
-        run.conclusion = workflow_run.get("conclusion")
-        run.started_at = started_at
-        run.completed_at = completed_at
-        run.duration_ms = duration_ms
-        run.raw_payload = str(payload)
-
-    # Update workflow last_run_at
-    workflow.last_run_at = completed_at or started_at
+        await db.flush()
 
-    db.commit()
+    # Create or update workflow run (shared with the runs API reconciler, so
+    # it's sync code; run_sync runs it over this session's async connection)
+    await db.run_sync(upsert_workflow_runs, [run_columns(workflow.id, workflow_run, str(payload))])
+    await db.commit()
 
     return {"status": "ok"}
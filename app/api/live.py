@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api.auth import require_installation_access
+from app.services.live_events import event_stream, hub
+
+router = APIRouter()
+
+
+@router.get("/{installation_id}/events")
+async def live_events(installation_id: int, user = Depends(require_installation_access)):
+    """
+    Server-Sent Events stream of an installation's workflow status changes
+    (`status`) and new alerts (`alert`). A `reset` event means events were
+    missed: refetch over REST and reconnect.
+    """
+    subscriber = hub.subscribe(installation_id)
+    return StreamingResponse(
+        event_stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
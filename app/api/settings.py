@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.models.workflow import Organization
-from app.api.auth import get_current_user
+from app.api.auth import require_installation_access, require_organization
+from app.services.organizations import invalidate_organization
+from app.services.response_cache import bump_data_version, etag_dependency
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(etag_dependency(auth=require_installation_access))])
 
 class SettingsUpdate(BaseModel):
     slack_webhook_url: str | None = None
@@ -29,14 +31,8 @@ class SettingsResponse(BaseModel):
     anomaly_threshold_stddev: float
 
 @router.get("/{installation_id}", response_model=SettingsResponse)
-async def get_settings(installation_id: int, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    # Verify user has access to this installation (TODO: strict check against user's installations)
-    # For now, we trust the auth token is valid and the user is part of the org
-    
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    
+async def get_settings(installation_id: int, org = Depends(require_organization)):
+    # Access to the installation is checked by require_organization
     return SettingsResponse(
         slack_webhook_url=org.slack_webhook_url,
         teams_webhook_url=org.teams_webhook_url,
@@ -49,10 +45,8 @@ async def get_settings(installation_id: int, db: Session = Depends(get_db), user
     )
 
 @router.patch("/{installation_id}", response_model=SettingsResponse)
-async def update_settings(installation_id: int, settings: SettingsUpdate, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
+async def update_settings(installation_id: int, settings: SettingsUpdate, db: AsyncSession = Depends(get_async_db), cached_org = Depends(require_organization)):
+    org = await db.get(Organization, cached_org.id)
     
     if settings.slack_webhook_url is not None:
         org.slack_webhook_url = settings.slack_webhook_url
@@ -78,8 +72,9 @@ async def update_settings(installation_id: int, settings: SettingsUpdate, db: Se
     if settings.anomaly_threshold_stddev is not None:
         org.anomaly_threshold_stddev = settings.anomaly_threshold_stddev
         
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    invalidate_organization(installation_id)
+    bump_data_version(installation_id)
     
     return SettingsResponse(
         slack_webhook_url=org.slack_webhook_url,
@@ -1,14 +1,17 @@
 # app/api/workflows.py
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
-from app.models.workflow import Workflow
+from app.core.fields import FIELDS_DESCRIPTION, fields_response, parse_fields, partial, select_columns
+from app.core.pagination import paginate, set_next_cursor
+from app.models.workflow import Repository, Workflow
 from app.models.workflow_run import WorkflowRun
 from app.schemas.workflow import WorkflowSummary
 from app.schemas.workflow_run import WorkflowRunSchema
+from app.services.response_cache import etag_dependency
 
 router = APIRouter()
 
@@ -17,29 +20,42 @@ from app.api.auth import get_current_user
 
 # ...
 
-@router.get("/", response_model=List[WorkflowSummary])
+# Sparse fieldset columns (see core.fields)
+WORKFLOW_COLUMNS = {
+    "id": Workflow.id,
+    "name": Workflow.name,
+    "repo_full_name": Repository.full_name,
+    "cron_expression": Workflow.cron_expression,
+    "last_run_at": Workflow.last_run_at,
+}
+
+
+@router.get("/", response_model=List[WorkflowSummary], dependencies=[Depends(etag_dependency(auth=get_current_user))])
 def list_workflows(
+    response: Response,
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     user_info = Depends(get_current_user)
 ):
-    workflows = db.query(Workflow).all()
-    result: list[WorkflowSummary] = []
-
-    for wf in workflows:
-        result.append(
-            WorkflowSummary(
-                id=wf.id,
-                name=wf.name,
-                repo_full_name=wf.repository.full_name if wf.repository else "",
-                cron_expression=wf.cron_expression,
-                last_run_at=wf.last_run_at,
-            )
-        )
-
-    return result
-
-
-@router.get("/{workflow_id}", response_model=WorkflowSummary)
+    selected = parse_fields(fields, WorkflowSummary)
+    query = db.query(*select_columns(WORKFLOW_COLUMNS, selected))
+    if "repo_full_name" in selected:
+        query = query.outerjoin(Repository, Workflow.repo_id == Repository.id)
+    rows, next_cursor = paginate(query, [Workflow.id], cursor, limit, key=lambda row: (row.id,), descending=False)
+    set_next_cursor(response, next_cursor)
+
+    items = []
+    for row in rows:
+        values = row._asdict()
+        if "repo_full_name" in values:
+            values["repo_full_name"] = values["repo_full_name"] or ""
+        items.append(partial(WorkflowSummary, values))
+    return fields_response(WorkflowSummary, items, selected, headers=response.headers)
+
+
+@router.get("/{workflow_id:int}", response_model=WorkflowSummary, dependencies=[Depends(etag_dependency())])
 def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
     wf = db.query(Workflow).get(workflow_id)
     if not wf:
@@ -54,10 +70,12 @@ def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
     )
 
 
-@router.get("/{workflow_id}/runs", response_model=List[WorkflowRunSchema])
+@router.get("/{workflow_id}/runs", response_model=List[WorkflowRunSchema], dependencies=[Depends(etag_dependency())])
 def list_workflow_runs(
     workflow_id: int,
-    limit: int = 20,
+    response: Response,
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=200),
     db: Session = Depends(get_db),
 ):
     # ensure workflow exists (optional but nicer errors)
@@ -65,12 +83,14 @@ def list_workflow_runs(
     if not exists:
         raise HTTPException(status_code=404, detail="Workflow not found")
 
-    runs = (
+    runs, next_cursor = paginate(
         db.query(WorkflowRun)
         .filter(WorkflowRun.workflow_id == workflow_id)
-        .order_by(WorkflowRun.started_at.desc())
-        .limit(limit)
-        .all()
+        .filter(WorkflowRun.started_at.isnot(None)),
+        [WorkflowRun.started_at, WorkflowRun.id],
+        cursor,
+        limit,
+        key=lambda run: (run.started_at, run.id),
     )
+    set_next_cursor(response, next_cursor)
     return runs
-
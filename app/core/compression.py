@@ -0,0 +1,60 @@
+"""
+Response compression above RESPONSE_COMPRESSION_MIN_BYTES: brotli when the
+client accepts it, gzip otherwise.
+Builds on Starlette's GZip middleware, which leaves small bodies, already
+encoded responses and event streams (SSE) alone.
+"""
+import brotli
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def _accepts(accept_encoding: str, encoding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int, **kwargs):
+        super().__init__(app, minimum_size, **kwargs)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        chunk = self._compressor.process(body)
+        return chunk + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(self, app, minimum_size: int = None, compresslevel: int = None, quality: int = None):
+        super().__init__(
+            app,
+            minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size,
+            compresslevel=settings.RESPONSE_GZIP_LEVEL if compresslevel is None else compresslevel,
+        )
+        self.quality = settings.RESPONSE_BROTLI_QUALITY if quality is None else quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            if _accepts(Headers(scope=scope).get("Accept-Encoding", ""), "br"):
+                responder = BrotliResponder(
+                    self.app,
+                    self.minimum_size,
+                    self.quality,
+                    exclude_content_types=self.exclude_content_types,
+                )
+                await responder(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination for listing endpoints.
+
+A page is the first `limit` rows after the cursor in a fixed order over a
+unique key such as `(detected_at, id)`, so a deep page is one index range
+scan like the first. The cursor is an opaque token encoding the key of the
+last row served; endpoints return the next one in the `X-Next-Cursor`
+header (absent on the last page).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple:
+    """
+    Key values of `cursor`, typed after `columns`. Raises a 400 for anything
+    that isn't a cursor of this listing.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of key values")
+        return tuple(
+            datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        )
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _page_query(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool):
+    # Works on a Query and a select() alike
+    if cursor:
+        after = decode_cursor(cursor, columns)
+        keyset = tuple_(*columns)
+        query = query.filter(keyset < tuple_(*after) if descending else keyset > tuple_(*after))
+
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in columns))
+    # One extra row tells whether there's a next page
+    return query.limit(limit + 1)
+
+
+def _page(rows: List[Any], limit: int, key: Callable[[Any], Sequence[Any]]) -> Tuple[List[Any], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+def paginate(
+    query,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+    descending: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of `query` ordered by `columns` (which must end in a unique
+    column), and the cursor of the next page or None. `key(row)` returns the
+    `columns` values of a result row.
+    """
+    rows = _page_query(query, columns, cursor, limit, descending).all()
+    return _page(rows, limit, key)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+    descending: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    `paginate` for a select() statement run on an AsyncSession.
+    """
+    rows = (await db.execute(_page_query(statement, columns, cursor, limit, descending))).all()
+    return _page(list(rows), limit, key)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
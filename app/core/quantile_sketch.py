@@ -0,0 +1,84 @@
+"""
+Mergeable quantile sketch, for duration percentiles over pre-aggregated data.
+
+Values are counted in logarithmic buckets (as in DDSketch): a bucket spans
+values within a factor GAMMA of each other, so any quantile read back is
+within RELATIVE_ACCURACY of the true value whatever the distribution.
+Sketches merge by adding bucket counts, so per-day sketches combine into the
+sketch of any range of days. Durations from 1 ms to a week fit in ~500
+buckets; a day of one workflow's runs typically takes a handful.
+"""
+import math
+from typing import Dict, Optional
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def _bucket(value: float) -> int:
+    # Bucket i > 0 holds (GAMMA^(i-1), GAMMA^i]; bucket 0 holds values up to 1
+    if value <= 1:
+        return 0
+    return max(1, math.ceil(math.log(value) / _LOG_GAMMA))
+
+
+def _estimate(bucket: int) -> float:
+    if bucket == 0:
+        return 0.0
+    # Within RELATIVE_ACCURACY of both ends of the bucket
+    return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+class QuantileSketch:
+    def __init__(self, buckets: Optional[Dict[int, int]] = None):
+        self.buckets: Dict[int, int] = dict(buckets or {})
+        self.count = sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        bucket = _bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += count
+
+    def merge(self, other: "QuantileSketch"):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+
+    def merge_encoded(self, text: Optional[str]):
+        """
+        `merge` of an encoded sketch, without building it first.
+        """
+        if not text:
+            return
+        buckets = self.buckets
+        values = map(int, text.replace(":", ",").split(","))
+        for bucket, count in zip(values, values):
+            buckets[bucket] = buckets.get(bucket, 0) + count
+            self.count += count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate of the `q` quantile (0 to 1) of the values, None if empty.
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return _estimate(bucket)
+        return _estimate(max(self.buckets))
+
+    def encode(self) -> str:
+        """
+        Compact text form (`bucket:count,...`), read back by `decode`.
+        """
+        return ",".join(f"{bucket}:{count}" for bucket, count in sorted(self.buckets.items()))
+
+    @classmethod
+    def decode(cls, text: Optional[str]) -> "QuantileSketch":
+        sketch = cls()
+        sketch.merge_encoded(text)
+        return sketch
@@ -0,0 +1,86 @@
+"""
+Substring search index over workflow names and repo full names.
+
+- Postgres: pg_trgm GIN indexes on `workflows.name` and
+  `repositories.full_name`, which serve `ILIKE '%q%'` and `%` similarity.
+- SQLite: an FTS5 table with the trigram tokenizer (`workflow_search`, rowid
+  = workflow id) kept current by triggers, so every write path, ORM or
+  set-based upsert, updates it; plus a NOCASE index for name prefixes.
+
+Installed when the tables are created (see the metadata listeners in
+models/workflow) and idempotent, so startup's create_all also adds it to
+existing databases. Where neither is available search falls back to a
+plain ILIKE scan.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+SQLITE_TABLE = "workflow_search"
+
+_POSTGRES_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_workflows_name_trgm ON workflows USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_repositories_full_name_trgm ON repositories USING gin (full_name gin_trgm_ops)",
+]
+
+_SQLITE_STATEMENTS = [
+    # Name-prefix lookups in name order (LIKE 'q%' can use a NOCASE index)
+    "CREATE INDEX IF NOT EXISTS ix_workflows_name_nocase ON workflows (name COLLATE NOCASE)",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5(name, repo_full_name, tokenize='trigram')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS workflow_search_insert AFTER INSERT ON workflows BEGIN
+        INSERT INTO {SQLITE_TABLE}(rowid, name, repo_full_name)
+        SELECT new.id, new.name, (SELECT full_name FROM repositories WHERE id = new.repo_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS workflow_search_update AFTER UPDATE OF name, repo_id ON workflows BEGIN
+        DELETE FROM {SQLITE_TABLE} WHERE rowid = old.id;
+        INSERT INTO {SQLITE_TABLE}(rowid, name, repo_full_name)
+        SELECT new.id, new.name, (SELECT full_name FROM repositories WHERE id = new.repo_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS workflow_search_delete AFTER DELETE ON workflows BEGIN
+        DELETE FROM {SQLITE_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS workflow_search_repo_rename AFTER UPDATE OF full_name ON repositories BEGIN
+        DELETE FROM {SQLITE_TABLE} WHERE rowid IN (SELECT id FROM workflows WHERE repo_id = new.id);
+        INSERT INTO {SQLITE_TABLE}(rowid, name, repo_full_name)
+        SELECT id, name, new.full_name FROM workflows WHERE repo_id = new.id;
+    END
+    """,
+    # Backfill workflows stored before the index existed
+    f"""
+    INSERT INTO {SQLITE_TABLE}(rowid, name, repo_full_name)
+    SELECT w.id, w.name, r.full_name FROM workflows w LEFT JOIN repositories r ON r.id = w.repo_id
+    WHERE NOT EXISTS (SELECT 1 FROM {SQLITE_TABLE})
+    """,
+]
+
+
+def install_search_index(connection: Connection):
+    """
+    Create the dialect's search index if it's missing. Failures (no pg_trgm
+    permission, SQLite built without FTS5) are logged and leave search on ILIKE.
+    """
+    statements = {
+        "postgresql": _POSTGRES_STATEMENTS,
+        "sqlite": _SQLITE_STATEMENTS,
+    }.get(connection.dialect.name)
+    if not statements:
+        return
+
+    try:
+        with connection.begin_nested():
+            for statement in statements:
+                connection.execute(text(statement))
+    except Exception as e:
+        print(f"[search_index] Search index not installed, falling back to ILIKE: {e}")
+
+
+def drop_search_index(connection: Connection):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {SQLITE_TABLE}"))
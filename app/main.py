@@ -1,9 +1,17 @@
-from fastapi import FastAPI
+import math
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.api import github_webhook, health, workflows, github_sync, debug, dashboard, auth, billing, settings, analytics, alerts
+from app.api import github_webhook, health, workflows, github_sync, debug, dashboard, auth, billing, settings, analytics, alerts, live
+from app.core.compression import CompressionMiddleware
 from app.core.db import Base, engine
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.services.scheduling import start_scheduler, shutdown_scheduler
+from app.services.github_auth import load_private_key
+from app.services.github_client import GitHubRateLimitError, close_github_client
+from app.services.workflow_yaml import shutdown_parse_pool
 from app.core.config import settings as config_settings
 
 
@@ -25,6 +33,9 @@ def create_app() -> FastAPI:
         "http://127.0.0.1:5173/",
     ]
 
+    # Compress large list responses; CORS below stays outermost
+    app.add_middleware(CompressionMiddleware)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=origins,
@@ -32,7 +43,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["*"],
+        expose_headers=["*", NEXT_CURSOR_HEADER],
     )
 
     app.include_router(health.router, prefix="/api/health", tags=["health"])
@@ -46,15 +57,32 @@ def create_app() -> FastAPI:
     app.include_router(settings.router, prefix="/api/settings", tags=["settings"]) 
     app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"]) 
     app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"]) 
+    app.include_router(live.router, prefix="/api/live", tags=["live"])
+
+    @app.exception_handler(GitHubRateLimitError)
+    async def _github_rate_limited(request: Request, exc: GitHubRateLimitError):
+        # Requests don't wait out GitHub's rate limit; the client retries later
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "GitHub rate limit reached, try again later"},
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
 
     @app.on_event("startup")
     async def _startup():
         Base.metadata.create_all(bind=engine)
         start_scheduler()
+        # Parse the GitHub App key once up front instead of on every token mint
+        try:
+            load_private_key()
+        except Exception as e:
+            print(f"[github_auth] GitHub App private key not loaded: {e}")
 
     @app.on_event("shutdown")
     async def _shutdown():
         shutdown_scheduler()
+        await close_github_client()
+        shutdown_parse_pool()
 
     return app
 
@@ -8,11 +8,13 @@ from sqlalchemy import (
     Text,
     BigInteger,
     Float,
+    event,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from app.core.db import Base
+from app.core.search_index import drop_search_index, install_search_index
 
 
 class Organization(Base):
@@ -44,6 +46,7 @@ class Repository(Base):
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     name = Column(String, nullable=False)
     full_name = Column(String, nullable=False)  # org/name
+    runs_cursor = Column(DateTime, nullable=True)  # UTC creation time up to which runs have been reconciled
 
     organization = relationship("Organization", back_populates="repositories")
     workflows = relationship("Workflow", back_populates="repository")
@@ -57,8 +60,10 @@ class Workflow(Base):
     repo_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
     name = Column(String, nullable=False)
     path = Column(String, nullable=False)  # .github/workflows/file.yml
+    file_sha = Column(String, nullable=True)  # blob SHA of the file cron_expression was parsed from
 
-    cron_expression = Column(String, nullable=True)
+    cron_expression = Column(String, nullable=True)  # first schedule, kept for display
+    cron_expressions = Column(Text, nullable=True)  # every schedule cron, newline-separated
     last_run_at = Column(DateTime, nullable=True)
     next_run_at = Column(DateTime, nullable=True)
     active = Column(Boolean, default=True)
@@ -66,3 +71,20 @@ class Workflow(Base):
     repository = relationship("Repository", back_populates="workflows")
     runs = relationship("app.models.workflow_run.WorkflowRun", back_populates="workflow",cascade="all, delete-orphan")
 
+    @property
+    def schedules(self) -> list[str]:
+        """All cron expressions the workflow is scheduled on."""
+        if self.cron_expressions:
+            return self.cron_expressions.split("\n")
+        return [self.cron_expression] if self.cron_expression else []
+
+
+# Search index over workflow / repo names, outside the ORM tables (see core/search_index)
+@event.listens_for(Base.metadata, "after_create")
+def _install_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    drop_search_index(connection)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Integer, String, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Integer, String, DateTime, ForeignKey, BigInteger, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -11,6 +11,12 @@ from app.core.db import Base
 
 class WorkflowRun(Base):
     __tablename__ = "workflow_runs"
+    __table_args__ = (
+        # Recent runs by conclusion (e.g. misses in the last 24h on the dashboard)
+        Index("ix_workflow_runs_conclusion_started_at", "conclusion", "started_at"),
+        # Keyset pagination of a workflow's runs, newest first
+        Index("ix_workflow_runs_workflow_started_at_id", "workflow_id", "started_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     github_run_id: Mapped[int] = mapped_column(BigInteger, index=True, unique=True)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class WorkflowRunDaily(Base):
+    """
+    A workflow's completed runs on one UTC day, maintained incrementally by
+    run ingestion (see services/run_rollups) so analytics don't scan raw runs.
+    """
+    __tablename__ = "workflow_run_daily"
+
+    workflow_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("workflows.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
+
+    success: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failure: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Over the runs with a duration
+    duration_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sum_duration_ms: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    min_duration_ms: Mapped[Optional[int]] = mapped_column(BigInteger)
+    max_duration_ms: Mapped[Optional[int]] = mapped_column(BigInteger)
+    # core.quantile_sketch of the durations, for percentiles over any range of days
+    duration_sketch: Mapped[Optional[str]] = mapped_column(Text)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class WorkflowState(Base):
+    """
+    Current health of a workflow, maintained incrementally by run ingestion
+    and the detectors (see services/workflow_status) so the dashboard doesn't
+    recompute it from raw runs.
+    """
+    __tablename__ = "workflow_status"
+
+    workflow_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("workflows.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="HEALTHY", index=True)
+
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    last_conclusion: Mapped[Optional[str]] = mapped_column(String(50))
+    last_success_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    last_failure_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    last_missed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True)
+    missed_count_24h: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+    # Newline-separated ISO times of the misses counted in missed_count_24h
+    recent_misses: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Latest delayed / stuck / anomaly alert
+    last_warning_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    # When a 24h window lapses and the row must be re-derived without a new event
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
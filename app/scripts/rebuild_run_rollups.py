@@ -0,0 +1,26 @@
+import os
+import sys
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.db import Base, SessionLocal, engine
+from app.services.run_rollups import rebuild_run_rollups
+
+
+def rebuild():
+    """
+    Create the workflow_run_daily table if needed and fill it from the
+    stored runs. Run once after upgrading; safe to re-run.
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_run_rollups(db)
+        print(f"Rebuilt {count} daily run rollups")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild()
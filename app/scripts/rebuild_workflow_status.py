@@ -0,0 +1,26 @@
+import os
+import sys
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.db import Base, SessionLocal, engine
+from app.services.workflow_status import rebuild_workflow_status
+
+
+def rebuild():
+    """
+    Create the workflow_status table if needed and fill it from the stored
+    runs and alerts. Run once after upgrading; safe to re-run.
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_workflow_status(db)
+        print(f"Rebuilt status of {count} workflows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild()
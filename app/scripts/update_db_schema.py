@@ -40,6 +40,27 @@ def update_schema():
             conn.execute(text("ALTER TABLE organizations ADD COLUMN IF NOT EXISTS stuck_threshold_multiplier FLOAT DEFAULT 2.0;"))
             conn.execute(text("ALTER TABLE organizations ADD COLUMN IF NOT EXISTS anomaly_threshold_stddev FLOAT DEFAULT 2.0;"))
             
+            # Blob SHA of the last synced workflow file
+            print("Adding workflows.file_sha column...")
+            conn.execute(text("ALTER TABLE workflows ADD COLUMN IF NOT EXISTS file_sha VARCHAR;"))
+            
+            # Every schedule cron of a workflow (cron_expression keeps the first)
+            print("Adding workflows.cron_expressions column...")
+            conn.execute(text("ALTER TABLE workflows ADD COLUMN IF NOT EXISTS cron_expressions TEXT;"))
+            
+            # Per-repo cursor of the workflow run reconciler
+            print("Adding repositories.runs_cursor column...")
+            conn.execute(text("ALTER TABLE repositories ADD COLUMN IF NOT EXISTS runs_cursor TIMESTAMP;"))
+            
+            # Recent missed runs, for the dashboard status query
+            print("Adding ix_workflow_runs_conclusion_started_at index...")
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_workflow_runs_conclusion_started_at ON workflow_runs (conclusion, started_at);"))
+            
+            # Keyset pagination of alerts and runs
+            print("Adding keyset pagination indexes...")
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_alerts_org_detected_at_id ON alerts (organization_id, detected_at, id);"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_workflow_runs_workflow_started_at_id ON workflow_runs (workflow_id, started_at, id);"))
+            
             conn.commit()
             print("Schema updated successfully!")
         except Exception as e:
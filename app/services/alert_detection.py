@@ -1,6 +1,7 @@
 from sqlalchemy import func
 from app.models.workflow_run import WorkflowRun
 from app.services.alert_logger import create_alert
+from app.services.workflow_status import record_warning
 from app.models.alert import AlertType, AlertSeverity
 from datetime import timedelta
 
@@ -60,6 +61,7 @@ def check_stuck_workflows(db, now):
             )
             
             # Log to database
+            record_warning(db, workflow.id, now)
             create_alert(
                 db=db,
                 organization_id=org.id,
@@ -136,6 +138,7 @@ def check_runtime_anomalies(db, now):
             )
             
             # Log to database
+            record_warning(db, workflow.id, now)
             create_alert(
                 db=db,
                 organization_id=org.id,
@@ -1,6 +1,9 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.alert import Alert, AlertType, AlertSeverity
+from app.models.workflow import Organization
+from app.services.live_events import queue_event
+from app.services.response_cache import bump_data_version
 
 
 def create_alert(
@@ -12,7 +15,8 @@ def create_alert(
     severity: AlertSeverity = AlertSeverity.WARNING
 ) -> Alert:
     """
-    Create and store an alert in the database.
+    Create and store an alert in the database, push it to the installation's
+    live dashboards and invalidate its cached responses.
     """
     alert = Alert(
         organization_id=organization_id,
@@ -23,6 +27,20 @@ def create_alert(
         detected_at=datetime.utcnow()
     )
     db.add(alert)
+    db.flush()
+
+    org = db.get(Organization, organization_id)
+    installation_id = org.installation_id if org else None
+    queue_event(db, installation_id, "alert", {
+        "id": alert.id,
+        "workflow_id": workflow_id,
+        "alert_type": alert_type.value,
+        "severity": severity.value,
+        "detected_at": alert.detected_at,
+    })
     db.commit()
     db.refresh(alert)
+
+    if installation_id:
+        bump_data_version(installation_id)
     return alert
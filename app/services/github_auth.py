@@ -1,51 +1,129 @@
+import threading
 import time
+from datetime import datetime
+from functools import lru_cache
+
 import jwt
-import httpx
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
 from app.core.config import get_settings
+from app.services.github_client import get_github_client
 
 settings = get_settings()
 
-def get_jwt() -> str:
+JWT_LIFETIME_SECONDS = 10 * 60
+# Re-sign the app JWT / re-mint installation tokens this long before they expire
+JWT_REFRESH_MARGIN_SECONDS = 60
+TOKEN_REFRESH_MARGIN_SECONDS = 5 * 60
+
+_jwt_lock = threading.Lock()
+_cached_jwt: tuple[str, float] | None = None  # (jwt, expires_at epoch)
+
+# installation_id -> (token, expires_at epoch)
+_installation_tokens: dict[int, tuple[str, float]] = {}
+# installation_id -> lock held while that installation's token is being minted
+_installation_locks: dict[int, threading.Lock] = {}
+_installation_locks_guard = threading.Lock()
+
+
+@lru_cache
+def load_private_key():
     """
-    Generate a JWT for the GitHub App.
+    Read and parse the GitHub App private key. Cached, so the PEM is only
+    read from disk / env once per process (called at startup).
     """
     if settings.GITHUB_APP_PRIVATE_KEY:
-        private_key = settings.GITHUB_APP_PRIVATE_KEY
+        pem = settings.GITHUB_APP_PRIVATE_KEY
     elif settings.GITHUB_APP_PRIVATE_KEY_PATH:
         with open(settings.GITHUB_APP_PRIVATE_KEY_PATH, "r") as f:
-            private_key = f.read()
+            pem = f.read()
     else:
         raise RuntimeError("No GitHub App private key found (env or path)")
 
-    if not settings.GITHUB_APP_ID:
-        raise RuntimeError("GITHUB_APP_ID not set")
+    return load_pem_private_key(pem.encode("utf-8"), password=None)
+
+
+def get_jwt() -> str:
+    """
+    Get a JWT for the GitHub App, re-signing only when the cached one is about to expire.
+    """
+    global _cached_jwt
+
+    with _jwt_lock:
+        now = time.time()
+        if _cached_jwt and _cached_jwt[1] - JWT_REFRESH_MARGIN_SECONDS > now:
+            return _cached_jwt[0]
+
+        private_key = load_private_key()
+
+        if not settings.GITHUB_APP_ID:
+            raise RuntimeError("GITHUB_APP_ID not set")
 
-    payload = {
-        "iat": int(time.time()) - 60,
-        "exp": int(time.time()) + (10 * 60),
-        "iss": settings.GITHUB_APP_ID,
-    }
+        expires_at = int(now) + JWT_LIFETIME_SECONDS
+        payload = {
+            "iat": int(now) - 60,
+            "exp": expires_at,
+            "iss": settings.GITHUB_APP_ID,
+        }
 
-    encoded_jwt = jwt.encode(payload, private_key, algorithm="RS256")
-    return encoded_jwt
+        encoded_jwt = jwt.encode(payload, private_key, algorithm="RS256")
+        _cached_jwt = (encoded_jwt, expires_at)
+        return encoded_jwt
+
+
+def _mint_installation_token(installation_id: int) -> tuple[str, float]:
+    """
+    Ask GitHub for a new installation token. Returns (token, expires_at epoch).
+    """
+    resp = get_github_client().request_sync(
+        "POST",
+        f"/app/installations/{installation_id}/access_tokens",
+        token=get_jwt(),
+        budget_key="app",
+    )
+    if resp.status_code != 201:
+        raise RuntimeError(f"Failed to get installation token: {resp.status_code} {resp.text}")
+
+    data = resp.json()
+    expires_at = datetime.fromisoformat(data["expires_at"].replace("Z", "+00:00")).timestamp()
+    return data["token"], expires_at
+
+
+def _fresh_token(installation_id: int) -> str | None:
+    cached = _installation_tokens.get(installation_id)
+    if cached and cached[1] - TOKEN_REFRESH_MARGIN_SECONDS > time.time():
+        return cached[0]
+    return None
 
 
 def get_installation_token(installation_id: int) -> str:
     """
     Get an access token for a specific installation.
+
+    Tokens are cached until shortly before GitHub's `expires_at`. Concurrent
+    callers for the same installation share a single mint request.
+    """
+    token = _fresh_token(installation_id)
+    if token:
+        return token
+
+    with _installation_locks_guard:
+        lock = _installation_locks.setdefault(installation_id, threading.Lock())
+
+    with lock:
+        # Another caller may have refreshed it while we waited for the lock
+        token = _fresh_token(installation_id)
+        if token:
+            return token
+
+        token, expires_at = _mint_installation_token(installation_id)
+        _installation_tokens[installation_id] = (token, expires_at)
+        print(f"[github_auth] Minted token for installation {installation_id}")
+        return token
+
+
+def invalidate_installation_token(installation_id: int):
+    """
+    Drop a cached installation token, e.g. after GitHub rejected it.
     """
-    jwt_token = get_jwt()
-    headers = {
-        "Authorization": f"Bearer {jwt_token}",
-        "Accept": "application/vnd.github+json",
-    }
-    
-    url = f"https://api.github.com/app/installations/{installation_id}/access_tokens"
-    
-    with httpx.Client() as client:
-        resp = client.post(url, headers=headers)
-        if resp.status_code != 201:
-            raise RuntimeError(f"Failed to get installation token: {resp.status_code} {resp.text}")
-        
-        data = resp.json()
-        return data["token"]
+    _installation_tokens.pop(installation_id, None)
@@ -0,0 +1,357 @@
+"""
+Shared GitHub REST client.
+
+All GitHub API traffic goes through one pooled HTTP/2 connection set, with:
+- a rate-limit budget per installation / user token, read from the
+  X-RateLimit-* headers. Background requests (syncs, reconciliation) are
+  throttled before it runs out, leaving RATE_LIMIT_RESERVE requests for
+  interactive ones; interactive requests never wait long for the budget and
+  fail fast with GitHubRateLimitError instead
+- conditional GETs using cached ETags (304s don't count against the quota),
+  keeping at most ETAG_CACHE_MAX_BYTES of response bodies
+- retries that honour Retry-After on secondary rate limits
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Start spacing requests out once a budget drops below this fraction of its limit
+THROTTLE_BELOW_FRACTION = 0.1
+# Requests per budget kept back for interactive calls
+RATE_LIMIT_RESERVE = 50
+# Longest an interactive request waits for its budget or a Retry-After
+INTERACTIVE_MAX_WAIT_SECONDS = 5
+# Budgets tracked (one per installation / user token); least recently used go first
+BUDGETS_MAX_ENTRIES = 10_000
+MAX_RETRIES = 3
+# Wait used for a secondary rate limit that doesn't say how long to back off
+SECONDARY_RATE_LIMIT_WAIT_SECONDS = 60
+# Total size of the responses kept for conditional GETs; least recently used go first
+ETAG_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class GitHubRateLimitError(RuntimeError):
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds until the budget is expected back
+
+
+class RateLimitBudget:
+    """
+    Rate-limit state of one budget (an installation or a user token).
+    """
+
+    def __init__(self):
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset_at = 0.0
+        self.next_slot_at = 0.0
+
+    def update(self, headers: httpx.Headers):
+        if "x-ratelimit-remaining" not in headers:
+            return
+        self.remaining = int(headers["x-ratelimit-remaining"])
+        self.limit = int(headers.get("x-ratelimit-limit", self.limit or 0)) or self.limit
+        self.reset_at = float(headers.get("x-ratelimit-reset", self.reset_at))
+
+    def reserve_slot(self, now: float, background: bool = True) -> float:
+        """
+        Claim the next request slot; returns how many seconds to wait for it.
+        Background requests are spaced evenly over the rest of the window once
+        the budget gets low, and held until the reset once only the reserve is
+        left. Interactive ones may use the reserve, and only wait once the
+        budget is exhausted.
+        """
+        if self.remaining is None or self.reset_at <= now:
+            return 0.0
+
+        if not background:
+            if self.remaining <= 0:
+                return self.reset_at - now
+            self.remaining -= 1
+            return 0.0
+
+        reserve = min(RATE_LIMIT_RESERVE, (self.limit or 0) // 10)
+        if self.remaining <= reserve:
+            return self.reset_at - now
+
+        if self.limit and self.remaining < self.limit * THROTTLE_BELOW_FRACTION:
+            interval = (self.reset_at - now) / (self.remaining - reserve)
+            slot = max(now, self.next_slot_at)
+            self.next_slot_at = slot + interval
+            self.remaining -= 1
+            return slot - now
+
+        self.remaining -= 1
+        return 0.0
+
+
+class _CachedResponse:
+    def __init__(self, response: httpx.Response):
+        self.etag = response.headers["etag"]
+        self.status_code = response.status_code
+        self.content = response.content
+        # The body is stored decoded, so drop the headers describing the wire encoding
+        self.headers = [
+            (k, v) for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        self.size = len(self.content) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def replay(self, not_modified: httpx.Response) -> httpx.Response:
+        headers = httpx.Headers(self.headers)
+        for name in ("x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"):
+            if name in not_modified.headers:
+                headers[name] = not_modified.headers[name]
+        return httpx.Response(
+            self.status_code,
+            headers=headers,
+            content=self.content,
+            request=not_modified.request,
+        )
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        base_url: str | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        sync_transport: httpx.BaseTransport | None = None,
+    ):
+        self.base_url = (base_url or settings.GITHUB_API_URL).rstrip("/")
+        self._transport = transport
+        self._sync_transport = sync_transport
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._sync_client: httpx.Client | None = None
+        self._budgets: OrderedDict[str, RateLimitBudget] = OrderedDict()
+        self._etags: OrderedDict[tuple[str, str], _CachedResponse] = OrderedDict()
+        self._etag_bytes = 0
+        self._lock = threading.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    def budget(self, budget_key: str) -> RateLimitBudget:
+        with self._lock:
+            budget = self._budgets.get(budget_key)
+            if budget is None:
+                budget = self._budgets[budget_key] = RateLimitBudget()
+                while len(self._budgets) > BUDGETS_MAX_ENTRIES:
+                    self._budgets.popitem(last=False)
+            else:
+                self._budgets.move_to_end(budget_key)
+            return budget
+
+    def _client(self) -> httpx.AsyncClient:
+        # httpx pools are tied to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if self._async_client is not None:
+                self._close_on_loop(self._async_client, self._async_loop)
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=True,
+                timeout=30.0,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    @staticmethod
+    def _close_on_loop(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """
+        Close the pool of a previous event loop. It can only be closed on that
+        loop, so it's scheduled there if the loop still runs (in another
+        thread); a stopped loop's connections are closed as they're collected.
+        """
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def _client_sync(self) -> httpx.Client:
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                base_url=self.base_url,
+                http2=True,
+                timeout=30.0,
+                transport=self._sync_transport,
+            )
+        return self._sync_client
+
+    def _prepare(self, method: str, url: str, token: str | None, budget_key: str | None, headers: dict | None):
+        request_headers = {"Accept": "application/vnd.github+json"}
+        if token:
+            request_headers["Authorization"] = f"Bearer {token}"
+        request_headers.update(headers or {})
+
+        if budget_key is None:
+            budget_key = "token:" + hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+
+        cache_key = (budget_key, url) if method == "GET" else None
+        with self._lock:
+            cached = self._etags.get(cache_key) if cache_key else None
+        if cached:
+            request_headers["If-None-Match"] = cached.etag
+
+        return request_headers, self.budget(budget_key), cache_key, cached
+
+    @staticmethod
+    def _max_wait(background: bool) -> float:
+        return settings.GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS if background else INTERACTIVE_MAX_WAIT_SECONDS
+
+    def _throttle_wait(self, budget: RateLimitBudget, background: bool) -> float:
+        wait = budget.reserve_slot(time.time(), background)
+        if wait > self._max_wait(background):
+            raise GitHubRateLimitError(f"GitHub rate limit exhausted, resets in {int(wait)}s", retry_after=wait)
+        return wait
+
+    @staticmethod
+    def _retry_after(response: httpx.Response, attempt: int) -> float | None:
+        """
+        Seconds to back off before retrying a rate-limited response, or None if
+        the response shouldn't be retried.
+        """
+        if attempt >= MAX_RETRIES or response.status_code not in (403, 429):
+            return None
+
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+        if response.headers.get("x-ratelimit-remaining") == "0":
+            return max(float(response.headers.get("x-ratelimit-reset", 0)) - time.time(), 0) + 1
+        if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            return SECONDARY_RATE_LIMIT_WAIT_SECONDS * 2 ** attempt
+        return None
+
+    def _finish(self, response: httpx.Response, cache_key, cached: _CachedResponse | None) -> httpx.Response:
+        if response.status_code == 304 and cached:
+            with self._lock:
+                self._etags.move_to_end(cache_key)
+            return cached.replay(response)
+
+        if cache_key and response.status_code == 200 and "etag" in response.headers:
+            entry = _CachedResponse(response)
+            if entry.size > ETAG_CACHE_MAX_BYTES:
+                return response
+            with self._lock:
+                replaced = self._etags.pop(cache_key, None)
+                if replaced is not None:
+                    self._etag_bytes -= replaced.size
+                self._etags[cache_key] = entry
+                self._etag_bytes += entry.size
+                while self._etag_bytes > ETAG_CACHE_MAX_BYTES:
+                    _, evicted = self._etags.popitem(last=False)
+                    self._etag_bytes -= evicted.size
+        return response
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        token: str | None = None,
+        budget_key: str | None = None,
+        headers: dict | None = None,
+        background: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request to the GitHub API. `budget_key` names the rate-limit
+        budget the request is charged to (e.g. `installation:123`); it defaults
+        to one derived from the token. `background` requests may wait up to
+        GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS for the budget; others (serving a
+        user) raise GitHubRateLimitError past INTERACTIVE_MAX_WAIT_SECONDS.
+        """
+        request_headers, budget, cache_key, cached = self._prepare(method, url, token, budget_key, headers)
+
+        for attempt in range(MAX_RETRIES + 1):
+            wait = self._throttle_wait(budget, background)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            response = await self._client().request(method, url, headers=request_headers, **kwargs)
+            budget.update(response.headers)
+
+            retry_after = self._retry_after(response, attempt)
+            if retry_after is None:
+                break
+            if retry_after > self._max_wait(background):
+                raise GitHubRateLimitError(f"GitHub asked to retry after {int(retry_after)}s", retry_after=retry_after)
+            print(f"[github_client] {response.status_code} on {method} {url}, retrying in {retry_after:.0f}s")
+            await asyncio.sleep(retry_after)
+
+        return self._finish(response, cache_key, cached)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def request_sync(
+        self,
+        method: str,
+        url: str,
+        token: str | None = None,
+        budget_key: str | None = None,
+        headers: dict | None = None,
+        background: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Blocking variant of `request` for code that runs outside the event loop.
+        """
+        request_headers, budget, cache_key, cached = self._prepare(method, url, token, budget_key, headers)
+
+        for attempt in range(MAX_RETRIES + 1):
+            wait = self._throttle_wait(budget, background)
+            if wait > 0:
+                time.sleep(wait)
+
+            response = self._client_sync().request(method, url, headers=request_headers, **kwargs)
+            budget.update(response.headers)
+
+            retry_after = self._retry_after(response, attempt)
+            if retry_after is None:
+                break
+            if retry_after > self._max_wait(background):
+                raise GitHubRateLimitError(f"GitHub asked to retry after {int(retry_after)}s", retry_after=retry_after)
+            print(f"[github_client] {response.status_code} on {method} {url}, retrying in {retry_after:.0f}s")
+            time.sleep(retry_after)
+
+        return self._finish(response, cache_key, cached)
+
+
+_github_client: GitHubClient | None = None
+
+
+def get_github_client() -> GitHubClient:
+    """
+    The process-wide GitHub client shared by every caller.
+    """
+    global _github_client
+    if _github_client is None:
+        _github_client = GitHubClient()
+    return _github_client
+
+
+async def close_github_client():
+    global _github_client
+    if _github_client is not None:
+        await _github_client.aclose()
+        _github_client = None
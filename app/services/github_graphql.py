@@ -0,0 +1,64 @@
+"""
+Batched workflow file fetching over the GitHub GraphQL API.
+
+One query reads the `.github/workflows` tree, blob SHAs and file texts of
+many repositories at once through aliased `repository { object(expression:) }`
+fields, instead of a trees call plus one blob call per file over REST.
+"""
+from typing import Dict, List, Optional
+
+WORKFLOWS_EXPRESSION = "HEAD:.github/workflows"
+
+_FRAGMENT = """
+fragment workflowFiles on Repository {
+  object(expression: "%s") {
+    ... on Tree {
+      entries {
+        name
+        type
+        oid
+        object { ... on Blob { text isBinary } }
+      }
+    }
+  }
+}
+""" % WORKFLOWS_EXPRESSION
+
+
+def workflow_files_query(repos: List[dict]) -> tuple[str, Dict[str, str]]:
+    """
+    Query and variables fetching the workflow files of `repos` (REST repo
+    objects with `owner.login` and `name`), one alias `r<i>` per repo.
+    """
+    params, fields, variables = [], [], {}
+    for i, repo_data in enumerate(repos):
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        fields.append(f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...workflowFiles }}")
+        variables[f"o{i}"] = repo_data["owner"]["login"]
+        variables[f"n{i}"] = repo_data["name"]
+
+    query = f"query({', '.join(params)}) {{\n" + "\n".join(fields) + "\n}\n" + _FRAGMENT
+    return query, variables
+
+
+def parse_workflow_files(repos: List[dict], data: Optional[dict]) -> Dict[int, Dict[str, tuple]]:
+    """
+    {repo id: {path: (blob sha, text or None)}} for every repo the response
+    covered. Repos that errored are left out; a repo without a workflows
+    directory maps to {}. Text is None for binary or oversized blobs.
+    """
+    files: Dict[int, Dict[str, tuple]] = {}
+    for i, repo_data in enumerate(repos):
+        repository = (data or {}).get(f"r{i}")
+        if repository is None:
+            continue
+
+        repo_files = files[repo_data["id"]] = {}
+        tree = repository.get("object") or {}
+        for entry in tree.get("entries") or []:
+            if entry.get("type") != "blob" or not entry["name"].endswith((".yml", ".yaml")):
+                continue
+            blob = entry.get("object") or {}
+            text = None if blob.get("isBinary") else blob.get("text")
+            repo_files[f".github/workflows/{entry['name']}"] = (entry["oid"], text)
+    return files
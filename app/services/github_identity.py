@@ -0,0 +1,175 @@
+"""
+GitHub identity of user tokens: the user and the app installations they can
+access, cached per token so authenticated requests don't call GitHub.
+
+An entry is served for IDENTITY_CACHE_TTL_SECONDS. Past
+IDENTITY_REFRESH_AFTER_SECONDS it's still served, and refreshed in the
+background for the next request. Concurrent lookups of the same token share
+one fetch. Tokens are keyed by hash, so the cache doesn't hold them.
+
+Installations a token was refused are remembered for
+IDENTITY_DENIED_TTL_SECONDS, so repeated requests for them don't each
+re-fetch the identity.
+"""
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import get_settings
+from app.services.github_client import GitHubClient
+
+settings = get_settings()
+
+INSTALLATIONS_PER_PAGE = 100
+
+stats = {"hits": 0, "misses": 0, "refreshes": 0, "denied_hits": 0}
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class Identity:
+    def __init__(self, user: Dict[str, Any], installations: List[Dict[str, Any]]):
+        self.user = user
+        self.installations = installations  # GitHub installation objects
+        self.installation_ids = frozenset(inst["id"] for inst in installations)
+        self.fetched_at = time.monotonic()
+
+
+_identities: "OrderedDict[str, Identity]" = OrderedDict()
+_inflight: Dict[str, asyncio.Task] = {}
+# (token key, installation id) -> when access to it was refused
+_denied: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+
+
+def _key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def fetch_identity(token: str, client: GitHubClient) -> Identity:
+    """
+    The user and installations of `token`, from GitHub. Raises
+    InvalidTokenError when GitHub doesn't accept the token.
+
+    The first page of installations tells us `total_count`; the remaining
+    pages are then fetched concurrently.
+    """
+    url = "/user/installations?per_page={per_page}&page={page}"
+    user_response, first = await asyncio.gather(
+        client.get("/user", token=token, timeout=10.0),
+        client.get(url.format(per_page=INSTALLATIONS_PER_PAGE, page=1), token=token, timeout=10.0),
+    )
+    if user_response.status_code != 200:
+        raise InvalidTokenError(f"GitHub /user returned {user_response.status_code}")
+    if first.status_code != 200:
+        raise RuntimeError(f"Failed to fetch installations: {first.status_code}")
+
+    body = first.json()
+    installations = list(body.get("installations", []))
+    pages = math.ceil(body.get("total_count", len(installations)) / INSTALLATIONS_PER_PAGE)
+
+    responses = await asyncio.gather(*(
+        client.get(url.format(per_page=INSTALLATIONS_PER_PAGE, page=page), token=token, timeout=10.0)
+        for page in range(2, pages + 1)
+    ))
+    for page, response in enumerate(responses, start=2):
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch installations page {page}: {response.status_code}")
+        installations.extend(response.json().get("installations", []))
+    return Identity(user_response.json(), installations)
+
+
+def _store(key: str, identity: Identity):
+    _identities[key] = identity
+    _identities.move_to_end(key)
+    while len(_identities) > settings.IDENTITY_CACHE_MAX_ENTRIES:
+        _identities.popitem(last=False)
+
+
+def _start_fetch(key: str, token: str, client: GitHubClient) -> asyncio.Task:
+    task = _inflight.get(key)
+    if task is not None:
+        return task
+
+    async def fetch():
+        try:
+            identity = await fetch_identity(token, client)
+        except InvalidTokenError:
+            _identities.pop(key, None)
+            raise
+        _store(key, identity)
+        return identity
+
+    task = _inflight[key] = asyncio.get_running_loop().create_task(fetch())
+    task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+
+def _log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[github_identity] Background refresh failed: {task.exception()}")
+
+
+async def get_identity(token: str, client: GitHubClient, refresh: bool = False) -> Identity:
+    """
+    The cached identity of `token`, fetched when missing or expired (or when
+    `refresh`, e.g. to pick up an installation added since it was cached).
+    """
+    key = _key(token)
+    identity = _identities.get(key)
+    age = time.monotonic() - identity.fetched_at if identity else None
+
+    if identity is not None and not refresh and age < settings.IDENTITY_CACHE_TTL_SECONDS:
+        stats["hits"] += 1
+        _identities.move_to_end(key)
+        if age > settings.IDENTITY_REFRESH_AFTER_SECONDS and key not in _inflight:
+            stats["refreshes"] += 1
+            _start_fetch(key, token, client).add_done_callback(_log_refresh_failure)
+        return identity
+
+    stats["misses"] += 1
+    return await asyncio.shield(_start_fetch(key, token, client))
+
+
+def recently_denied(token: str, installation_id: int) -> bool:
+    """
+    Whether `token` was refused `installation_id` within
+    IDENTITY_DENIED_TTL_SECONDS.
+    """
+    key = (_key(token), installation_id)
+    denied_at = _denied.get(key)
+    if denied_at is None:
+        return False
+    if time.monotonic() - denied_at >= settings.IDENTITY_DENIED_TTL_SECONDS:
+        del _denied[key]
+        return False
+    stats["denied_hits"] += 1
+    return True
+
+
+def remember_denied(token: str, installation_id: int):
+    key = (_key(token), installation_id)
+    _denied[key] = time.monotonic()
+    _denied.move_to_end(key)
+    while len(_denied) > settings.IDENTITY_CACHE_MAX_ENTRIES:
+        _denied.popitem(last=False)
+
+
+def forget_identity(token: str):
+    _identities.pop(_key(token), None)
+
+
+def clear_identity_cache():
+    _identities.clear()
+    _inflight.clear()
+    _denied.clear()
+    for key in stats:
+        stats[key] = 0
+
+
+def identity_stats() -> Dict[str, Any]:
+    return {**stats, "entries": len(_identities), "denied_entries": len(_denied)}
@@ -1,273 +1,771 @@
+import asyncio
 import base64
 import json
+import math
+from collections import OrderedDict
+from concurrent.futures import Executor
 from typing import Optional, Dict, List
 
 import httpx
-import yaml
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import get_settings
-from app.models.workflow import Workflow
-from app.services.github_auth import get_installation_token
+from app.core.db import upsert
+from app.models.workflow import Organization, Repository, Workflow
+from app.services.github_auth import get_installation_token, invalidate_installation_token
+from app.services.github_client import GitHubClient, get_github_client
+from app.services.github_graphql import parse_workflow_files, workflow_files_query
+from app.services.response_cache import bump_data_version
+from app.services.workflow_yaml import extract_crons_async, get_parse_pool
 
 settings = get_settings()
 
+REPOS_PER_PAGE = 100
+WORKFLOWS_DIR = ".github/workflows/"
+# Repos per UPDATE when deactivating workflows that disappeared from GitHub
+DEACTIVATE_REPOS_PER_STATEMENT = 500
+# GitHub truncates the `commits` list of a push payload at this many
+PUSH_PAYLOAD_MAX_COMMITS = 20
 
-def fetch_workflow_file(owner: str, repo: str, path: str, token: str) -> Optional[str]:
+# Parsed crons per workflow blob SHA. Blobs are content-addressed, so an entry
+# never goes stale; identical files across repos are only fetched/parsed once.
+# Least recently used SHAs are evicted past the cap.
+CRON_CACHE_MAX_ENTRIES = 50_000
+_cron_by_sha: "OrderedDict[str, List[str]]" = OrderedDict()
+
+
+def decode_content(data: dict) -> Optional[str]:
     """
-    Fetch workflow YAML content from GitHub using installation token.
+    Decode the base64 `content` field of a contents API response.
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json",
+    content_b64 = data.get("content")
+    if not content_b64:
+        return None
+
+    return base64.b64decode(content_b64).decode("utf-8")
+
+
+def _file_columns(file_sha: Optional[str], crons: List[str]) -> Dict:
+    return {
+        "file_sha": file_sha,
+        "cron_expression": crons[0] if crons else None,
+        "cron_expressions": "\n".join(crons) if crons else None,
     }
 
-    try:
-        resp = httpx.get(url, headers=headers)
+
+def _set_workflow_file(wf: Workflow, file_sha: Optional[str], crons: List[str]):
+    for column, value in _file_columns(file_sha, crons).items():
+        setattr(wf, column, value)
+
+
+class _InstallationFetcher:
+    """
+    GitHub GET helper for one installation's sync.
+
+    Every request holds a slot of the per-installation semaphore and of the
+    global semaphore shared by all installations in the same sync, so one big
+    org can't starve the others and the total in-flight count stays bounded.
+    """
+
+    def __init__(
+        self,
+        client: GitHubClient,
+        installation_id: int,
+        token: str,
+        global_limit: asyncio.Semaphore,
+        max_concurrency: int,
+        parse_pool: Optional[Executor] = None,
+    ):
+        self.client = client
+        self.token = token
+        self.budget_key = f"installation:{installation_id}"
+        self.global_limit = global_limit
+        self.installation_limit = asyncio.Semaphore(max_concurrency)
+        # Where fetched workflow files are parsed; None parses inline
+        self.parse_pool = parse_pool
+
+    async def get(self, url: str) -> httpx.Response:
+        # Take the per-installation slot first so waiting here doesn't hold a global slot
+        async with self.installation_limit:
+            async with self.global_limit:
+                return await self.client.get(url, token=self.token, budget_key=self.budget_key, background=True)
+
+    async def graphql(self, query: str, variables: dict) -> httpx.Response:
+        # GraphQL has its own rate limit, separate from the REST one
+        async with self.installation_limit:
+            async with self.global_limit:
+                return await self.client.request(
+                    "POST",
+                    settings.GITHUB_GRAPHQL_URL or "/graphql",
+                    token=self.token,
+                    budget_key=f"{self.budget_key}:graphql",
+                    background=True,
+                    json={"query": query, "variables": variables},
+                )
+
+
+async def _list_installation_repos(fetcher: _InstallationFetcher, installation_id: int, stats: Dict) -> List[dict]:
+    """
+    List every repository of an installation. The first page tells us
+    `total_count`, the remaining pages are then fetched concurrently.
+    """
+    url = "/installation/repositories?per_page={per_page}&page={page}"
+
+    first = await fetcher.get(url.format(per_page=REPOS_PER_PAGE, page=1))
+    if first.status_code == 401:
+        # Revoked or expired early; make the next sync mint a fresh token
+        invalidate_installation_token(installation_id)
+    if first.status_code != 200:
+        msg = f"Failed to fetch repos for inst {installation_id}: {first.status_code} {first.text}"
+        print(f"[github_sync] {msg}")
+        stats["errors"].append(msg)
+        return []
+
+    body = first.json()
+    repos_data = list(body.get("repositories", []))
+    pages = math.ceil(body.get("total_count", len(repos_data)) / REPOS_PER_PAGE)
+
+    responses = await asyncio.gather(
+        *(fetcher.get(url.format(per_page=REPOS_PER_PAGE, page=page)) for page in range(2, pages + 1))
+    )
+    for page, resp in enumerate(responses, start=2):
         if resp.status_code != 200:
-            print(f"[github_sync] Failed to fetch {owner}/{repo}/{path}: {resp.status_code} {resp.text}")
-            return None
+            msg = f"Failed to fetch repos page {page} for inst {installation_id}: {resp.status_code}"
+            print(f"[github_sync] {msg}")
+            stats["errors"].append(msg)
+            continue
+        repos_data.extend(resp.json().get("repositories", []))
 
-        data = resp.json()
-        # Content is base64-encoded
-        content_b64 = data.get("content")
-        if not content_b64:
-            return None
+    return repos_data
 
-        decoded = base64.b64decode(content_b64).decode("utf-8")
-        return decoded
-    except Exception as e:
-        print(f"[github_sync] Exception fetching file: {e}")
+
+def _is_workflow_file(path: str) -> bool:
+    return path.startswith(WORKFLOWS_DIR) and path.endswith((".yml", ".yaml"))
+
+
+async def _list_workflow_blobs(
+    fetcher: _InstallationFetcher,
+    full_name: str,
+    stats: Dict,
+    ref: str = "HEAD",
+) -> Optional[Dict[str, str]]:
+    """
+    Map workflow file path -> blob SHA at `ref` (default branch by default)
+    with a single recursive trees call. Returns None if the listing failed.
+    """
+    resp = await fetcher.get(f"/repos/{full_name}/git/trees/{ref}?recursive=1")
+    if resp.status_code in (404, 409):
+        # Empty repository, nothing committed yet
+        return {}
+    if resp.status_code != 200:
+        stats["errors"].append(f"Failed to fetch tree for {full_name}: {resp.status_code}")
+        return None
+
+    body = resp.json()
+    if not body.get("truncated"):
+        return {
+            entry["path"]: entry["sha"]
+            for entry in body.get("tree", [])
+            if entry.get("type") == "blob" and _is_workflow_file(entry["path"])
+        }
+
+    # Tree too big to list in one response: fall back to listing the workflows dir
+    resp = await fetcher.get(f"/repos/{full_name}/contents/{WORKFLOWS_DIR.rstrip('/')}?ref={ref}")
+    if resp.status_code == 404:
+        return {}
+    if resp.status_code != 200:
+        stats["errors"].append(f"Failed to list {WORKFLOWS_DIR} for {full_name}: {resp.status_code}")
         return None
+    return {
+        entry["path"]: entry["sha"]
+        for entry in resp.json()
+        if entry.get("type") == "file" and _is_workflow_file(entry["path"])
+    }
+
+
+# blob SHA -> in-flight fetch, so concurrent repos sharing a file fetch it once
+_blob_fetches: Dict[str, asyncio.Future] = {}
 
 
-def extract_cron_from_yaml(yaml_content: str) -> Optional[str]:
+def _cached_crons(sha: str) -> Optional[List[str]]:
+    crons = _cron_by_sha.get(sha)
+    if crons is not None:
+        _cron_by_sha.move_to_end(sha)
+    return crons
+
+
+def _remember_crons(sha: str, crons: List[str]):
+    _cron_by_sha[sha] = crons
+    _cron_by_sha.move_to_end(sha)
+    while len(_cron_by_sha) > CRON_CACHE_MAX_ENTRIES:
+        _cron_by_sha.popitem(last=False)
+
+
+async def _fetch_blob_cron(
+    fetcher: _InstallationFetcher, full_name: str, path: str, sha: str, stats: Dict
+) -> Optional[List[str]]:
     """
-    Given YAML content of a workflow file, extract the first schedule cron expression.
+    Fetch one workflow blob, parse and cache its crons. Returns the crons,
+    None if the fetch failed.
     """
-    try:
-        parsed = yaml.safe_load(yaml_content)
-    except Exception as e:
-        print(f"[github_sync] YAML parse error: {e}")
+    resp = await fetcher.get(f"/repos/{full_name}/git/blobs/{sha}")
+    if resp.status_code != 200:
+        stats["errors"].append(f"Failed to fetch {full_name}/{path}: {resp.status_code}")
         return None
 
-    def find_cron(node) -> Optional[str]:
-        # If it's a dict, look for 'schedule' key and recurse into values
-        if isinstance(node, dict):
-            # Direct schedule
-            if "schedule" in node:
-                schedule_block = node["schedule"]
-
-                # schedule: [{cron: "..."}]
-                if isinstance(schedule_block, list):
-                    for item in schedule_block:
-                        if isinstance(item, dict) and "cron" in item:
-                            return item["cron"]
-
-                # schedule: {cron: "..."} (less common)
-                if isinstance(schedule_block, dict) and "cron" in schedule_block:
-                    return schedule_block["cron"]
-
-            # Recurse into all values
-            for value in node.values():
-                cron = find_cron(value)
-                if cron:
-                    return cron
-
-        # If it's a list, recurse into each element
-        if isinstance(node, list):
-            for item in node:
-                cron = find_cron(item)
-                if cron:
-                    return cron
+    stats["files_fetched"] += 1
+    content = decode_content(resp.json())
+    crons = await extract_crons_async(content, fetcher.parse_pool) if content else []
+    _remember_crons(sha, crons)
+    return crons
+
 
+async def _resolve_changed_crons(
+    fetcher: _InstallationFetcher,
+    full_name: str,
+    blobs: Dict[str, str],
+    known_shas: Dict[str, Optional[str]],
+    stats: Dict,
+) -> Dict[str, tuple]:
+    """
+    For every path whose blob SHA differs from `known_shas`, work out its crons
+    (from the SHA cache, or by fetching and parsing the blob).
+    Returns {path: (sha, crons)} for the changed paths that could be resolved.
+    """
+    resolved = {}
+
+    async def resolve(path: str, sha: str):
+        # Use the fetch's own result: the cache may evict the SHA meanwhile
+        crons = _cached_crons(sha)
+        if crons is None:
+            pending = _blob_fetches.get(sha)
+            if pending is None:
+                pending = asyncio.ensure_future(_fetch_blob_cron(fetcher, full_name, path, sha, stats))
+                _blob_fetches[sha] = pending
+                pending.add_done_callback(lambda _: _blob_fetches.pop(sha, None))
+            crons = await pending
+            if crons is None:
+                return
+        resolved[path] = (sha, crons)
+
+    await asyncio.gather(
+        *(resolve(path, sha) for path, sha in blobs.items() if known_shas.get(path) != sha)
+    )
+    return resolved
+
+
+async def _prefetch_workflow_files(
+    fetcher: _InstallationFetcher,
+    repos: List[dict],
+    stats: Dict,
+) -> Dict[int, Dict[str, str]]:
+    """
+    Fetch and parse the workflow files of many repos with batched GraphQL
+    queries. Returns {repo id: {path: blob sha}} for the repos it covered;
+    the rest (and files GraphQL returned no text for) go through REST.
+    """
+    per_query = settings.GITHUB_GRAPHQL_REPOS_PER_QUERY
+    if not per_query or not repos:
+        return {}
+
+    async def fetch_chunk(chunk: List[dict]) -> Dict[int, Dict[str, tuple]]:
+        query, variables = workflow_files_query(chunk)
+        resp = await fetcher.graphql(query, variables)
+        if resp.status_code != 200:
+            print(f"[github_sync] GraphQL workflow fetch failed ({resp.status_code}), falling back to REST")
+            return {}
+        # Errors for single repos (e.g. not found) come with data for the others
+        return parse_workflow_files(chunk, resp.json().get("data"))
+
+    chunks = [repos[i:i + per_query] for i in range(0, len(repos), per_query)]
+    blobs: Dict[int, Dict[str, str]] = {}
+    texts: Dict[str, str] = {}  # blob sha -> text of the files to parse
+    for files in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        for repo_id, repo_files in files.items():
+            blobs[repo_id] = {}
+            for path, (sha, text) in repo_files.items():
+                blobs[repo_id][path] = sha
+                if text is not None and sha not in _cron_by_sha:
+                    texts[sha] = text
+
+    # Submitted together, so the parse pool's workers all get some
+    stats["files_fetched"] += len(texts)
+    parsed = await asyncio.gather(*(extract_crons_async(text, fetcher.parse_pool) for text in texts.values()))
+    for sha, crons in zip(texts, parsed):
+        _remember_crons(sha, crons)
+    return blobs
+
+
+async def _list_repo_workflows(
+    fetcher: _InstallationFetcher,
+    repo_data: dict,
+    known_shas: Dict[str, Optional[str]],
+    stats: Dict,
+    blobs: Optional[Dict[str, str]] = None,
+) -> Optional[List[dict]]:
+    """
+    List the workflows of one repository. Workflows whose file changed since
+    the last sync get `_file` = (blob sha, crons) attached. `blobs` (path ->
+    blob sha) skips the trees call when the files were already prefetched.
+    """
+    full_name = repo_data["full_name"]
+
+    if blobs is None:
+        wf_resp, blobs = await asyncio.gather(
+            fetcher.get(f"/repos/{full_name}/actions/workflows?per_page=100"),
+            _list_workflow_blobs(fetcher, full_name, stats),
+        )
+    else:
+        wf_resp = await fetcher.get(f"/repos/{full_name}/actions/workflows?per_page=100")
+    if wf_resp.status_code != 200:
+        stats["errors"].append(f"Failed to fetch workflows for {full_name}: {wf_resp.status_code}")
         return None
 
-    cron_value = find_cron(parsed)
-    if not cron_value:
-        print("[github_sync] No schedule/cron found in YAML structure")
-    return cron_value
+    wfs_data = wf_resp.json().get("workflows", [])
+    stats["repos_scanned"] += 1
+    if not blobs:
+        return wfs_data
+
+    paths = {wf_data["path"] for wf_data in wfs_data}
+    resolved = await _resolve_changed_crons(
+        fetcher,
+        full_name,
+        {path: sha for path, sha in blobs.items() if path in paths},
+        known_shas,
+        stats,
+    )
+    for wf_data in wfs_data:
+        if wf_data["path"] in resolved:
+            wf_data["_file"] = resolved[wf_data["path"]]
+    return wfs_data
+
+
+def _store_installation(
+    db: Session,
+    installation_id: int,
+    repos_data: List[dict],
+    workflows_data: List[Optional[List[dict]]],
+    stats: Dict,
+):
+    """
+    Reconcile everything discovered for one installation with the DB in a
+    handful of set-based statements and a single transaction: upsert orgs,
+    repos and workflows, then deactivate workflows that are gone from repos
+    whose workflow listing succeeded.
+    """
+    if not repos_data:
+        return
+
+    orgs = {
+        repo_data["owner"]["id"]: {
+            "github_org_id": repo_data["owner"]["id"],
+            "installation_id": installation_id,
+            "name": repo_data["owner"]["login"],
+        }
+        for repo_data in repos_data
+    }
 
+    try:
+        stmt = upsert(db, Organization)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Organization.github_org_id],
+                set_={"installation_id": stmt.excluded.installation_id, "name": stmt.excluded.name},
+            ),
+            list(orgs.values()),
+        )
+        org_ids = dict(
+            db.query(Organization.github_org_id, Organization.id)
+            .filter(Organization.github_org_id.in_(orgs))
+            .all()
+        )
 
-def sync_cron_expressions(db: Session):
+        stmt = upsert(db, Repository)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Repository.github_repo_id],
+                set_={
+                    "org_id": stmt.excluded.org_id,
+                    "name": stmt.excluded.name,
+                    "full_name": stmt.excluded.full_name,
+                },
+            ),
+            [
+                {
+                    "github_repo_id": repo_data["id"],
+                    "org_id": org_ids[repo_data["owner"]["id"]],
+                    "name": repo_data["name"],
+                    "full_name": repo_data["full_name"],
+                }
+                for repo_data in repos_data
+            ],
+        )
+        repo_ids = dict(
+            db.query(Repository.github_repo_id, Repository.id)
+            .filter(Repository.github_repo_id.in_([repo_data["id"] for repo_data in repos_data]))
+            .all()
+        )
+
+        # Workflows whose file changed also get their schedule; the rest keep theirs
+        listed: Dict[int, List[int]] = {}
+        changed_files, unchanged_files = [], []
+        for repo_data, wfs_data in zip(repos_data, workflows_data):
+            if wfs_data is None:
+                continue
+            repo_id = repo_ids[repo_data["id"]]
+            listed[repo_id] = [wf_data["id"] for wf_data in wfs_data]
+            for wf_data in wfs_data:
+                row = {
+                    "github_workflow_id": wf_data["id"],
+                    "repo_id": repo_id,
+                    "name": wf_data["name"],
+                    "path": wf_data["path"],
+                    "active": wf_data["state"] == "active",
+                }
+                if "_file" in wf_data:
+                    row.update(_file_columns(*wf_data["_file"]))
+                    changed_files.append(row)
+                else:
+                    unchanged_files.append(row)
+        stats["workflows_found"] += len(changed_files) + len(unchanged_files)
+
+        for rows in (changed_files, unchanged_files):
+            if not rows:
+                continue
+            stmt = upsert(db, Workflow)
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[Workflow.github_workflow_id],
+                    set_={column: stmt.excluded[column] for column in rows[0] if column != "github_workflow_id"},
+                ),
+                rows,
+            )
+
+        # Chunked to stay under the bind-parameter limit on large installations
+        listed_repo_ids = list(listed)
+        for i in range(0, len(listed_repo_ids), DEACTIVATE_REPOS_PER_STATEMENT):
+            chunk = listed_repo_ids[i:i + DEACTIVATE_REPOS_PER_STATEMENT]
+            still_there = [wf_id for repo_id in chunk for wf_id in listed[repo_id]]
+            db.query(Workflow).filter(
+                Workflow.repo_id.in_(chunk),
+                Workflow.github_workflow_id.notin_(still_there),
+                Workflow.active.is_(True),
+            ).update({Workflow.active: False}, synchronize_session=False)
+
+        db.commit()
+        bump_data_version(installation_id)
+    except Exception as e:
+        db.rollback()
+        msg = f"Error storing installation {installation_id}: {e}"
+        print(f"[github_sync] {msg}")
+        stats["errors"].append(msg)
+
+
+async def _discover_installation(
+    client: GitHubClient,
+    installation_id: int,
+    global_limit: asyncio.Semaphore,
+    max_concurrency_per_installation: int,
+    known_shas: Dict[int, Dict[str, Optional[str]]],
+    stats: Dict,
+):
     """
-    For each workflow in DB, fetch its YAML, parse cron, and update cron_expression.
-    Uses installation tokens.
+    Fetch repos, workflows and changed workflow files for one installation.
+    Files of repos synced for the first time are fetched in GraphQL batches.
+    Returns (repos_data, workflows_data), or None if no token could be minted.
     """
+    try:
+        token = await asyncio.to_thread(get_installation_token, installation_id)
+    except Exception as e:
+        msg = f"Failed to get token for inst {installation_id}: {e}"
+        print(f"[github_sync] {msg}")
+        stats["errors"].append(msg)
+        return None
+
+    stats["installations_processed"] += 1
+    fetcher = _InstallationFetcher(
+        client, installation_id, token, global_limit, max_concurrency_per_installation, get_parse_pool()
+    )
+
+    repos_data = await _list_installation_repos(fetcher, installation_id, stats)
+    stats["repos_found"] += len(repos_data)
+
+    # Already-synced repos stay on REST trees calls, which are ETag-cached
+    prefetched = await _prefetch_workflow_files(
+        fetcher, [repo_data for repo_data in repos_data if repo_data["id"] not in known_shas], stats
+    )
+
+    workflows_data = await asyncio.gather(
+        *(
+            _list_repo_workflows(
+                fetcher, repo_data, known_shas.get(repo_data["id"], {}), stats, prefetched.get(repo_data["id"])
+            )
+            for repo_data in repos_data
+        )
+    )
+    return repos_data, workflows_data
+
+
+def _known_file_shas(db: Session, installation_ids: List[int]) -> Dict[int, Dict[str, Optional[str]]]:
+    """
+    Stored blob SHA of every synced workflow file of the installations, keyed
+    by GitHub repo id then path.
+    """
+    rows = (
+        db.query(Repository.github_repo_id, Workflow.path, Workflow.file_sha)
+        .join(Workflow, Workflow.repo_id == Repository.id)
+        .join(Organization, Organization.id == Repository.org_id)
+        .filter(Organization.installation_id.in_(installation_ids), Workflow.file_sha.isnot(None))
+        .all()
+    )
+    known: Dict[int, Dict[str, Optional[str]]] = {}
+    for github_repo_id, path, file_sha in rows:
+        known.setdefault(github_repo_id, {})[path] = file_sha
+    return known
+
+
+async def sync_cron_expressions_async(
+    db: Session,
+    client: Optional[GitHubClient] = None,
+    force: bool = False,
+) -> Dict:
+    """
+    Refresh cron_expression for every workflow in the DB.
+
+    Each repo costs one trees call; only files whose blob SHA differs from the
+    stored `file_sha` are downloaded and parsed, so re-syncing an unchanged
+    org is about one request per repo. `force` ignores the stored SHAs.
+    """
+    stats = {
+        "repos_scanned": 0,
+        "files_fetched": 0,
+        "workflows_updated": 0,
+        "errors": []
+    }
+
     workflows = db.query(Workflow).all()
     print(f"[github_sync] Found {len(workflows)} workflows to sync")
 
-    # Group workflows by installation_id to minimize token fetches
-    workflows_by_installation: Dict[int, List[Workflow]] = {}
-    
+    # installation_id -> repo -> workflows, to mint one token per installation
+    by_installation: Dict[int, Dict[Repository, List[Workflow]]] = {}
     for wf in workflows:
-        if not wf.repository or not wf.repository.organization:
+        if not wf.path or not wf.repository or not wf.repository.organization:
             continue
-            
+
         installation_id = wf.repository.organization.installation_id
         if not installation_id:
             print(f"[github_sync] Skipping workflow {wf.id} (no installation_id)")
             continue
-            
-        if installation_id not in workflows_by_installation:
-            workflows_by_installation[installation_id] = []
-        workflows_by_installation[installation_id].append(wf)
-
-    for installation_id, installation_workflows in workflows_by_installation.items():
-        print(f"[github_sync] Processing installation {installation_id} ({len(installation_workflows)} workflows)")
-        
-        try:
-            token = get_installation_token(installation_id)
-        except Exception as e:
-            print(f"[github_sync] Failed to get token for installation {installation_id}: {e}")
-            continue
 
-        for wf in installation_workflows:
-            if not wf.path:
-                continue
+        by_installation.setdefault(installation_id, {}).setdefault(wf.repository, []).append(wf)
 
-            owner, repo = wf.repository.full_name.split("/", 1)
-            print(f"[github_sync] Syncing {owner}/{repo}/{wf.path}")
+    global_limit = asyncio.Semaphore(settings.GITHUB_SYNC_MAX_CONCURRENCY)
 
-            yaml_content = fetch_workflow_file(owner, repo, wf.path, token)
-            if not yaml_content:
-                continue
+    async def sync_repo(fetcher: _InstallationFetcher, repo: Repository, repo_workflows: List[Workflow]):
+        blobs = await _list_workflow_blobs(fetcher, repo.full_name, stats)
+        stats["repos_scanned"] += 1
+        if blobs is None:
+            return
 
-            cron = extract_cron_from_yaml(yaml_content)
-            if cron:
-                print(f"[github_sync] Workflow {wf.id} cron: {cron}")
-                wf.cron_expression = cron
-            else:
-                print(f"[github_sync] No cron found for workflow {wf.id}")
-                # Optional: clear cron if removed? 
-                # wf.cron_expression = None 
+        known = {} if force else {wf.path: wf.file_sha for wf in repo_workflows}
+        wanted = {wf.path: blobs[wf.path] for wf in repo_workflows if wf.path in blobs}
+        resolved = await _resolve_changed_crons(fetcher, repo.full_name, wanted, known, stats)
+
+        for wf in repo_workflows:
+            if wf.path in resolved:
+                _set_workflow_file(wf, *resolved[wf.path])
+                stats["workflows_updated"] += 1
+
+    async def sync_installation(installation_id: int, repos: Dict[Repository, List[Workflow]]):
+        try:
+            token = await asyncio.to_thread(get_installation_token, installation_id)
+        except Exception as e:
+            msg = f"Failed to get token for installation {installation_id}: {e}"
+            print(f"[github_sync] {msg}")
+            stats["errors"].append(msg)
+            return
+
+        fetcher = _InstallationFetcher(
+            client,
+            installation_id,
+            token,
+            global_limit,
+            settings.GITHUB_SYNC_MAX_CONCURRENCY_PER_INSTALLATION,
+            get_parse_pool(),
+        )
+        await asyncio.gather(*(sync_repo(fetcher, repo, wfs) for repo, wfs in repos.items()))
+
+    client = client or get_github_client()
+    await asyncio.gather(
+        *(sync_installation(installation_id, repos) for installation_id, repos in by_installation.items())
+    )
 
     db.commit()
-    print("[github_sync] Sync complete")
+    print(f"[github_sync] Sync complete: {stats['workflows_updated']} workflows updated, {stats['files_fetched']} files fetched")
+    return stats
 
 
+def sync_cron_expressions(db: Session, force: bool = False) -> Dict:
+    """
+    Blocking entry point for scripts; see sync_cron_expressions_async.
+    """
+    return asyncio.run(sync_cron_expressions_async(db, force=force))
 
-def discover_and_sync_workflows(db: Session, user_installations: List[int]) -> Dict:
+
+def push_touches_workflows(payload: dict) -> bool:
+    """
+    Whether a `push` event may have changed files under .github/workflows.
+    GitHub lists at most PUSH_PAYLOAD_MAX_COMMITS commits, so a push with that
+    many is treated as touching them.
+    """
+    commits = payload.get("commits") or []
+    if len(commits) >= PUSH_PAYLOAD_MAX_COMMITS:
+        return True
+
+    for commit in commits:
+        for path in commit.get("added", []) + commit.get("modified", []) + commit.get("removed", []):
+            if _is_workflow_file(path):
+                return True
+    return False
+
+
+async def sync_repo_workflows_async(
+    db: AsyncSession,
+    repo: Repository,
+    installation_id: int,
+    ref: str = "HEAD",
+    client: Optional[GitHubClient] = None,
+) -> Dict:
     """
-    Discover repos and workflows for the given installation IDs and sync to DB.
-    Returns a summary dict for debugging.
+    Bring one repo's workflows in line with its tree at `ref`: re-parse files
+    whose blob SHA changed, add newly committed workflows and deactivate
+    deleted ones. Used for push events, so only the affected files are fetched.
     """
-    import httpx
-    from app.services.github_auth import get_installation_token
-    from app.models.workflow import Organization, Repository, Workflow
-    
     stats = {
+        "files_fetched": 0,
+        "workflows_updated": 0,
+        "errors": []
+    }
+
+    token = await asyncio.to_thread(get_installation_token, installation_id)
+
+    fetcher = _InstallationFetcher(
+        client or get_github_client(),
+        installation_id,
+        token,
+        asyncio.Semaphore(settings.GITHUB_SYNC_MAX_CONCURRENCY),
+        settings.GITHUB_SYNC_MAX_CONCURRENCY_PER_INSTALLATION,
+    )
+
+    blobs = await _list_workflow_blobs(fetcher, repo.full_name, stats, ref)
+    if blobs is None:
+        return stats
+
+    workflows = {wf.path: wf for wf in (await db.scalars(select(Workflow).where(Workflow.repo_id == repo.id))).all()}
+    listed = set()  # new workflows, whose state comes from the Actions API
+
+    # New workflow files need their GitHub workflow id from the Actions API
+    if set(blobs) - set(workflows):
+        wf_resp = await fetcher.get(f"/repos/{repo.full_name}/actions/workflows?per_page=100")
+        if wf_resp.status_code != 200:
+            stats["errors"].append(f"Failed to fetch workflows for {repo.full_name}: {wf_resp.status_code}")
+        else:
+            for wf_data in wf_resp.json().get("workflows", []):
+                if wf_data["path"] in blobs and wf_data["path"] not in workflows:
+                    wf = await db.scalar(select(Workflow).where(Workflow.github_workflow_id == wf_data["id"]).limit(1))
+                    if not wf:
+                        wf = Workflow(github_workflow_id=wf_data["id"], repo_id=repo.id)
+                        db.add(wf)
+                    wf.name = wf_data["name"]
+                    wf.path = wf_data["path"]
+                    wf.active = (wf_data["state"] == "active")
+                    workflows[wf.path] = wf
+                    listed.add(wf.path)
+
+    resolved = await _resolve_changed_crons(
+        fetcher,
+        repo.full_name,
+        {path: sha for path, sha in blobs.items() if path in workflows},
+        {path: wf.file_sha for path, wf in workflows.items()},
+        stats,
+    )
+
+    for path, wf in workflows.items():
+        if path in resolved:
+            _set_workflow_file(wf, *resolved[path])
+            stats["workflows_updated"] += 1
+        if path in blobs and path not in listed:
+            # Re-added after being deleted
+            wf.active = True
+        elif path not in blobs and wf.active:
+            # Deleted from the default branch: nothing left to schedule
+            _set_workflow_file(wf, None, [])
+            wf.active = False
+            stats["workflows_updated"] += 1
+
+    await db.commit()
+    print(f"[github_sync] {repo.full_name}@{ref}: {stats['workflows_updated']} workflows updated")
+    return stats
+
+
+def new_discovery_stats() -> Dict:
+    return {
         "installations_processed": 0,
         "repos_found": 0,
+        "repos_scanned": 0,
         "workflows_found": 0,
+        "files_fetched": 0,
         "errors": []
     }
 
-    for installation_id in user_installations:
-        try:
-            token = get_installation_token(installation_id)
-        except Exception as e:
-            msg = f"Failed to get token for inst {installation_id}: {e}"
-            print(f"[github_sync] {msg}")
-            stats["errors"].append(msg)
-            continue
-        
-        stats["installations_processed"] += 1
 
-        # 1. Get Installation Repos
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/vnd.github.v3+json",
-        }
-        
-        repos_resp = httpx.get(
-            "https://api.github.com/installation/repositories?per_page=100", 
-            headers=headers
+async def discover_and_sync_workflows_async(
+    db: Session,
+    user_installations: List[int],
+    client: Optional[GitHubClient] = None,
+    max_concurrency: Optional[int] = None,
+    max_concurrency_per_installation: Optional[int] = None,
+    stats: Optional[Dict] = None,
+) -> Dict:
+    """
+    Discover repos and workflows for the given installation IDs and sync to DB,
+    cron expressions included. Installations are discovered concurrently under
+    a global and a per-installation request limit; each installation's results
+    are written as soon as its discovery finishes. The DB work runs in the
+    threadpool, so `db` isn't used on the event loop.
+    Returns a summary dict for debugging; pass `stats` (see new_discovery_stats)
+    to watch progress while the sync runs.
+    """
+    if stats is None:
+        stats = new_discovery_stats()
+
+    known_shas = await run_in_threadpool(_known_file_shas, db, user_installations)
+    global_limit = asyncio.Semaphore(max_concurrency or settings.GITHUB_SYNC_MAX_CONCURRENCY)
+    per_installation = max_concurrency_per_installation or settings.GITHUB_SYNC_MAX_CONCURRENCY_PER_INSTALLATION
+
+    client = client or get_github_client()
+
+    async def discover(installation_id: int):
+        return installation_id, await _discover_installation(
+            client, installation_id, global_limit, per_installation, known_shas, stats
         )
-        if repos_resp.status_code != 200:
-            msg = f"Failed to fetch repos for inst {installation_id}: {repos_resp.status_code} {repos_resp.text}"
-            print(f"[github_sync] {msg}")
-            stats["errors"].append(msg)
+
+    for next_done in asyncio.as_completed([discover(i) for i in user_installations]):
+        installation_id, result = await next_done
+        if result is None:
             continue
-            
-        repos_data = repos_resp.json().get("repositories", [])
-        stats["repos_found"] += len(repos_data)
-        
-        # 2. Process Repos
-        for repo_data in repos_data:
-            owner_login = repo_data["owner"]["login"]
-            repo_name = repo_data["name"]
-            full_name = repo_data["full_name"]
-            github_repo_id = repo_data["id"]
-
-            try:
-                # Ensure Org exists
-                org_github_id = repo_data["owner"]["id"]
-                org = db.query(Organization).filter(Organization.github_org_id == org_github_id).first()
-                if not org:
-                    org = Organization(
-                        github_org_id=org_github_id,
-                        installation_id=installation_id,
-                        name=owner_login
-                    )
-                    db.add(org)
-                    db.flush() 
-
-                # Ensure Repo exists
-                repo = db.query(Repository).filter(Repository.github_repo_id == github_repo_id).first()
-                if not repo:
-                    repo = Repository(
-                        github_repo_id=github_repo_id,
-                        org_id=org.id,
-                        name=repo_name,
-                        full_name=full_name
-                    )
-                    db.add(repo)
-                    db.flush()
-
-                # 3. Get Workflows for Repo
-                wf_resp = httpx.get(
-                    f"https://api.github.com/repos/{full_name}/actions/workflows",
-                    headers=headers
-                )
-                if wf_resp.status_code != 200:
-                    stats["errors"].append(f"Failed to fetch workflows for {full_name}: {wf_resp.status_code}")
-                    continue
-                    
-                wfs_data = wf_resp.json().get("workflows", [])
-                stats["workflows_found"] += len(wfs_data)
-
-                for wf_data in wfs_data:
-                    github_wf_id = wf_data["id"]
-                    wf_name = wf_data["name"]
-                    wf_path = wf_data["path"]
-                    
-                # Upsert Workflow
-                wf = db.query(Workflow).filter(Workflow.github_workflow_id == github_wf_id).first()
-                if not wf:
-                    wf = Workflow(
-                        github_workflow_id=github_wf_id,
-                        repo_id=repo.id,
-                        name=wf_name,
-                        path=wf_path,
-                        # state=wf_data["state"],  <-- REMOVED
-                        active=(wf_data["state"] == "active")
-                    )
-                    db.add(wf)
-                else:
-                    wf.name = wf_name
-                    wf.path = wf_path
-                    # wf.state = wf_data["state"] <-- REMOVED
-                    wf.active = (wf_data["state"] == "active")
-                        
-            except Exception as inner_e:
-                stats["errors"].append(f"Error processing repo {full_name}: {inner_e}")
-                continue
+        repos_data, workflows_data = result
+        await run_in_threadpool(_store_installation, db, installation_id, repos_data, workflows_data, stats)
+        print(f"[github_sync] Installation {installation_id}: synced {len(repos_data)} repos")
 
-        db.commit()
-    
-    # After discovery, run strict cron sync to update cron_expressions
-    sync_cron_expressions(db)
-    
     return stats
+
+
+def discover_and_sync_workflows(db: Session, user_installations: List[int]) -> Dict:
+    """
+    Blocking entry point for scripts; see discover_and_sync_workflows_async.
+    """
+    return asyncio.run(discover_and_sync_workflows_async(db, user_installations))
@@ -0,0 +1,160 @@
+"""
+In-process pub/sub of live dashboard events, streamed to browsers over SSE.
+
+Writers queue events on their DB session (`queue_event`); they're published
+to the installation's subscribers once the transaction commits, and dropped
+if it rolls back, so clients never see a change that didn't happen. Events:
+
+- `status`: a workflow's status changed (see workflow_status)
+- `alert`:  an alert was created (see alert_logger)
+
+Each subscriber has a bounded buffer. A subscriber that falls that far
+behind is dropped: its stream ends with a `reset` event, after which the
+client reconnects and refetches over REST. An idle subscriber is just a
+queue and a parked coroutine, so a node can hold thousands of them.
+
+Events are only delivered to subscribers connected to the process that
+committed the change.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_PENDING_KEY = "live_events"
+
+stats = {"published": 0, "delivered": 0, "dropped_subscribers": 0}
+
+
+class Subscriber:
+    def __init__(self, installation_id: int, buffer_size: int):
+        self.installation_id = installation_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+
+class LiveEventHub:
+    """
+    Fan-out of events to the subscribers of each installation. Subscribing
+    and the streams run on the event loop; `publish` may be called from any
+    thread (scheduler jobs run in a thread pool).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, installation_id: int, buffer_size: Optional[int] = None) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(installation_id, buffer_size or settings.LIVE_EVENTS_BUFFER_SIZE)
+        self._subscribers.setdefault(installation_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subs = self._subscribers.get(subscriber.installation_id)
+        if subs is not None:
+            subs.discard(subscriber)
+            if not subs:
+                del self._subscribers[subscriber.installation_id]
+
+    def publish(self, installation_id: int, event_type: str, data: Dict[str, Any]):
+        with self._lock:
+            event_id = next(self._ids)
+        message = {"id": event_id, "event": event_type, "data": data}
+        stats["published"] += 1
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(installation_id, message)
+        else:
+            loop.call_soon_threadsafe(self._deliver, installation_id, message)
+
+    def _deliver(self, installation_id: int, message: Dict[str, Any]):
+        for subscriber in list(self._subscribers.get(installation_id, ())):
+            try:
+                subscriber.queue.put_nowait(message)
+                stats["delivered"] += 1
+            except asyncio.QueueFull:
+                # Slow consumer: end its stream rather than buffer without bound
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+                stats["dropped_subscribers"] += 1
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(None)
+
+
+hub = LiveEventHub()
+
+
+def queue_event(db: Session, installation_id: Optional[int], event_type: str, data: Dict[str, Any]):
+    """
+    Publish an event to the installation's subscribers when `db` commits.
+    """
+    if installation_id is None:
+        return
+    if not db.in_transaction():
+        # Begin now so a rollback before any SQL still discards the event
+        db.begin()
+    db.info.setdefault(_PENDING_KEY, []).append((installation_id, event_type, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session):
+    for installation_id, event_type, data in session.info.pop(_PENDING_KEY, ()):
+        hub.publish(installation_id, event_type, data)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _sse(event_id: Any, event_type: str, data: Any) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def event_stream(subscriber: Subscriber, heartbeat_seconds: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    SSE text for a subscriber: its events, a comment line as heartbeat while
+    idle, and a final `reset` event if it was dropped for falling behind.
+    """
+    heartbeat = heartbeat_seconds or settings.LIVE_EVENTS_HEARTBEAT_SECONDS
+    try:
+        yield f"retry: {int(settings.LIVE_EVENTS_RETRY_MS)}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                yield _sse("reset", "reset", {"reason": "slow_consumer"})
+                return
+            yield _sse(message["id"], message["event"], message["data"])
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+def live_stats() -> Dict[str, Any]:
+    return {**stats, "subscribers": hub.subscriber_count()}
@@ -0,0 +1,78 @@
+"""
+Organization of an installation, cached in process so installation-scoped
+endpoints resolve it without a query.
+
+Entries are snapshots of the organization row (not ORM objects, which belong
+to a session), served for ORGANIZATION_CACHE_TTL_SECONDS. Installation
+webhooks and settings updates invalidate the installation's entry; the TTL
+covers changes made by other processes. Installations without an
+organization aren't cached, so one created later is found right away.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.workflow import Organization
+
+settings = get_settings()
+
+stats = {"hits": 0, "misses": 0}
+
+_COLUMNS = tuple(column.key for column in Organization.__table__.columns)
+
+
+class CachedOrganization:
+    """
+    Copy of an Organization's columns. Changing it changes nothing: load
+    the row (`db.get(Organization, org.id)`) for that.
+    """
+    __slots__ = _COLUMNS + ("loaded_at",)
+
+    def __init__(self, org: Organization):
+        for key in _COLUMNS:
+            setattr(self, key, getattr(org, key))
+        self.loaded_at = time.monotonic()
+
+
+_organizations: "OrderedDict[int, CachedOrganization]" = OrderedDict()
+
+
+async def get_organization(installation_id: int, db: AsyncSession) -> Optional[CachedOrganization]:
+    """
+    The organization of `installation_id`, or None if there's none.
+    """
+    org = _organizations.get(installation_id)
+    if org is not None and time.monotonic() - org.loaded_at < settings.ORGANIZATION_CACHE_TTL_SECONDS:
+        stats["hits"] += 1
+        _organizations.move_to_end(installation_id)
+        return org
+
+    stats["misses"] += 1
+    row = await db.scalar(select(Organization).where(Organization.installation_id == installation_id).limit(1))
+    if row is None:
+        _organizations.pop(installation_id, None)
+        return None
+
+    org = _organizations[installation_id] = CachedOrganization(row)
+    _organizations.move_to_end(installation_id)
+    while len(_organizations) > settings.ORGANIZATION_CACHE_MAX_ENTRIES:
+        _organizations.popitem(last=False)
+    return org
+
+
+def invalidate_organization(installation_id: Optional[int] = None):
+    """
+    Drop the cached organization of an installation, or of all if None.
+    """
+    if installation_id is None:
+        _organizations.clear()
+    else:
+        _organizations.pop(installation_id, None)
+
+
+def organization_cache_stats() -> Dict[str, Any]:
+    return {**stats, "entries": len(_organizations)}
@@ -0,0 +1,176 @@
+"""
+In-process cache of read endpoint responses, and conditional GET support.
+
+Entries are keyed by endpoint, installation and query params, and hold the
+serialized JSON body. An entry is served while it is younger than
+RESPONSE_CACHE_TTL_SECONDS *and* its installation's data version is unchanged:
+ingestion (webhooks, run reconciliation, workflow sync) and alerts call
+`bump_data_version`, so new data shows up on the next poll instead of after
+the TTL. Concurrent misses for the same key share one computation.
+
+The same data version makes the ETag of read endpoints (`etag_dependency`),
+so a poll with a current If-None-Match is answered 304 without a query.
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Versions restart with the process; the boot id keeps them from repeating
+_boot_id = uuid.uuid4().hex[:8]
+_global_version = 0  # bumped for changes that affect every installation
+_any_version = 0  # bumped on every change; versions unscoped (all-installation) views
+_versions: Dict[int, int] = {}
+
+_entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+_inflight: Dict[Hashable, asyncio.Future] = {}
+
+stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+
+def bump_data_version(installation_id: Optional[int] = None):
+    """
+    Mark an installation's data as changed, or every installation's if None.
+    """
+    global _global_version, _any_version
+    _any_version += 1
+    if installation_id is None:
+        _global_version += 1
+    else:
+        _versions[installation_id] = _versions.get(installation_id, 0) + 1
+
+
+def data_version(installation_id: Optional[int] = None) -> str:
+    """
+    Opaque version of an installation's data (of all data if None); changes
+    whenever `bump_data_version` is called for it.
+    """
+    if installation_id is None:
+        return f"{_boot_id}.{_any_version}"
+    return f"{_boot_id}.{_global_version}.{_versions.get(installation_id, 0)}"
+
+
+def cache_stats() -> Dict[str, Any]:
+    lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+    return {
+        **stats,
+        "entries": len(_entries),
+        "hit_ratio": round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else None,
+    }
+
+
+def clear_response_cache():
+    _entries.clear()
+    for key in stats:
+        stats[key] = 0
+
+
+def _request_installation(request: Request) -> Optional[int]:
+    value = request.path_params.get("installation_id") or request.query_params.get("installation_id")
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _no_auth():
+    return None
+
+
+def etag_dependency(per_day: bool = False, auth: Optional[Callable] = None):
+    """
+    Route dependency for conditional GETs. The ETag is the data version of
+    the request's installation (its `installation_id` path or query param;
+    all data without one) plus the URL, and the UTC date for responses that
+    depend on it when `per_day`. A matching If-None-Match is answered 304
+    before the endpoint runs; otherwise the ETag is set on the response.
+
+    `auth` is the endpoint's authentication / access dependency: the ETag is
+    only checked once it passes, so a request the endpoint would refuse gets
+    its 401 / 403 rather than a 304.
+    """
+    def check_etag(request: Request, response: Response, _=Depends(auth or _no_auth)):
+        if request.method not in ("GET", "HEAD"):
+            return
+
+        version = data_version(_request_installation(request))
+        if per_day:
+            version += "." + datetime.now(timezone.utc).strftime("%Y%m%d")
+        url = hashlib.blake2b(str(request.url).encode(), digest_size=6).hexdigest()
+        etag = f'W/"{version}.{url}"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+    return check_etag
+
+
+def _json_response(body: bytes, headers: Optional[Mapping[str, str]]) -> Response:
+    return Response(content=body, media_type="application/json", headers=dict(headers or {}))
+
+
+async def cached_response(
+    endpoint: str,
+    installation_id: Optional[int],
+    params: Dict[str, Any],
+    compute: Callable[[], Any],
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    The JSON response for `compute()` (a sync DB query, run in the threadpool,
+    returning a JSON-able result or serialized JSON bytes), from cache when a fresh entry for the current data version exists.
+    `headers` (e.g. the ETag set by `etag_dependency`) are added to it.
+    """
+    key = (endpoint, installation_id, tuple(sorted(params.items())))
+    version = data_version(installation_id)
+    now = time.monotonic()
+
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == version and entry[1] > now:
+        stats["hits"] += 1
+        _entries.move_to_end(key)
+        return _json_response(entry[2], headers)
+
+    flight = _inflight.get((key, version))
+    if flight is not None:
+        stats["coalesced"] += 1
+        return _json_response(await asyncio.shield(flight), headers)
+
+    stats["misses"] += 1
+    flight = _inflight[(key, version)] = asyncio.get_running_loop().create_future()
+    try:
+        result = await run_in_threadpool(compute)
+        if isinstance(result, bytes):
+            body = result
+        else:
+            body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+    except BaseException as e:
+        flight.set_exception(e)
+        # Waiters re-raise it; don't warn about it being unretrieved when there are none
+        flight.exception()
+        raise
+    finally:
+        del _inflight[(key, version)]
+
+    flight.set_result(body)
+    # Data may have changed while computing; only store under the version we read at
+    _entries[key] = (version, time.monotonic() + settings.RESPONSE_CACHE_TTL_SECONDS, body)
+    _entries.move_to_end(key)
+    while len(_entries) > settings.RESPONSE_CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+        stats["evictions"] += 1
+    return _json_response(body, headers)
@@ -0,0 +1,236 @@
+"""
+Workflow run reconciliation against the GitHub Actions runs API.
+
+Webhooks are the primary source of runs, but anything delivered while we were
+down (or dropped by GitHub) never arrives. This worker pages
+`GET /repos/{repo}/actions/runs?created=...` for every tracked repo, starting
+from the repo's `runs_cursor`, and stores the runs through the same upsert as
+the webhook. Repos without a cursor (newly installed) get RUN_BACKFILL_DAYS
+of history, which also gives anomaly detection a baseline to work from.
+
+The sync Session is only used from worker threads (`asyncio.to_thread`),
+one statement batch at a time, so storing runs doesn't block the event loop.
+"""
+import asyncio
+import json
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.db import SessionLocal, upsert
+from app.models.workflow import Organization, Repository, Workflow
+from app.services.github_auth import get_installation_token
+from app.services.github_client import GitHubClient, get_github_client
+from app.services.github_sync import _InstallationFetcher
+from app.services.response_cache import bump_data_version
+from app.services.workflow_runs import parse_github_time, run_columns, upsert_workflow_runs
+
+settings = get_settings()
+
+RUNS_PER_PAGE = 100
+# GitHub stops returning results past this many for a `created`-filtered query
+RUNS_QUERY_MAX_RESULTS = 1000
+# Longest an unfinished run may hold a repo's cursor back
+MAX_PENDING_HOLD = timedelta(days=1)
+
+# Keeps background backfills referenced so they aren't garbage collected
+_tasks: set = set()
+
+
+def _github_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+async def _list_runs(
+    fetcher: _InstallationFetcher,
+    full_name: str,
+    since: datetime,
+    until: datetime,
+    stats: Dict,
+) -> Optional[List[dict]]:
+    """
+    All runs of a repo created in [since, until], or None if a request failed.
+    Windows with more runs than GitHub will page through are split in half.
+    """
+    query = (
+        f"/repos/{full_name}/actions/runs"
+        f"?created={_github_time(since)}..{_github_time(until)}&per_page={RUNS_PER_PAGE}"
+    )
+    first = await fetcher.get(f"{query}&page=1")
+    if first.status_code != 200:
+        stats["errors"].append(f"Failed to list runs for {full_name}: {first.status_code}")
+        return None
+
+    body = first.json()
+    total = body.get("total_count", 0)
+    if total > RUNS_QUERY_MAX_RESULTS and until - since > timedelta(minutes=1):
+        middle = since + (until - since) / 2
+        halves = await asyncio.gather(
+            _list_runs(fetcher, full_name, since, middle, stats),
+            _list_runs(fetcher, full_name, middle, until, stats),
+        )
+        if None in halves:
+            return None
+        return halves[0] + halves[1]
+
+    runs = body.get("workflow_runs", [])
+    pages = min(math.ceil(total / RUNS_PER_PAGE), RUNS_QUERY_MAX_RESULTS // RUNS_PER_PAGE)
+    for resp in await asyncio.gather(*(fetcher.get(f"{query}&page={page}") for page in range(2, pages + 1))):
+        if resp.status_code != 200:
+            stats["errors"].append(f"Failed to list runs for {full_name}: {resp.status_code}")
+            return None
+        runs.extend(resp.json().get("workflow_runs", []))
+    return runs
+
+
+def _store_repo_runs(db: Session, repo: Repository, runs: List[dict], until: datetime, stats: Dict):
+    """
+    Upsert a repo's runs and advance its cursor. Unfinished runs hold the
+    cursor at their creation time so they are picked up again once they finish.
+    """
+    runs = list({run["id"]: run for run in runs}.values())
+
+    if runs:
+        # Runs can belong to workflows we haven't synced yet; add them like the webhook does
+        stmt = upsert(db, Workflow)
+        db.execute(
+            stmt.on_conflict_do_nothing(index_elements=[Workflow.github_workflow_id]),
+            list({
+                run["workflow_id"]: {
+                    "github_workflow_id": run["workflow_id"],
+                    "repo_id": repo.id,
+                    "name": run["name"],
+                    "path": run.get("path") or "",
+                }
+                for run in runs
+            }.values()),
+        )
+        workflow_ids = dict(
+            db.query(Workflow.github_workflow_id, Workflow.id)
+            .filter(Workflow.github_workflow_id.in_({run["workflow_id"] for run in runs}))
+            .all()
+        )
+        upsert_workflow_runs(
+            db, [run_columns(workflow_ids[run["workflow_id"]], run, json.dumps(run)) for run in runs]
+        )
+        stats["runs_upserted"] += len(runs)
+
+    pending = [
+        parse_github_time(run["created_at"]).replace(tzinfo=None)
+        for run in runs
+        if run["status"] != "completed" and run.get("created_at")
+    ]
+    repo.runs_cursor = max(min(pending, default=until), until - MAX_PENDING_HOLD)
+    db.commit()
+
+
+async def reconcile_workflow_runs_async(
+    db: Session,
+    installation_ids: Optional[List[int]] = None,
+    client: Optional[GitHubClient] = None,
+    backfill_days: Optional[int] = None,
+) -> Dict:
+    """
+    Pull runs created since each repo's cursor (or the last `backfill_days`
+    for repos without one) and store any that are missing or out of date.
+    Limited to `installation_ids` when given.
+    """
+    stats = {
+        "repos_scanned": 0,
+        "runs_upserted": 0,
+        "errors": []
+    }
+    backfill = timedelta(days=settings.RUN_BACKFILL_DAYS if backfill_days is None else backfill_days)
+    until = datetime.utcnow().replace(microsecond=0)
+
+    query = (
+        db.query(Repository, Organization.installation_id)
+        .join(Organization, Repository.org_id == Organization.id)
+        .filter(Organization.installation_id.isnot(None))
+    )
+    if installation_ids is not None:
+        query = query.filter(Organization.installation_id.in_(installation_ids))
+
+    by_installation: Dict[int, List[Repository]] = {}
+    for repo, installation_id in await asyncio.to_thread(query.all):
+        by_installation.setdefault(installation_id, []).append(repo)
+
+    client = client or get_github_client()
+    global_limit = asyncio.Semaphore(settings.GITHUB_SYNC_MAX_CONCURRENCY)
+
+    async def list_installation(installation_id: int, repos: List[Repository]):
+        try:
+            token = await asyncio.to_thread(get_installation_token, installation_id)
+        except Exception as e:
+            msg = f"Failed to get token for installation {installation_id}: {e}"
+            print(f"[run_reconcile] {msg}")
+            stats["errors"].append(msg)
+            return []
+
+        fetcher = _InstallationFetcher(
+            client, installation_id, token, global_limit, settings.GITHUB_SYNC_MAX_CONCURRENCY_PER_INSTALLATION
+        )
+
+        async def list_repo(repo: Repository, full_name: str, since: datetime):
+            runs = await _list_runs(fetcher, full_name, since, until, stats)
+            return installation_id, repo, full_name, runs
+
+        # Read before any commit expires the repos, so the listings don't load them on the loop
+        return [list_repo(repo, repo.full_name, repo.runs_cursor or until - backfill) for repo in repos]
+
+    listings = []
+    for coros in await asyncio.gather(*(list_installation(i, repos) for i, repos in by_installation.items())):
+        listings.extend(coros)
+
+    # Store each repo as soon as its listing is in
+    for next_done in asyncio.as_completed(listings):
+        installation_id, repo, full_name, runs = await next_done
+        stats["repos_scanned"] += 1
+        if runs is None:
+            continue
+        try:
+            await asyncio.to_thread(_store_repo_runs, db, repo, runs, until, stats)
+            if runs:
+                bump_data_version(installation_id)
+        except Exception as e:
+            await asyncio.to_thread(db.rollback)
+            stats["errors"].append(f"Error storing runs for {full_name}: {e}")
+
+    print(f"[run_reconcile] {stats['repos_scanned']} repos scanned, {stats['runs_upserted']} runs upserted")
+    return stats
+
+
+async def reconcile_workflow_runs():
+    """
+    Periodic task: reconcile runs for every installation.
+    """
+    db = SessionLocal()
+    try:
+        await reconcile_workflow_runs_async(db)
+    except Exception as e:
+        print(f"[run_reconcile] Reconciliation failed: {e}")
+    finally:
+        db.close()
+
+
+async def _backfill_installation(installation_id: int):
+    db = SessionLocal()
+    try:
+        await reconcile_workflow_runs_async(db, [installation_id])
+    except Exception as e:
+        print(f"[run_reconcile] Backfill for installation {installation_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def start_installation_backfill(installation_id: int):
+    """
+    Backfill run history for an installation's repos in the background.
+    Must be called from the event loop.
+    """
+    task = asyncio.create_task(_backfill_installation(installation_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
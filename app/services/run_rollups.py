@@ -0,0 +1,244 @@
+"""
+Daily rollups of workflow runs (the `workflow_run_daily` table), which the
+analytics endpoints read instead of scanning raw runs.
+
+A run is counted once it's completed, on the UTC day it started; missed
+schedule markers aren't runs and aren't counted. `upsert_workflow_runs`
+adds newly completed runs to their day's row in the same transaction. A
+counted run that changes (re-run, corrected payload) has its old and new
+days recomputed from raw runs instead, as min/max and the duration sketch
+can't be subtracted from. `rebuild_run_rollups` recomputes every row, for
+databases that predate the table.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.db import upsert
+from app.core.quantile_sketch import QuantileSketch
+from app.models.workflow_run import WorkflowRun
+from app.models.workflow_run_daily import WorkflowRunDaily
+from app.services.workflow_status import MISSED_CONCLUSION
+
+COMPLETED = "completed"
+
+# The runs counted in rollups, as a WorkflowRun filter
+COUNTED_RUNS = and_(
+    WorkflowRun.status == COMPLETED,
+    WorkflowRun.started_at.isnot(None),
+    or_(WorkflowRun.conclusion.is_(None), WorkflowRun.conclusion != MISSED_CONCLUSION),
+)
+
+Key = Tuple[int, date]
+
+
+def _day(started_at: datetime) -> date:
+    if started_at.tzinfo is not None:
+        started_at = started_at.astimezone(timezone.utc)
+    return started_at.date()
+
+
+def _counted(run: Dict) -> bool:
+    return (
+        run["status"] == COMPLETED
+        and run.get("started_at") is not None
+        and run.get("conclusion") != MISSED_CONCLUSION
+    )
+
+
+def _key(run: Dict) -> Key:
+    return run["workflow_id"], _day(run["started_at"])
+
+
+def _unchanged(old: Dict, new: Dict) -> bool:
+    return (
+        _counted(new)
+        and _key(old) == _key(new)
+        and old["conclusion"] == new.get("conclusion")
+        and old["duration_ms"] == new.get("duration_ms")
+    )
+
+
+def _lower(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _higher(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    return b if a is None else a if b is None else max(a, b)
+
+
+class _Rollup:
+    """
+    Aggregates of some of a workflow's runs on one day.
+    """
+
+    def __init__(self):
+        self.success = 0
+        self.failure = 0
+        self.total = 0
+        self.duration_count = 0
+        self.sum_duration_ms = 0
+        self.min_duration_ms: Optional[int] = None
+        self.max_duration_ms: Optional[int] = None
+        self.sketch = QuantileSketch()
+
+    def add(self, conclusion: Optional[str], duration_ms: Optional[int]):
+        self.total += 1
+        if conclusion == "success":
+            self.success += 1
+        elif conclusion == "failure":
+            self.failure += 1
+        if duration_ms is not None:
+            self.duration_count += 1
+            self.sum_duration_ms += duration_ms
+            self.min_duration_ms = _lower(self.min_duration_ms, duration_ms)
+            self.max_duration_ms = _higher(self.max_duration_ms, duration_ms)
+            self.sketch.add(duration_ms)
+
+    def columns(self) -> Dict:
+        return {
+            "success": self.success,
+            "failure": self.failure,
+            "total": self.total,
+            "duration_count": self.duration_count,
+            "sum_duration_ms": self.sum_duration_ms,
+            "min_duration_ms": self.min_duration_ms,
+            "max_duration_ms": self.max_duration_ms,
+            "duration_sketch": self.sketch.encode() or None,
+        }
+
+    def merge_into(self, row: WorkflowRunDaily):
+        row.success = (row.success or 0) + self.success
+        row.failure = (row.failure or 0) + self.failure
+        row.total = (row.total or 0) + self.total
+        row.duration_count = (row.duration_count or 0) + self.duration_count
+        row.sum_duration_ms = (row.sum_duration_ms or 0) + self.sum_duration_ms
+        row.min_duration_ms = _lower(row.min_duration_ms, self.min_duration_ms)
+        row.max_duration_ms = _higher(row.max_duration_ms, self.max_duration_ms)
+        self.sketch.merge_encoded(row.duration_sketch)
+        row.duration_sketch = self.sketch.encode() or None
+
+
+def previous_runs(db: Session, rows: List[Dict]) -> Dict[int, Dict]:
+    """
+    The stored state of the runs of `rows` (from `run_columns`) by GitHub
+    run id, read before they're upserted. Their workflows must be locked
+    (`lock_workflows`), or a concurrent upsert of the same run is missed and
+    the run counted twice.
+    """
+    result = db.execute(
+        select(
+            WorkflowRun.github_run_id,
+            WorkflowRun.workflow_id,
+            WorkflowRun.status,
+            WorkflowRun.conclusion,
+            WorkflowRun.started_at,
+            WorkflowRun.duration_ms,
+        ).where(WorkflowRun.github_run_id.in_([row["github_run_id"] for row in rows]))
+    )
+    return {run.github_run_id: run._asdict() for run in result}
+
+
+def _rollup_rows(db: Session, keys: List[Key]) -> Dict[Key, WorkflowRunDaily]:
+    """
+    The rows of `keys`, created if missing and locked for update.
+    """
+    db.flush()
+    db.execute(
+        upsert(db, WorkflowRunDaily).on_conflict_do_nothing(
+            index_elements=[WorkflowRunDaily.workflow_id, WorkflowRunDaily.day]
+        ),
+        [{"workflow_id": wf_id, "day": day} for wf_id, day in keys],
+    )
+    rows = (
+        db.query(WorkflowRunDaily)
+        .filter(tuple_(WorkflowRunDaily.workflow_id, WorkflowRunDaily.day).in_(keys))
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+    return {(row.workflow_id, row.day): row for row in rows}
+
+
+def _recompute(db: Session, workflow_id: int, day: date) -> _Rollup:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    rollup = _Rollup()
+    for conclusion, duration_ms in db.execute(
+        select(WorkflowRun.conclusion, WorkflowRun.duration_ms).where(
+            COUNTED_RUNS,
+            WorkflowRun.workflow_id == workflow_id,
+            WorkflowRun.started_at >= start,
+            WorkflowRun.started_at < start + timedelta(days=1),
+        )
+    ):
+        rollup.add(conclusion, duration_ms)
+    return rollup
+
+
+def apply_run_rollups(db: Session, rows: List[Dict], previous: Dict[int, Dict]):
+    """
+    Fold upserted runs (rows from `run_columns`) into the daily rollups,
+    given their state before the upsert (`previous_runs`). Doesn't commit.
+    """
+    added: Dict[Key, _Rollup] = {}
+    stale: Set[Key] = set()
+    for row in rows:
+        old = previous.get(row["github_run_id"])
+        if old is not None and _counted(old):
+            if _unchanged(old, row):
+                continue
+            stale.add(_key(old))
+            if _counted(row):
+                stale.add(_key(row))
+        elif _counted(row):
+            added.setdefault(_key(row), _Rollup()).add(row.get("conclusion"), row.get("duration_ms"))
+
+    keys = sorted(set(added) | stale)
+    if not keys:
+        return
+    rollups = _rollup_rows(db, keys)
+
+    for key in stale:
+        row = rollups[key]
+        rollup = _recompute(db, *key)
+        if not rollup.total:
+            db.delete(row)
+            continue
+        for column, value in rollup.columns().items():
+            setattr(row, column, value)
+    for key, rollup in added.items():
+        if key not in stale:
+            rollup.merge_into(rollups[key])
+
+
+def rebuild_run_rollups(db: Session, batch_size: int = 1000) -> int:
+    """
+    Recompute every row from stored runs, streaming them in workflow and
+    start order. Commits; returns the row count.
+    """
+    db.query(WorkflowRunDaily).delete(synchronize_session=False)
+    runs = db.execute(
+        select(WorkflowRun.workflow_id, WorkflowRun.started_at, WorkflowRun.conclusion, WorkflowRun.duration_ms)
+        .where(COUNTED_RUNS)
+        .order_by(WorkflowRun.workflow_id, WorkflowRun.started_at)
+        .execution_options(yield_per=batch_size)
+    )
+
+    rows = []
+    key, rollup = None, None
+    for run in runs:
+        run_key = (run.workflow_id, _day(run.started_at))
+        if run_key != key:
+            if rollup is not None:
+                rows.append({"workflow_id": key[0], "day": key[1], **rollup.columns()})
+            key, rollup = run_key, _Rollup()
+        rollup.add(run.conclusion, run.duration_ms)
+    if rollup is not None:
+        rows.append({"workflow_id": key[0], "day": key[1], **rollup.columns()})
+
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(WorkflowRunDaily), rows[start:start + batch_size])
+    db.commit()
+    return len(rows)
@@ -10,6 +10,9 @@ import httpx
 from app.core.config import get_settings
 from app.services.alert_detection import check_stuck_workflows, check_runtime_anomalies
 from app.services.alert_logger import create_alert
+from app.services.response_cache import bump_data_version
+from app.services.run_reconcile import reconcile_workflow_runs
+from app.services.workflow_status import record_miss, record_warning, refresh_expired_workflow_status
 from app.models.alert import AlertType, AlertSeverity
 
 settings = get_settings()
@@ -34,6 +37,11 @@ def check_scheduled_workflows():
     db = SessionLocal()
 
     try:
+        # Statuses whose 24h window lapsed since the last check
+        if refresh_expired_workflow_status(db, now):
+            db.commit()
+            bump_data_version()
+
         workflows = (
             db.query(Workflow)
             .filter(Workflow.active.is_(True))
@@ -42,18 +50,17 @@ def check_scheduled_workflows():
         )
 
         for wf in workflows:
-            cron_expr = wf.cron_expression
-            if not cron_expr:
+            cron_exprs = wf.schedules
+            if not cron_exprs:
                 continue
 
             try:
-                itr = croniter(cron_expr, now)
-                # last expected run time BEFORE "now"
-                last_expected = itr.get_prev(datetime)
+                # last expected run time BEFORE "now", across all of the workflow's schedules
+                last_expected = max(croniter(expr, now).get_prev(datetime) for expr in cron_exprs)
             except Exception as e:
                 print(
                     f"[monitor] Invalid cron for workflow {wf.id} "
-                    f"({cron_expr}): {e}"
+                    f"({', '.join(cron_exprs)}): {e}"
                 )
                 continue
 
@@ -83,6 +90,9 @@ def check_scheduled_workflows():
                 # For now, we'll alert every time we detect it
                 # In production, you'd want to track "last_alert_sent_at" per workflow
 
+                # Counted once per expected time; committed with the alert below
+                record_miss(db, wf.id, last_expected, now)
+
                 alert_text = (
                     f"⚠️ *Missed Scheduled Run*\n"
                     f"Workflow: `{wf.name}`\n"
@@ -117,6 +127,7 @@ def check_scheduled_workflows():
                         print(f"[monitor] No webhooks configured for org {org.name}")
                 else:
                      print(f"[monitor] Workflow {wf.id} has no repo/org linked")
+                     db.commit()
 
             # DELAYED RUN DETECTION
             # Check if workflow started later than expected
@@ -135,6 +146,7 @@ def check_scheduled_workflows():
                         )
                         
                         # Log to database
+                        record_warning(db, wf.id, now)
                         create_alert(
                             db=db,
                             organization_id=org.id,
@@ -161,7 +173,7 @@ def check_scheduled_workflows():
 
 def start_scheduler():
     """
-    Start the APScheduler and register the periodic job.
+    Start the APScheduler and register the periodic jobs.
     """
     scheduler.add_job(
         check_scheduled_workflows,
@@ -170,6 +182,13 @@ def start_scheduler():
         id="check_scheduled_workflows",
         replace_existing=True,
     )
+    scheduler.add_job(
+        reconcile_workflow_runs,
+        "interval",
+        minutes=settings.RUN_RECONCILE_INTERVAL_MINUTES,
+        id="reconcile_workflow_runs",
+        replace_existing=True,
+    )
     if not scheduler.running:
         scheduler.start()
         print("[monitor] APScheduler started")
@@ -1,8 +1,105 @@
-from sqlalchemy.orm import Session
+"""
+Pro entitlements of organizations.
+
+Subscription info is cached in process, keyed by organization id: loaded for
+every organization in one query, then served without querying. The Stripe
+webhook handlers invalidate the organizations they change, which are
+reloaded on their next check; everything is reloaded after
+ENTITLEMENT_CACHE_TTL_SECONDS, for changes handled by other processes.
+"""
+import time
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
 from app.models.subscription import Subscription
 
+settings = get_settings()
+
+FREE = {"isPro": False, "status": "free", "currentPeriodEnd": None}
+
+# organization_id -> subscription info; organizations without one are free
+_entitlements: Dict[int, dict] = {}
+_stale: Set[int] = set()  # invalidated organizations, reloaded on their next check
+_loaded_at: Optional[float] = None
+# Invalidations made while a bulk load is awaiting its query (None: all)
+_invalidated_while_loading: List[Set[Optional[int]]] = []
+
+stats = {"hits": 0, "bulk_loads": 0, "organization_loads": 0}
+
+
+def _info(subscription: Optional[Subscription]) -> dict:
+    if not subscription or subscription.status != "active":
+        return FREE
+    return {
+        "isPro": True,
+        "status": subscription.status,
+        "currentPeriodEnd": subscription.current_period_end.isoformat() if subscription.current_period_end else None
+    }
+
+
+def _better(info: dict, current: Optional[dict]) -> bool:
+    # An organization with several subscription rows is Pro if any is active
+    return current is None or (info["isPro"] and not current["isPro"])
+
+
+async def _load_all(db: AsyncSession):
+    global _loaded_at
+    invalidated: Set[Optional[int]] = set()
+    _invalidated_while_loading.append(invalidated)
+    try:
+        subscriptions = (await db.scalars(select(Subscription))).all()
+    finally:
+        _invalidated_while_loading.remove(invalidated)
+
+    entitlements = {}
+    for subscription in subscriptions:
+        info = _info(subscription)
+        if _better(info, entitlements.get(subscription.organization_id)):
+            entitlements[subscription.organization_id] = info
+    # What was invalidated during the query may predate the change; keep it stale
+    _stale.clear()
+    _stale.update(invalidated - {None})
+    for organization_id in _stale:
+        entitlements.pop(organization_id, None)
+    _entitlements.clear()
+    _entitlements.update(entitlements)
+    _loaded_at = None if None in invalidated else time.monotonic()
+    stats["bulk_loads"] += 1
 
-def is_pro_user(organization_id: int, db: Session) -> bool:
+
+async def _load_organization(db: AsyncSession, organization_id: int):
+    _stale.discard(organization_id)
+    _entitlements.pop(organization_id, None)
+    subscriptions = (await db.scalars(
+        select(Subscription).where(Subscription.organization_id == organization_id)
+    )).all()
+    for subscription in subscriptions:
+        info = _info(subscription)
+        if _better(info, _entitlements.get(organization_id)):
+            _entitlements[organization_id] = info
+    stats["organization_loads"] += 1
+
+
+def invalidate_entitlements(organization_id: Optional[int] = None):
+    """
+    Drop the cached entitlement of an organization, or of all if None.
+    """
+    global _loaded_at
+    for invalidated in _invalidated_while_loading:
+        invalidated.add(organization_id)
+    if organization_id is None:
+        _entitlements.clear()
+        _stale.clear()
+        _loaded_at = None
+    else:
+        _entitlements.pop(organization_id, None)
+        _stale.add(organization_id)
+
+
+async def is_pro_user(organization_id: int, db: AsyncSession) -> bool:
     """
     Check if an organization has an active Pro subscription.
     
@@ -13,35 +110,26 @@ def is_pro_user(organization_id: int, db: Session) -> bool:
     Returns:
         True if organization has active subscription, False otherwise
     """
-    # subscription = db.query(Subscription).filter(
-    #     Subscription.organization_id == organization_id,
-    #     Subscription.status == "active"
-    # ).first()
-    
-    # return subscription is not None
-    return True # Temporarily enable Pro features for development
+    if settings.PRO_FEATURES_FOR_ALL:
+        return True
+    return (await get_subscription_info(organization_id, db))["isPro"]
 
 
-def get_subscription_info(organization_id: int, db: Session) -> dict:
+async def get_subscription_info(organization_id: int, db: AsyncSession) -> dict:
     """
     Get subscription information for an organization.
     
     Returns:
         Dictionary with isPro, status, and currentPeriodEnd
     """
-    subscription = db.query(Subscription).filter(
-        Subscription.organization_id == organization_id
-    ).first()
-    
-    if not subscription or subscription.status != "active":
-        return {
-            "isPro": False,
-            "status": "free",
-            "currentPeriodEnd": None
-        }
-    
-    return {
-        "isPro": True,
-        "status": subscription.status,
-        "currentPeriodEnd": subscription.current_period_end.isoformat() if subscription.current_period_end else None
-    }
+    if _loaded_at is None or time.monotonic() - _loaded_at > settings.ENTITLEMENT_CACHE_TTL_SECONDS:
+        await _load_all(db)
+    elif organization_id in _stale:
+        await _load_organization(db, organization_id)
+    else:
+        stats["hits"] += 1
+    return dict(_entitlements.get(organization_id, FREE))
+
+
+def entitlement_stats() -> dict:
+    return {**stats, "organizations": len(_entitlements)}
@@ -0,0 +1,117 @@
+"""
+Background GitHub sync jobs.
+
+POST /api/github/sync-workflows enqueues one job per installation and returns
+right away. Each job runs on the event loop with its own DB session, and its
+stats dict is updated as the sync progresses. While a job for an installation
+is queued or running, enqueueing that installation again returns the same job.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from app.core.db import SessionLocal
+from app.services.github_sync import discover_and_sync_workflows_async, new_discovery_stats
+
+# Installations synced at the same time; further jobs wait in "queued"
+MAX_RUNNING_JOBS = 4
+# How long finished jobs stay queryable
+FINISHED_JOB_RETENTION = timedelta(hours=1)
+
+
+class SyncJob:
+    def __init__(self, installation_id: int):
+        self.id = uuid.uuid4().hex
+        self.installation_id = installation_id
+        self.status = "queued"  # queued | running | completed | failed
+        self.stats = new_discovery_stats()
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "installation_id": self.installation_id,
+            "status": self.status,
+            "progress": {
+                "repos_found": self.stats["repos_found"],
+                "repos_scanned": self.stats["repos_scanned"],
+                "workflows_found": self.stats["workflows_found"],
+                "files_fetched": self.stats["files_fetched"],
+                "errors": list(self.stats["errors"]),
+            },
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_jobs: Dict[str, SyncJob] = {}
+_active_by_installation: Dict[int, SyncJob] = {}
+_running_slots: Optional[asyncio.Semaphore] = None
+# Keeps running tasks referenced so they aren't garbage collected mid-sync
+_tasks: set = set()
+
+
+def _slots() -> asyncio.Semaphore:
+    global _running_slots
+    if _running_slots is None:
+        _running_slots = asyncio.Semaphore(MAX_RUNNING_JOBS)
+    return _running_slots
+
+
+def _prune_finished():
+    cutoff = datetime.now(timezone.utc) - FINISHED_JOB_RETENTION
+    for job_id, job in list(_jobs.items()):
+        if not job.active and job.finished_at and job.finished_at < cutoff:
+            del _jobs[job_id]
+
+
+async def _run(job: SyncJob):
+    async with _slots():
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            await discover_and_sync_workflows_async(db, [job.installation_id], stats=job.stats)
+            job.status = "completed"
+        except Exception as e:
+            print(f"[sync_jobs] Job {job.id} (installation {job.installation_id}) failed: {e}")
+            job.stats["errors"].append(str(e))
+            job.status = "failed"
+        finally:
+            db.close()
+            job.finished_at = datetime.now(timezone.utc)
+            if _active_by_installation.get(job.installation_id) is job:
+                del _active_by_installation[job.installation_id]
+
+
+def enqueue_sync_job(installation_id: int) -> SyncJob:
+    """
+    Start a background sync for an installation, or return the one already in progress.
+    Must be called from the event loop.
+    """
+    _prune_finished()
+
+    job = _active_by_installation.get(installation_id)
+    if job and job.active:
+        return job
+
+    job = SyncJob(installation_id)
+    _jobs[job.id] = job
+    _active_by_installation[installation_id] = job
+
+    task = asyncio.create_task(_run(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+def get_sync_job(job_id: str) -> Optional[SyncJob]:
+    return _jobs.get(job_id)
@@ -0,0 +1,98 @@
+"""
+Storing GitHub workflow runs.
+
+Both ingestion paths, the `workflow_run` webhook and the runs API reconciler
+(see run_reconcile), go through `upsert_workflow_runs`, so a run seen twice
+ends up as one row holding its latest state, and the workflows' materialized
+status (see workflow_status) and daily rollups (see run_rollups) are updated
+in the same transaction.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, or_
+from sqlalchemy.orm import Session
+
+from app.core.db import upsert
+from app.models.workflow import Workflow
+from app.models.workflow_run import WorkflowRun
+from app.services.run_rollups import apply_run_rollups, previous_runs
+from app.services.workflow_status import apply_runs, lock_workflows
+
+
+def parse_github_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # workflows.last_run_at is a naive UTC column; asyncpg rejects aware values for it
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def run_columns(workflow_id: int, workflow_run: dict, raw_payload: Optional[str]) -> Dict:
+    """
+    `workflow_runs` columns for a GitHub run object (webhook `workflow_run` or runs API item).
+    """
+    started_at = parse_github_time(workflow_run.get("run_started_at")) or datetime.utcnow()
+    completed_at = parse_github_time(workflow_run.get("updated_at"))
+
+    duration_ms = None
+    if completed_at:
+        duration_ms = int((completed_at - started_at).total_seconds() * 1000)
+
+    return {
+        "github_run_id": workflow_run["id"],
+        "workflow_id": workflow_id,
+        "status": workflow_run["status"],
+        "conclusion": workflow_run.get("conclusion"),
+        "started_at": started_at,
+        "completed_at": completed_at,
+        "duration_ms": duration_ms,
+        "raw_payload": raw_payload,
+    }
+
+
+def upsert_workflow_runs(db: Session, rows: List[Dict]):
+    """
+    Insert or update runs (rows from `run_columns`) by GitHub run id, move
+    each workflow's last_run_at forward to its newest run and update its
+    status row and daily rollups. Doesn't commit.
+    """
+    if not rows:
+        return
+
+    # Concurrent upserts of a run wait here for each other's commit, so the
+    # later one reads the earlier one's run as previous and rollups count it once
+    lock_workflows(db, (row["workflow_id"] for row in rows))
+    previous = previous_runs(db, rows)
+    stmt = upsert(db, WorkflowRun)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[WorkflowRun.github_run_id],
+            set_={column: stmt.excluded[column] for column in rows[0] if column != "github_run_id"},
+        ),
+        rows,
+    )
+
+    latest: Dict[int, datetime] = {}
+    for row in rows:
+        run_at = _naive_utc(row["completed_at"] or row["started_at"])
+        if row["workflow_id"] not in latest or run_at > latest[row["workflow_id"]]:
+            latest[row["workflow_id"]] = run_at
+
+    workflows = Workflow.__table__
+    newest = bindparam("run_at", type_=workflows.c.last_run_at.type)
+    db.connection().execute(
+        workflows.update()
+        .where(workflows.c.id == bindparam("wf_id"))
+        .where(or_(workflows.c.last_run_at.is_(None), workflows.c.last_run_at < newest))
+        .values(last_run_at=newest),
+        [{"wf_id": wf_id, "run_at": run_at} for wf_id, run_at in latest.items()],
+    )
+
+    apply_runs(db, rows)
+    apply_run_rollups(db, rows, previous)
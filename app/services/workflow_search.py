@@ -0,0 +1,83 @@
+"""
+Workflow search by workflow name or repo full name, ranked.
+
+Uses the index from core/search_index when the database has one:
+- Postgres (pg_trgm): substring (ILIKE) or fuzzy (`%` similarity) matches,
+  ranked by trigram similarity
+- SQLite (FTS5 trigram): name-prefix matches in name order, then other
+  substring matches; queries shorter than a trigram match prefixes only
+Name-prefix matches rank first everywhere. Otherwise it's an ILIKE scan.
+"""
+from typing import List, Optional
+
+from sqlalchemy import case, column, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import Query
+
+from app.core.search_index import SQLITE_TABLE
+from app.models.workflow import Repository, Workflow
+
+# FTS5's trigram tokenizer can't match anything shorter
+MIN_TRIGRAM_QUERY = 3
+
+_fts = table(SQLITE_TABLE, column("rowid"))
+
+
+def _has_index(db, dialect: str) -> bool:
+    if dialect == "postgresql":
+        sql = "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+    elif dialect == "sqlite":
+        sql = f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{SQLITE_TABLE}'"
+    else:
+        return False
+    return db.execute(text(sql)).first() is not None
+
+
+def _fts_phrase(q: str) -> str:
+    # One quoted FTS5 string: matched as a substring, no query syntax
+    return '"' + q.replace('"', '""') + '"'
+
+
+def search_workflows(query: Query, q: str, limit: Optional[int] = None) -> List:
+    """
+    Rows of `query` (which selects from Workflow joined to Repository) for
+    workflows matching `q`, best match first, at most `limit` of them.
+    """
+    db = query.session
+    dialect = db.get_bind().dialect.name
+    like = f"%{q}%"
+    prefix_first = case((Workflow.name.ilike(f"{q}%"), 0), else_=1)
+
+    if not _has_index(db, dialect):
+        query = query.filter(Workflow.name.ilike(like) | Repository.full_name.ilike(like))
+        return query.order_by(prefix_first, Workflow.id).limit(limit).all()
+
+    if dialect == "postgresql":
+        query = query.filter(or_(
+            Workflow.name.ilike(like),
+            Repository.full_name.ilike(like),
+            Workflow.name.op("%")(q),
+            Repository.full_name.op("%")(q),
+        ))
+        similarity = func.greatest(func.similarity(Workflow.name, q), func.similarity(Repository.full_name, q))
+        return query.order_by(prefix_first, similarity.desc(), Workflow.id).limit(limit).all()
+
+    # SQLite: name-prefix matches in name order off the NOCASE index, then
+    # the remaining substring matches from FTS. Each tier stops at `limit`
+    # rather than ranking every match, which keeps type-ahead lookups cheap.
+    name_prefix = Workflow.name.like(f"{q}%")
+    rows = query.filter(name_prefix).order_by(Workflow.name.collate("NOCASE"), Workflow.id).limit(limit).all()
+    if limit is not None and len(rows) >= limit:
+        return rows
+
+    if len(q) < MIN_TRIGRAM_QUERY:
+        others = query.filter(Repository.full_name.like(f"{q}%")).order_by(Workflow.id)
+    else:
+        matches = (
+            select(_fts.c.rowid.label("workflow_id"))
+            .where(literal_column(SQLITE_TABLE).op("MATCH")(_fts_phrase(q)))
+            .subquery()
+        )
+        # In FTS rowid (= workflow id) order, so the scan can stop at the limit
+        others = query.join(matches, matches.c.workflow_id == Workflow.id).order_by(matches.c.workflow_id)
+    others = others.filter(~name_prefix)
+    return rows + others.limit(None if limit is None else limit - len(rows)).all()
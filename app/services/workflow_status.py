@@ -0,0 +1,304 @@
+"""
+Materialized per-workflow health (the `workflow_status` table).
+
+Run ingestion (`upsert_workflow_runs`) and the detectors update a workflow's
+row in the same transaction as their own writes, so the dashboard reads the
+current status instead of recomputing it from run and alert history:
+
+- MISSED:   a scheduled run was missed in the last 24h
+- AT_RISK:  the latest run failed, or a delayed / stuck / anomaly alert
+            fired in the last 24h
+- HEALTHY:  otherwise
+
+Rows whose 24h window lapses without a new event are re-derived by
+`refresh_expired_workflow_status`, which runs with the scheduler's checks.
+Status changes are pushed to live dashboards (see live_events) on commit.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.db import upsert
+from app.models.alert import Alert, AlertType
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+from app.models.workflow_status import WorkflowState
+from app.services.live_events import queue_event
+
+STATUS_HEALTHY = "HEALTHY"
+STATUS_MISSED = "MISSED"
+STATUS_AT_RISK = "AT_RISK"
+
+WINDOW = timedelta(hours=24)
+# Runs stored with this conclusion stand for a missed schedule rather than a run
+MISSED_CONCLUSION = "missed"
+FAILED_CONCLUSIONS = {"failure", "timed_out", "startup_failure"}
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _later(current: Optional[datetime], value: Optional[datetime]) -> Optional[datetime]:
+    current = _utc(current)
+    if current is None or (value is not None and value > current):
+        return value
+    return current
+
+
+def _misses(state: WorkflowState) -> List[datetime]:
+    return [datetime.fromisoformat(line) for line in (state.recent_misses or "").splitlines() if line]
+
+
+def _add_miss(state: WorkflowState, missed_at: datetime):
+    misses = _misses(state)
+    if missed_at not in misses:
+        state.recent_misses = "\n".join(m.isoformat() for m in sorted(misses + [missed_at]))
+    state.last_missed_at = _later(state.last_missed_at, missed_at)
+
+
+def _derive(state: WorkflowState, now: datetime):
+    """
+    Drop misses that left the 24h window and recompute the counters,
+    status and the time the row next needs re-deriving.
+    """
+    since = now - WINDOW
+    misses = [m for m in _misses(state) if m >= since]
+    state.recent_misses = "\n".join(m.isoformat() for m in misses) or None
+    state.missed_count_24h = len(misses)
+
+    last_warning_at = _utc(state.last_warning_at)
+    recent_warning = last_warning_at is not None and last_warning_at >= since
+
+    if misses:
+        state.status = STATUS_MISSED
+    elif recent_warning or state.last_conclusion in FAILED_CONCLUSIONS:
+        state.status = STATUS_AT_RISK
+    else:
+        state.status = STATUS_HEALTHY
+
+    lapses = [misses[0] + WINDOW] if misses else []
+    if recent_warning:
+        lapses.append(last_warning_at + WINDOW)
+    state.expires_at = min(lapses, default=None)
+    state.updated_at = now
+
+
+def _queue_transitions(db: Session, states: List[WorkflowState], previous: Dict[int, str]):
+    """
+    Queue a live `status` event for each of `states` whose status changed.
+    """
+    changed = [state for state in states if state.status != previous[state.workflow_id]]
+    if not changed:
+        return
+    installations = dict(
+        db.query(Workflow.id, Organization.installation_id)
+        .join(Repository, Workflow.repo_id == Repository.id)
+        .join(Organization, Repository.org_id == Organization.id)
+        .filter(Workflow.id.in_([state.workflow_id for state in changed]))
+        .all()
+    )
+    for state in changed:
+        queue_event(db, installations.get(state.workflow_id), "status", {
+            "workflow_id": state.workflow_id,
+            "status": state.status,
+            "previous_status": previous[state.workflow_id],
+            "missed_count_24h": state.missed_count_24h,
+            "last_missed_at": state.last_missed_at,
+            "last_run_at": state.last_run_at,
+            "last_conclusion": state.last_conclusion,
+        })
+
+
+def _derive_all(db: Session, states: List[WorkflowState], now: datetime):
+    """
+    `_derive` each of `states` and queue live events for status changes.
+    """
+    previous = {state.workflow_id: state.status for state in states}
+    for state in states:
+        _derive(state, now)
+    _queue_transitions(db, states, previous)
+
+
+def _states(db: Session, workflow_ids: Iterable[int]) -> Dict[int, WorkflowState]:
+    """
+    The rows of `workflow_ids`, created if missing and locked for update.
+    """
+    workflow_ids = sorted(set(workflow_ids))
+    if not workflow_ids:
+        return {}
+    # Pending changes would be overwritten by populate_existing below
+    db.flush()
+    db.execute(
+        upsert(db, WorkflowState).on_conflict_do_nothing(index_elements=[WorkflowState.workflow_id]),
+        [{"workflow_id": wf_id} for wf_id in workflow_ids],
+    )
+    rows = (
+        db.query(WorkflowState)
+        .filter(WorkflowState.workflow_id.in_(workflow_ids))
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+    return {state.workflow_id: state for state in rows}
+
+
+def lock_workflows(db: Session, workflow_ids: Iterable[int]):
+    """
+    Lock the status rows of `workflow_ids` (created if missing) until the
+    transaction ends. Doesn't commit.
+    """
+    _states(db, workflow_ids)
+
+
+def apply_runs(db: Session, rows: List[Dict], now: Optional[datetime] = None):
+    """
+    Fold stored runs (rows from `run_columns`) into their workflows' status.
+    Doesn't commit.
+    """
+    now = now or datetime.now(timezone.utc)
+    states = _states(db, (row["workflow_id"] for row in rows))
+
+    for row in rows:
+        state = states[row["workflow_id"]]
+        started_at = _utc(row["started_at"])
+        conclusion = row.get("conclusion")
+
+        if conclusion == MISSED_CONCLUSION:
+            _add_miss(state, started_at)
+            continue
+
+        last_run_at = _utc(state.last_run_at)
+        if last_run_at is None or started_at >= last_run_at:
+            state.last_run_at = started_at
+            state.last_conclusion = conclusion
+
+        finished_at = _utc(row.get("completed_at")) or started_at
+        if conclusion == "success":
+            state.last_success_at = _later(state.last_success_at, finished_at)
+        elif conclusion in FAILED_CONCLUSIONS:
+            state.last_failure_at = _later(state.last_failure_at, finished_at)
+
+    _derive_all(db, list(states.values()), now)
+
+
+def record_miss(db: Session, workflow_id: int, expected_at: datetime, now: Optional[datetime] = None):
+    """
+    Count a missed scheduled run, once per expected time. Doesn't commit.
+    """
+    now = now or datetime.now(timezone.utc)
+    state = _states(db, [workflow_id])[workflow_id]
+    _add_miss(state, _utc(expected_at))
+    _derive_all(db, [state], now)
+
+
+def record_warning(db: Session, workflow_id: int, now: Optional[datetime] = None):
+    """
+    Note a delayed / stuck / anomaly alert for the workflow. Doesn't commit.
+    """
+    now = now or datetime.now(timezone.utc)
+    state = _states(db, [workflow_id])[workflow_id]
+    state.last_warning_at = _later(state.last_warning_at, now)
+    _derive_all(db, [state], now)
+
+
+def refresh_expired_workflow_status(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Re-derive rows whose 24h window has lapsed. Returns how many; doesn't commit.
+    """
+    now = now or datetime.now(timezone.utc)
+    expired = (
+        db.query(WorkflowState)
+        .filter(WorkflowState.expires_at <= now)
+        .with_for_update()
+        .all()
+    )
+    _derive_all(db, expired, now)
+    return len(expired)
+
+
+def rebuild_workflow_status(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Recompute every row from stored runs and alerts, for databases that
+    predate the table. Missed alerts are re-raised every check, so only the
+    latest one in the window is counted. Commits; returns the row count.
+    """
+    now = now or datetime.now(timezone.utc)
+    since = now - WINDOW
+
+    newest = (
+        db.query(
+            WorkflowRun.workflow_id,
+            WorkflowRun.started_at,
+            WorkflowRun.conclusion,
+            func.row_number().over(
+                partition_by=WorkflowRun.workflow_id,
+                order_by=(WorkflowRun.started_at.desc(), WorkflowRun.id.desc()),
+            ).label("rank"),
+        )
+        .filter((WorkflowRun.conclusion.is_(None)) | (WorkflowRun.conclusion != MISSED_CONCLUSION))
+        .subquery()
+    )
+    finished_at = func.coalesce(WorkflowRun.completed_at, WorkflowRun.started_at)
+
+    def latest_by_workflow(query) -> Dict[int, datetime]:
+        return {wf_id: _utc(at) for wf_id, at in query.all()}
+
+    last_success = latest_by_workflow(
+        db.query(WorkflowRun.workflow_id, func.max(finished_at))
+        .filter(WorkflowRun.conclusion == "success")
+        .group_by(WorkflowRun.workflow_id)
+    )
+    last_failure = latest_by_workflow(
+        db.query(WorkflowRun.workflow_id, func.max(finished_at))
+        .filter(WorkflowRun.conclusion.in_(FAILED_CONCLUSIONS))
+        .group_by(WorkflowRun.workflow_id)
+    )
+    last_missed_alert = latest_by_workflow(
+        db.query(Alert.workflow_id, func.max(Alert.detected_at))
+        .filter(Alert.alert_type == AlertType.MISSED, Alert.detected_at >= since.replace(tzinfo=None))
+        .group_by(Alert.workflow_id)
+    )
+    last_warning = latest_by_workflow(
+        db.query(Alert.workflow_id, func.max(Alert.detected_at))
+        .filter(Alert.alert_type != AlertType.MISSED)
+        .group_by(Alert.workflow_id)
+    )
+    missed_runs: Dict[int, List[datetime]] = {}
+    for wf_id, started_at in (
+        db.query(WorkflowRun.workflow_id, WorkflowRun.started_at)
+        .filter(WorkflowRun.conclusion == MISSED_CONCLUSION, WorkflowRun.started_at >= since)
+    ):
+        missed_runs.setdefault(wf_id, []).append(_utc(started_at))
+
+    newest_runs = {
+        row.workflow_id: row
+        for row in db.query(newest.c.workflow_id, newest.c.started_at, newest.c.conclusion).filter(newest.c.rank == 1)
+    }
+
+    db.query(WorkflowState).delete(synchronize_session=False)
+    states = []
+    for (wf_id,) in db.query(Workflow.id):
+        state = WorkflowState(
+            workflow_id=wf_id,
+            last_success_at=last_success.get(wf_id),
+            last_failure_at=last_failure.get(wf_id),
+            last_warning_at=last_warning.get(wf_id),
+        )
+        if wf_id in newest_runs:
+            state.last_run_at = _utc(newest_runs[wf_id].started_at)
+            state.last_conclusion = newest_runs[wf_id].conclusion
+        for missed_at in missed_runs.get(wf_id, []) + ([last_missed_alert[wf_id]] if wf_id in last_missed_alert else []):
+            _add_miss(state, missed_at)
+        _derive(state, now)
+        states.append(state)
+
+    db.add_all(states)
+    db.commit()
+    return len(states)
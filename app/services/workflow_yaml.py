@@ -0,0 +1,116 @@
+"""
+Schedule extraction from GitHub Actions workflow YAML.
+
+Most workflow files have no `schedule:` trigger at all, so those are rejected
+with a regex before any YAML parsing. The rest are parsed with libyaml's
+CSafeLoader when PyYAML was built with it. Bulk syncs can hand parsing to a
+process pool (see `get_parse_pool`) so it runs on every core and stays off
+the event loop.
+"""
+import asyncio
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional
+
+import yaml
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
+# `schedule:` as a block key, a quoted key or inside a flow mapping (`on: {schedule: ...}`)
+_SCHEDULE_KEY = re.compile(r"""(?:^|[\s{,])["']?schedule["']?\s*:""", re.MULTILINE)
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def may_have_schedule(yaml_content: str) -> bool:
+    """
+    Cheap pre-filter: False means the file certainly has no schedule trigger.
+    """
+    return "schedule" in yaml_content and _SCHEDULE_KEY.search(yaml_content) is not None
+
+
+def _crons_in(schedule_block) -> List[str]:
+    # schedule: [{cron: "..."}, ...]  or the less common  schedule: {cron: "..."}
+    items = schedule_block if isinstance(schedule_block, list) else [schedule_block]
+    return [
+        item["cron"].strip()
+        for item in items
+        if isinstance(item, dict) and isinstance(item.get("cron"), str) and item["cron"].strip()
+    ]
+
+
+def _find_crons(node, found: List[str]):
+    if isinstance(node, dict):
+        if "schedule" in node:
+            found.extend(_crons_in(node["schedule"]))
+        for value in node.values():
+            _find_crons(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _find_crons(item, found)
+
+
+def extract_crons(yaml_content: str) -> List[str]:
+    """
+    All distinct schedule cron expressions of a workflow file, in file order.
+    """
+    if not may_have_schedule(yaml_content):
+        return []
+
+    try:
+        parsed = yaml.load(yaml_content, Loader=_SafeLoader)
+    except yaml.YAMLError as e:
+        print(f"[workflow_yaml] YAML parse error: {e}")
+        return []
+    if not isinstance(parsed, dict):
+        return []
+
+    found: List[str] = []
+    # YAML 1.1 reads the `on` key as boolean True
+    triggers = parsed.get("on", parsed.get(True))
+    if isinstance(triggers, dict) and "schedule" in triggers:
+        found.extend(_crons_in(triggers["schedule"]))
+    else:
+        # Non-standard layouts: look for a schedule block anywhere
+        _find_crons(parsed, found)
+
+    return list(dict.fromkeys(found))
+
+
+def get_parse_pool() -> Optional[Executor]:
+    """
+    Shared process pool for parsing during bulk syncs, or None when
+    WORKFLOW_PARSE_PROCESSES is 1 (parse inline).
+    """
+    global _parse_pool
+    processes = settings.WORKFLOW_PARSE_PROCESSES or os.cpu_count() or 1
+    if processes <= 1:
+        return None
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=processes)
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+async def extract_crons_async(yaml_content: str, executor: Optional[Executor] = None) -> List[str]:
+    """
+    `extract_crons` for async callers: parsed in `executor` when one is given,
+    inline otherwise. Files without a schedule never leave this process.
+    """
+    if executor is None or not may_have_schedule(yaml_content):
+        return extract_crons(yaml_content)
+    return await asyncio.get_running_loop().run_in_executor(executor, extract_crons, yaml_content)
@@ -1,14 +1,23 @@
+import os
+import tempfile
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
-from app.core.db import Base, get_db
+from app.core.db import Base, async_database_url, get_async_db, get_db
+from app.models.workflow import Organization
+from app.services import github_auth, github_client, github_identity, github_sync, organizations, response_cache, subscription
+from app.services.github_client import GitHubClient
+from app.tests.fake_github import FakeGitHub
 
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# SQLite for testing, in a file so the sync and the async engine share it
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -18,6 +27,11 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# No pooling: each TestClient runs the app on its own event loop
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 @pytest.fixture(scope="function")
 def db():
     """
@@ -31,10 +45,33 @@ def db():
         session.close()
         Base.metadata.drop_all(bind=engine)
 
+def default_github() -> GitHubClient:
+    """
+    GitHub for tests that don't use a fake: any token is a user who can
+    access every installation in the test database.
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/user":
+            return httpx.Response(200, json={"id": 1, "login": "tester", "avatar_url": "", "name": "Tester"})
+        if request.url.path == "/user/installations":
+            with TestingSessionLocal() as session:
+                orgs = session.execute(select(Organization.installation_id, Organization.name)).all()
+            installations = [
+                {"id": installation_id, "account": {"id": installation_id, "login": name, "avatar_url": ""}}
+                for installation_id, name in orgs
+                if installation_id is not None
+            ]
+            return httpx.Response(200, json={"total_count": len(installations), "installations": installations})
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    return GitHubClient(transport=httpx.MockTransport(handler))
+
+
 @pytest.fixture(scope="function")
-def client(db):
+def client(db, monkeypatch):
     """
-    Create a TestClient with the overridden get_db dependency.
+    Create a TestClient with the overridden get_db dependency, and a default
+    GitHub for token checks (replaced by `fake_github_api` when used).
     """
     def override_get_db():
         try:
@@ -42,7 +79,47 @@ def client(db):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    response_cache.clear_response_cache()
+    github_identity.clear_identity_cache()
+    subscription.invalidate_entitlements()
+    organizations.invalidate_organization()
+    monkeypatch.setattr(github_client, "_github_client", default_github())
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def async_queries():
+    """
+    The SQL statements the app runs on the async engine during the test.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def fake_github_api(monkeypatch):
+    """
+    A FakeGitHub that every GitHub call of the app goes to: installed as the
+    process-wide GitHub client, with signing of the app JWT stubbed out.
+    """
+    fake = FakeGitHub()
+    monkeypatch.setattr(github_client, "_github_client", fake.client())
+    monkeypatch.setattr(github_auth, "get_jwt", lambda: "app-jwt")
+    github_auth._installation_tokens.clear()
+    github_sync._cron_by_sha.clear()
+    yield fake
+    github_auth._installation_tokens.clear()
@@ -0,0 +1,389 @@
+"""
+In-process fake of the GitHub API used by the tests and benchmarks.
+
+Models installations, paginated repositories, workflows, contents, trees,
+blobs, runs, the GraphQL workflow-files query, installation token minting,
+the OAuth code exchange and per-token rate limits (with X-RateLimit-*
+headers), plus injectable latency and failures.
+
+Installation tokens are `inst-<installation_id>`; any other bearer token is
+treated as the JWT of the app or as a user token for `user`. Use `client()`
+for a GitHubClient wired to it in-process (the `fake_github_api` fixture
+installs one as the process-wide client), or serve it over HTTP for offline
+load tests and point GITHUB_API_URL / GITHUB_WEB_URL at it:
+
+    python -m app.tests.fake_github --port 9000 --installations 2 --repos 200
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.services.github_client import GitHubClient
+
+
+def fake_installation_token(installation_id: int) -> str:
+    return f"inst-{installation_id}"
+
+
+def blob_sha(content: str) -> str:
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FakeGitHub:
+    def __init__(self, latency: float = 0.0, rate_limit: int = 5000):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_reset = int(time.time()) + 3600
+        self.request_count = 0
+        self.request_paths: list[str] = []
+        self.installations: dict[int, dict] = {}
+        self.repos: dict[str, dict] = {}
+        self.user = {"id": 1, "login": "octocat", "name": "The Octocat", "avatar_url": "https://avatars.example/octocat.png"}
+        self.tokens_minted = 0
+        self._requests_by_token: dict[str, int] = {}
+        self._failures: list[list] = []  # [path regex, status, remaining count]
+        self._next_id = 1000
+        self.app = self._build_app()
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def add_installation(self, installation_id: int, login: str) -> dict:
+        installation = {
+            "id": installation_id,
+            "account": {"id": self._new_id(), "login": login},
+            "repos": [],
+        }
+        self.installations[installation_id] = installation
+        return installation
+
+    def add_repo(self, installation_id: int, name: str, workflows: dict[str, str] | None = None) -> dict:
+        """
+        Add a repository; `workflows` maps file name (e.g. `nightly.yml`) to YAML content.
+        """
+        installation = self.installations[installation_id]
+        account = installation["account"]
+        repo = {
+            "id": self._new_id(),
+            "name": name,
+            "full_name": f"{account['login']}/{name}",
+            "owner": {"id": account["id"], "login": account["login"]},
+            "workflows": [],
+            "files": {},
+            "runs": [],
+        }
+        for file_name, content in (workflows or {}).items():
+            path = f".github/workflows/{file_name}"
+            repo["workflows"].append(
+                {"id": self._new_id(), "name": file_name.rsplit(".", 1)[0], "path": path, "state": "active"}
+            )
+            repo["files"][path] = content
+        installation["repos"].append(repo)
+        self.repos[repo["full_name"]] = repo
+        return repo
+
+    def set_file(self, full_name: str, path: str, content: str):
+        """
+        Commit new content for a file in a repo, registering a workflow for new workflow files.
+        """
+        repo = self.repos[full_name]
+        if path.startswith(".github/workflows/") and not any(wf["path"] == path for wf in repo["workflows"]):
+            file_name = path.rsplit("/", 1)[-1]
+            repo["workflows"].append(
+                {"id": self._new_id(), "name": file_name.rsplit(".", 1)[0], "path": path, "state": "active"}
+            )
+        repo["files"][path] = content
+
+    def remove_file(self, full_name: str, path: str):
+        repo = self.repos[full_name]
+        repo["files"].pop(path, None)
+        repo["workflows"] = [wf for wf in repo["workflows"] if wf["path"] != path]
+
+    def add_run(
+        self,
+        full_name: str,
+        path: str,
+        created_at: datetime,
+        status: str = "completed",
+        conclusion: str | None = "success",
+        duration: timedelta = timedelta(minutes=5),
+    ) -> dict:
+        """
+        Record a run of the repo's workflow at `path`, created at `created_at` (UTC).
+        """
+        repo = self.repos[full_name]
+        workflow = next(wf for wf in repo["workflows"] if wf["path"] == path)
+        created = created_at.replace(tzinfo=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        updated = (created_at + duration).replace(tzinfo=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        run = {
+            "id": self._new_id(),
+            "name": workflow["name"],
+            "path": path,
+            "workflow_id": workflow["id"],
+            "status": status,
+            "conclusion": conclusion if status == "completed" else None,
+            "created_at": created,
+            "run_started_at": created,
+            "updated_at": updated,
+        }
+        repo["runs"].append(run)
+        return run
+
+    def inject_failure(self, path_pattern: str, status: int = 502, times: int = 1):
+        """
+        Answer the next `times` requests whose path matches `path_pattern` (a regex) with `status`.
+        """
+        self._failures.append([re.compile(path_pattern), status, times])
+
+    def reset_counts(self):
+        self.request_count = 0
+        self.request_paths = []
+
+    def client(self) -> GitHubClient:
+        sync_client = TestClient(self.app)
+
+        # Blocking calls (token minting) go through the TestClient
+        def send_sync(request: httpx.Request) -> httpx.Response:
+            resp = sync_client.request(
+                request.method, request.url.raw_path.decode(), headers=request.headers, content=request.read()
+            )
+            return httpx.Response(resp.status_code, headers=resp.headers, content=resp.content)
+
+        return GitHubClient(
+            base_url="https://fake-github",
+            transport=httpx.ASGITransport(app=self.app),
+            sync_transport=httpx.MockTransport(send_sync),
+        )
+
+    def _rate_limit_headers(self, remaining: int) -> dict:
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(self.rate_limit_reset),
+            "X-RateLimit-Resource": "core",
+        }
+
+    def _user_for(self, authorization: str | None) -> dict:
+        token = (authorization or "").replace("Bearer ", "")
+        if not token or token.startswith("inst-"):
+            raise HTTPException(status_code=401, detail="Bad credentials")
+        return self.user
+
+    def _installation_for(self, authorization: str | None) -> dict:
+        token = (authorization or "").replace("Bearer ", "")
+        if not token.startswith("inst-"):
+            raise HTTPException(status_code=401, detail="Bad credentials")
+        installation = self.installations.get(int(token[len("inst-"):]))
+        if not installation:
+            raise HTTPException(status_code=401, detail="Bad credentials")
+        return installation
+
+    def _repo_for(self, authorization: str | None, owner: str, name: str) -> dict:
+        installation = self._installation_for(authorization)
+        repo = self.repos.get(f"{owner}/{name}")
+        if not repo or repo not in installation["repos"]:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return repo
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def simulate_github(request: Request, call_next):
+            self.request_count += 1
+            self.request_paths.append(request.url.path)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            for failure in self._failures:
+                pattern, status, remaining = failure
+                if remaining > 0 and pattern.search(request.url.path):
+                    failure[2] -= 1
+                    return JSONResponse({"message": "Injected failure"}, status_code=status)
+
+            token = request.headers.get("authorization", "")
+            used = self._requests_by_token.get(token, 0)
+            if token and used >= self.rate_limit:
+                return JSONResponse(
+                    {"message": "API rate limit exceeded"},
+                    status_code=403,
+                    headers=self._rate_limit_headers(0),
+                )
+            self._requests_by_token[token] = used + 1
+
+            response = await call_next(request)
+            if token:
+                response.headers.update(self._rate_limit_headers(self.rate_limit - used - 1))
+            return response
+
+        @app.get("/user")
+        def user(authorization: str | None = Header(None)):
+            self._user_for(authorization)
+            return self.user
+
+        @app.post("/login/oauth/access_token")
+        def oauth_access_token(request: Request):
+            return {"access_token": f"user-{self.user['login']}", "token_type": "bearer", "scope": "read:user"}
+
+        @app.post("/app/installations/{installation_id}/access_tokens", status_code=201)
+        def installation_access_token(installation_id: int, authorization: str | None = Header(None)):
+            self._user_for(authorization)
+            if installation_id not in self.installations:
+                raise HTTPException(status_code=404, detail="Not Found")
+            self.tokens_minted += 1
+            expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+            return {
+                "token": fake_installation_token(installation_id),
+                "expires_at": expires_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+
+        @app.get("/user/installations")
+        def user_installations(
+            per_page: int = 30,
+            page: int = 1,
+            authorization: str | None = Header(None),
+        ):
+            # The user has access to every installation
+            self._user_for(authorization)
+            installations = [
+                {"id": inst["id"], "account": inst["account"]} for inst in self.installations.values()
+            ]
+            start = (page - 1) * per_page
+            return {"total_count": len(installations), "installations": installations[start:start + per_page]}
+
+        @app.get("/installation/repositories")
+        def installation_repositories(
+            per_page: int = 30,
+            page: int = 1,
+            authorization: str | None = Header(None),
+        ):
+            repos = self._installation_for(authorization)["repos"]
+            start = (page - 1) * per_page
+            return {
+                "total_count": len(repos),
+                "repositories": [
+                    {k: repo[k] for k in ("id", "name", "full_name", "owner")}
+                    for repo in repos[start:start + per_page]
+                ],
+            }
+
+        @app.get("/repos/{owner}/{name}/actions/workflows")
+        def repo_workflows(owner: str, name: str, authorization: str | None = Header(None)):
+            repo = self._repo_for(authorization, owner, name)
+            return {"total_count": len(repo["workflows"]), "workflows": repo["workflows"]}
+
+        @app.post("/graphql")
+        async def graphql(request: Request, authorization: str | None = Header(None)):
+            # Only understands the aliased workflow-files query from app.services.github_graphql
+            installation = self._installation_for(authorization)
+            body = await request.json()
+            variables = body.get("variables", {})
+            data, errors = {}, []
+            for alias, owner_var, name_var in re.findall(
+                r"(\w+): repository\(owner: \$(\w+), name: \$(\w+)\)", body["query"]
+            ):
+                repo = self.repos.get(f"{variables[owner_var]}/{variables[name_var]}")
+                if not repo or repo not in installation["repos"]:
+                    data[alias] = None
+                    errors.append({"type": "NOT_FOUND", "path": [alias]})
+                    continue
+                entries = [
+                    {
+                        "name": path.rsplit("/", 1)[-1],
+                        "type": "blob",
+                        "oid": blob_sha(content),
+                        "object": {"text": content, "isBinary": False},
+                    }
+                    for path, content in repo["files"].items()
+                    if path.rsplit("/", 1)[0] == ".github/workflows"
+                ]
+                data[alias] = {"object": {"entries": entries} if entries else None}
+            return {"data": data, **({"errors": errors} if errors else {})}
+
+        @app.get("/repos/{owner}/{name}/actions/runs")
+        def repo_runs(
+            owner: str,
+            name: str,
+            created: str | None = None,
+            per_page: int = 30,
+            page: int = 1,
+            authorization: str | None = Header(None),
+        ):
+            repo = self._repo_for(authorization, owner, name)
+            runs = sorted(repo["runs"], key=lambda run: run["created_at"], reverse=True)
+            if created:
+                # Supports the `A..B` and `>=A` forms; timestamps compare as strings
+                if ".." in created:
+                    since, until = created.split("..")
+                else:
+                    since, until = created.lstrip(">="), "9999"
+                runs = [run for run in runs if since <= run["created_at"] <= until]
+            start = (page - 1) * per_page
+            return {"total_count": len(runs), "workflow_runs": runs[start:start + per_page]}
+
+        @app.get("/repos/{owner}/{name}/contents/{path:path}")
+        def repo_contents(owner: str, name: str, path: str, authorization: str | None = Header(None)):
+            repo = self._repo_for(authorization, owner, name)
+            if path not in repo["files"]:
+                raise HTTPException(status_code=404, detail="Not Found")
+            content = repo["files"][path].encode("utf-8")
+            return {"path": path, "encoding": "base64", "content": base64.b64encode(content).decode("ascii")}
+
+        @app.get("/repos/{owner}/{name}/git/trees/{ref}")
+        def repo_tree(owner: str, name: str, ref: str, authorization: str | None = Header(None)):
+            repo = self._repo_for(authorization, owner, name)
+            return {
+                "sha": blob_sha("".join(sorted(repo["files"].values()))),
+                "truncated": False,
+                "tree": [
+                    {"path": path, "type": "blob", "sha": blob_sha(content)}
+                    for path, content in repo["files"].items()
+                ],
+            }
+
+        @app.get("/repos/{owner}/{name}/git/blobs/{sha}")
+        def repo_blob(owner: str, name: str, sha: str, authorization: str | None = Header(None)):
+            repo = self._repo_for(authorization, owner, name)
+            for content in repo["files"].values():
+                if blob_sha(content) == sha:
+                    data = content.encode("utf-8")
+                    return {"sha": sha, "encoding": "base64", "content": base64.b64encode(data).decode("ascii")}
+            raise HTTPException(status_code=404, detail="Not Found")
+
+        return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--installations", type=int, default=1)
+    parser.add_argument("--repos", type=int, default=100, help="repos per installation")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="requests per token per hour")
+    args = parser.parse_args()
+
+    nightly = 'on:\n  schedule:\n    - cron: "0 3 * * *"\n'
+    fake = FakeGitHub(latency=args.latency, rate_limit=args.rate_limit)
+    for inst in range(1, args.installations + 1):
+        fake.add_installation(inst, f"org-{inst}")
+        for r in range(args.repos):
+            fake.add_repo(inst, f"repo-{r}", {"nightly.yml": nightly, "ci.yml": "on: [push]\n"})
+
+    uvicorn.run(fake.app, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.analytics import _percentile_query
+from app.services.workflow_runs import upsert_workflow_runs
+from app.tests.test_run_rollups import run_row
+from app.tests.test_workflow_status import make_workflow
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+def test_duration_stats_never_reads_raw_runs_on_sqlite(client, db, async_queries):
+    wf = make_workflow(db)
+    now = datetime.now(timezone.utc)
+    upsert_workflow_runs(db, [run_row(wf, i, "success", now - timedelta(hours=i), 1000 * i) for i in range(1, 201)])
+    db.commit()
+
+    stats = client.get("/api/analytics/duration-stats", params={"installation_id": 1}, headers=AUTH).json()
+
+    assert stats["total_runs"] == 200
+    assert stats["p50_duration_ms"] <= stats["p90_duration_ms"] <= stats["p95_duration_ms"] <= stats["p99_duration_ms"]
+    assert stats["p99_duration_ms"] <= stats["max_duration_ms"]
+    assert not [s for s in async_queries if "FROM workflow_runs" in s]
+
+
+def test_postgres_percentiles_are_computed_in_the_database():
+    sql = str(_percentile_query(1, date(2026, 1, 1)).compile(dialect=postgresql.dialect()))
+
+    assert sql.count("WITHIN GROUP (ORDER BY workflow_runs.duration_ms)") == 4
+    assert "percentile_cont" in sql
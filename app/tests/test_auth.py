@@ -1,13 +1,17 @@
-from unittest.mock import patch, MagicMock
+import time
+
+import httpx
 from fastapi.testclient import TestClient
+from app.api import auth
 from app.models.workflow import Organization
+from app.services.github_client import GitHubClient
 
 def test_login_redirect(client):
     response = client.get("/api/auth/login", follow_redirects=False)
     assert response.status_code == 307
     assert "github.com/login/oauth/authorize" in response.headers["location"]
 
-def test_get_me_success(client, db):
+def test_get_me_success(client, db, monkeypatch):
     # Mock GitHub API responses
     mock_user_data = {
         "id": 12345,
@@ -29,42 +33,100 @@ def test_get_me_success(client, db):
         ]
     }
 
-    with patch("httpx.get") as mock_get:
-        # Setup mock side effects for multiple calls
-        def side_effect(url, headers, timeout):
-            mock_resp = MagicMock()
-            mock_resp.status_code = 200
-            if url == "https://api.github.com/user":
-                mock_resp.json.return_value = mock_user_data
-            elif url == "https://api.github.com/user/installations":
-                mock_resp.json.return_value = mock_installations_data
-            return mock_resp
-
-        mock_get.side_effect = side_effect
-
-        # Make request
-        response = client.get(
-            "/api/auth/me",
-            headers={"Authorization": "Bearer fake-token"}
-        )
+    # Mock GitHub API responses for multiple calls
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/user":
+            return httpx.Response(200, json=mock_user_data)
+        elif request.url.path == "/user/installations":
+            return httpx.Response(200, json=mock_installations_data)
+        return httpx.Response(404)
+
+    github = GitHubClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(auth, "get_github_client", lambda: github)
+
+    # Make request
+    response = client.get(
+        "/api/auth/me",
+        headers={"Authorization": "Bearer fake-token"}
+    )
 
-        assert response.status_code == 200
-        data = response.json()
-        
-        # Verify user data
-        assert data["user"]["id"] == 12345
-        assert data["user"]["login"] == "testuser"
-        
-        # Verify installation data
-        assert len(data["installations"]) == 1
-        assert data["installations"][0]["id"] == 98765
-        assert data["installations"][0]["account_login"] == "testorg"
-        
-        # Verify DB side effect (Organization created)
-        org = db.query(Organization).filter_by(installation_id=98765).first()
-        assert org is not None
-        assert org.name == "testorg"
+    assert response.status_code == 200
+    data = response.json()
+    
+    # Verify user data
+    assert data["user"]["id"] == 12345
+    assert data["user"]["login"] == "testuser"
+    
+    # Verify installation data
+    assert len(data["installations"]) == 1
+    assert data["installations"][0]["id"] == 98765
+    assert data["installations"][0]["account_login"] == "testorg"
+    
+    # Verify DB side effect (Organization created)
+    org = db.query(Organization).filter_by(installation_id=98765).first()
+    assert org is not None
+    assert org.name == "testorg"
 
 def test_get_me_unauthorized(client):
     response = client.get("/api/auth/me")
     assert response.status_code == 401
+
+
+def test_callback_exchanges_code_against_github(client, fake_github_api):
+    response = client.get("/api/auth/callback?code=abc", follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.cookies["gh_token"] == "user-octocat"
+
+
+def test_get_me_against_fake_github(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer user-octocat"})
+
+    assert response.status_code == 200
+    assert response.json()["user"]["login"] == "octocat"
+    assert [inst["id"] for inst in response.json()["installations"]] == [42]
+    assert db.query(Organization).filter_by(installation_id=42).one().name == "acme"
+
+
+def test_get_me_follows_installation_pages(client, monkeypatch):
+    installations = [{"id": i, "account": {"id": i, "login": f"org-{i}", "avatar_url": ""}} for i in range(1, 251)]
+    pages = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/user":
+            return httpx.Response(200, json={"id": 1, "login": "octocat", "avatar_url": ""})
+        per_page = int(request.url.params["per_page"])
+        page = int(request.url.params["page"])
+        pages.append(page)
+        return httpx.Response(200, json={
+            "total_count": len(installations),
+            "installations": installations[(page - 1) * per_page:page * per_page],
+        })
+
+    github = GitHubClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(auth, "get_github_client", lambda: github)
+
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer many-orgs"})
+
+    assert response.status_code == 200
+    assert sorted(pages) == [1, 2, 3]
+    assert [inst["id"] for inst in response.json()["installations"]] == list(range(1, 251))
+
+
+def test_rate_limited_identity_lookup_is_503(client, monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            403,
+            headers={"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) + 120)},
+            json={"message": "API rate limit exceeded"},
+        )
+
+    github = GitHubClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(auth, "get_github_client", lambda: github)
+
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer limited"})
+
+    assert response.status_code == 503
+    assert 100 < int(response.headers["Retry-After"]) <= 121
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.db import upsert
+from app.models.workflow import Organization, Repository, Workflow
+from app.services.workflow_runs import upsert_workflow_runs
+
+
+def seed(db):
+    org = Organization(github_org_id=1, installation_id=1, name="acme")
+    db.add(org)
+    db.flush()
+    api = Repository(github_repo_id=10, org_id=org.id, name="api", full_name="acme/api")
+    web = Repository(github_repo_id=11, org_id=org.id, name="web", full_name="acme/web")
+    db.add_all([api, web])
+    db.flush()
+    nightly = Workflow(github_workflow_id=100, repo_id=api.id, name="Nightly", path="n.yml", cron_expression="0 3 * * *")
+    weekly = Workflow(github_workflow_id=101, repo_id=api.id, name="Weekly", path="w.yml")
+    deploy = Workflow(github_workflow_id=102, repo_id=web.id, name="Deploy", path="d.yml")
+    db.add_all([nightly, weekly, deploy])
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    runs = [
+        (nightly, "missed", now - timedelta(hours=1)),
+        (nightly, "missed", now - timedelta(hours=5)),
+        (nightly, "success", now - timedelta(minutes=10)),
+        (weekly, "missed", now - timedelta(days=3)),  # outside the 24h window
+    ]
+    upsert_workflow_runs(db, [
+        {
+            "github_run_id": 1000 + i,
+            "workflow_id": wf.id,
+            "status": "completed",
+            "conclusion": conclusion,
+            "started_at": started_at,
+            "completed_at": None,
+            "duration_ms": None,
+            "raw_payload": None,
+        }
+        for i, (wf, conclusion, started_at) in enumerate(runs)
+    ])
+    db.commit()
+    return now
+
+
+def test_workflows_status_aggregates_recent_misses(client, db):
+    now = seed(db)
+
+    response = client.get("/api/workflows/status")
+
+    assert response.status_code == 200
+    by_name = {item["name"]: item for item in response.json()}
+    assert by_name["Nightly"]["missed_count_24h"] == 2
+    assert by_name["Nightly"]["status"] == "MISSED"
+    assert by_name["Nightly"]["repo_full_name"] == "acme/api"
+    last_missed = datetime.fromisoformat(by_name["Nightly"]["last_missed_at"]).replace(tzinfo=timezone.utc)
+    assert abs(last_missed - (now - timedelta(hours=1))) < timedelta(seconds=1)
+    assert by_name["Weekly"]["missed_count_24h"] == 0
+    assert by_name["Weekly"]["status"] == "HEALTHY"
+    assert by_name["Deploy"]["last_missed_at"] is None
+
+
+def test_workflows_status_search_matches_repo_or_workflow(client, db):
+    seed(db)
+
+    by_repo = client.get("/api/workflows/status", params={"q": "acme/web"}).json()
+    by_name = client.get("/api/workflows/status", params={"q": "weekly"}).json()
+
+    assert [item["name"] for item in by_repo] == ["Deploy"]
+    assert [item["name"] for item in by_name] == ["Weekly"]
+
+
+def test_summary_reads_status_table(client, db):
+    now = seed(db)
+
+    summary = client.get("/api/summary").json()
+
+    assert summary["total_workflows"] == 3
+    assert summary["workflows_with_misses_24h"] == 1
+    assert summary["healthy_workflows"] == 2
+    last_missed = datetime.fromisoformat(summary["last_missed_at"]).replace(tzinfo=timezone.utc)
+    assert abs(last_missed - (now - timedelta(hours=1))) < timedelta(seconds=1)
+
+
+def test_search_ranks_name_prefix_first_and_follows_renames(client, db):
+    seed(db)
+    db.add(Workflow(github_workflow_id=103, repo_id=db.query(Repository).filter_by(name="web").one().id,
+                    name="Pre-nightly cleanup", path="c.yml"))
+    db.commit()
+
+    names = [item["name"] for item in client.get("/api/workflows/status", params={"q": "nightly"}).json()]
+    assert names == ["Nightly", "Pre-nightly cleanup"]
+    # Shorter than a trigram: prefix matches only
+    assert [item["name"] for item in client.get("/api/workflows/status", params={"q": "we"}).json()] == ["Weekly"]
+
+    # Set-based upserts and repo renames keep the index current
+    stmt = upsert(db, Workflow)
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=[Workflow.github_workflow_id], set_={"name": stmt.excluded.name}),
+        [{"github_workflow_id": 102, "repo_id": 0, "name": "Release", "path": "d.yml"}],
+    )
+    db.query(Repository).filter_by(name="api").update({Repository.full_name: "acme/backend"})
+    db.commit()
+
+    assert [item["name"] for item in client.get("/api/workflows/status", params={"q": "releas"}).json()] == ["Release"]
+    assert client.get("/api/workflows/status", params={"q": "acme/api"}).json() == []
+    backend = client.get("/api/workflows/status", params={"q": "backend", "limit": 1}).json()
+    assert len(backend) == 1 and backend[0]["repo_full_name"] == "acme/backend"
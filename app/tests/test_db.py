@@ -0,0 +1,11 @@
+from app.core.db import async_database_url
+
+
+def test_async_database_url_uses_async_drivers():
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_async_database_url_translates_sslmode():
+    assert async_database_url("postgresql://u:p@db/app?sslmode=require") == "postgresql+asyncpg://u:p@db/app?ssl=require"
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+import stripe
+from sqlalchemy import event
+
+from app.models.subscription import Subscription
+from app.models.workflow import Organization
+from app.services import subscription
+from app.services.subscription import get_subscription_info, is_pro_user
+from app.tests.conftest import TestingAsyncSessionLocal, async_engine
+
+
+def _check(org_ids):
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return [await is_pro_user(org_id, db) for org_id in org_ids]
+    return asyncio.run(run())
+
+
+def _add_orgs(db):
+    acme = Organization(github_org_id=1, installation_id=42, name="acme")
+    other = Organization(github_org_id=2, installation_id=99, name="other")
+    db.add_all([acme, other])
+    db.flush()
+    db.add(Subscription(organization_id=acme.id, stripe_subscription_id="sub_1", status="active"))
+    db.commit()
+    return acme, other
+
+
+def _post_event(client, monkeypatch, event_type, obj):
+    monkeypatch.setattr(subscription.settings, "STRIPE_WEBHOOK_SECRET", "whsec_test")
+    monkeypatch.setattr(stripe.Webhook, "construct_event", lambda payload, sig, secret: json.loads(payload))
+    return client.post(
+        "/api/billing/webhook",
+        content=json.dumps({"type": event_type, "data": {"object": obj}}),
+        headers={"Stripe-Signature": "t=1,v1=test"},
+    )
+
+
+def test_gating_checks_are_query_free_after_bulk_load(client, db, monkeypatch, async_queries):
+    monkeypatch.setattr(subscription.settings, "PRO_FEATURES_FOR_ALL", False)
+    acme, other = _add_orgs(db)
+
+    assert _check([acme.id, other.id]) == [True, False]
+    loads = len([q for q in async_queries if "subscriptions" in q])
+    assert _check([acme.id, other.id] * 10) == [True, False] * 10
+
+    assert loads == 1
+    assert len([q for q in async_queries if "subscriptions" in q]) == 1
+    assert subscription.stats["hits"] >= 21
+
+
+def test_subscription_webhooks_invalidate_entitlement(client, db, monkeypatch):
+    monkeypatch.setattr(subscription.settings, "PRO_FEATURES_FOR_ALL", False)
+    acme, other = _add_orgs(db)
+    assert _check([acme.id]) == [True]
+
+    response = _post_event(client, monkeypatch, "customer.subscription.deleted", {"id": "sub_1"})
+
+    assert response.status_code == 200
+    assert _check([acme.id]) == [False]
+
+
+def test_checkout_makes_organization_pro(client, db, monkeypatch):
+    acme, other = _add_orgs(db)
+    asyncio.run(_info(other.id))
+
+    response = _post_event(client, monkeypatch, "checkout.session.completed", {
+        "client_reference_id": "99", "customer": "cus_2", "subscription": "sub_2",
+    })
+
+    assert response.status_code == 200
+    assert asyncio.run(_info(other.id))["isPro"] is True
+
+
+async def _info(org_id):
+    async with TestingAsyncSessionLocal() as db:
+        return await get_subscription_info(org_id, db)
+
+
+def test_invalidation_during_bulk_load_is_kept(client, db, monkeypatch):
+    monkeypatch.setattr(subscription.settings, "PRO_FEATURES_FOR_ALL", False)
+    acme, other = _add_orgs(db)
+    organization_loads = subscription.stats["organization_loads"]
+    changed = []
+
+    def cancel_while_loading(conn, cursor, statement, *args):
+        # The subscription changes after the bulk load read it
+        if not changed:
+            changed.append(statement)
+            db.query(Subscription).update({"status": "canceled"})
+            db.commit()
+            subscription.invalidate_entitlements(acme.id)
+
+    event.listen(async_engine.sync_engine, "after_cursor_execute", cancel_while_loading)
+    try:
+        assert _check([other.id]) == [False]
+    finally:
+        event.remove(async_engine.sync_engine, "after_cursor_execute", cancel_while_loading)
+
+    assert _check([acme.id]) == [False]
+    assert subscription.stats["organization_loads"] == organization_loads + 1
@@ -0,0 +1,72 @@
+from app.api import dashboard
+from app.models.workflow import Organization
+from app.services.response_cache import bump_data_version
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+def test_unchanged_poll_is_answered_304_without_querying(client, db, monkeypatch):
+    first = client.get("/api/summary", params={"installation_id": 5})
+    etag = first.headers["ETag"]
+
+    def no_query(*args, **kwargs):
+        raise AssertionError("queried on a conditional hit")
+
+    monkeypatch.setattr(dashboard, "summary_stats", no_query)
+    again = client.get("/api/summary", params={"installation_id": 5}, headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_etag_changes_with_the_installations_data(client, db):
+    etag = client.get("/api/summary", params={"installation_id": 5}).headers["ETag"]
+
+    bump_data_version(6)
+    assert client.get("/api/summary", params={"installation_id": 5}, headers={"If-None-Match": etag}).status_code == 304
+
+    bump_data_version(5)
+    changed = client.get("/api/summary", params={"installation_id": 5}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    # Different params of the same data are different representations
+    assert client.get("/api/summary", headers={"If-None-Match": changed.headers["ETag"]}).status_code == 200
+
+
+def test_settings_update_invalidates_etag(client, db):
+    db.add(Organization(github_org_id=1, installation_id=5, name="acme"))
+    db.commit()
+
+    first = client.get("/api/settings/5", headers=AUTH)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/api/settings/5", headers={**AUTH, "If-None-Match": etag}).status_code == 304
+
+    assert client.patch("/api/settings/5", json={"alert_threshold_minutes": 30}, headers=AUTH).status_code == 200
+
+    updated = client.get("/api/settings/5", headers={**AUTH, "If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.json()["alert_threshold_minutes"] == 30
+
+
+def test_conditional_get_is_authenticated_first(client, db):
+    db.add_all([
+        Organization(github_org_id=1, installation_id=5, name="acme"),
+        Organization(github_org_id=2, installation_id=6, name="other"),
+    ])
+    db.commit()
+    etag = client.get("/api/settings/5", headers=AUTH).headers["ETag"]
+
+    assert client.get("/api/settings/5", headers={"If-None-Match": etag}).status_code == 401
+    assert client.get("/api/alerts/", params={"installation_id": 5}, headers={"If-None-Match": "*"}).status_code == 401
+
+
+def test_conditional_get_checks_installation_access(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+    db.add(Organization(github_org_id=2, installation_id=99, name="other"))
+    db.commit()
+
+    response = client.get("/api/settings/99", headers={"Authorization": "Bearer user-octocat", "If-None-Match": "*"})
+
+    assert response.status_code == 403
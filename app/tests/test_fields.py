@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from app.models.alert import Alert, AlertSeverity, AlertType
+from app.models.workflow import Organization, Repository, Workflow
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+def seed(db, workflow_count=3):
+    org = Organization(github_org_id=1, installation_id=5, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=10, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.flush()
+    workflows = [
+        Workflow(github_workflow_id=100 + i, repo_id=repo.id, name=f"wf-{i}", path=f"{i}.yml", cron_expression="0 3 * * *")
+        for i in range(workflow_count)
+    ]
+    db.add_all(workflows)
+    db.flush()
+    db.add_all([
+        Alert(
+            organization_id=org.id,
+            workflow_id=workflows[0].id,
+            alert_type=AlertType.MISSED,
+            severity=AlertSeverity.ERROR,
+            message="Nightly missed its run\n" * 20,
+            detected_at=datetime(2026, 1, 1) + timedelta(minutes=i),
+        )
+        for i in range(3)
+    ])
+    db.commit()
+    return org, workflows
+
+
+def test_alert_fields_narrow_the_response(client, db):
+    seed(db)
+
+    response = client.get(
+        "/api/alerts/", params={"installation_id": 5, "fields": "alert_type,repository_name", "limit": 2}, headers=AUTH
+    )
+
+    assert response.status_code == 200
+    alerts = response.json()
+    assert alerts[0] == {"id": alerts[0]["id"], "alert_type": "missed", "repository_name": "acme/api"}
+    assert len(alerts) == 2
+    assert response.headers["X-Next-Cursor"]
+    assert response.headers["ETag"]
+
+
+def test_all_fields_without_fields_param(client, db):
+    seed(db)
+
+    alerts = client.get("/api/alerts/", params={"installation_id": 5}, headers=AUTH).json()
+    workflows = client.get("/api/workflows/", headers=AUTH).json()
+
+    assert set(alerts[0]) == {
+        "id", "workflow_id", "alert_type", "severity", "message", "detected_at",
+        "acknowledged", "acknowledged_at", "workflow_name", "repository_name",
+    }
+    assert alerts[0]["workflow_name"] == "wf-0"
+    assert workflows[0] == {
+        "id": workflows[0]["id"],
+        "name": "wf-0",
+        "repo_full_name": "acme/api",
+        "cron_expression": "0 3 * * *",
+        "last_run_at": None,
+    }
+
+
+def test_workflow_list_fields(client, db):
+    seed(db)
+
+    workflows = client.get("/api/workflows/", params={"fields": "name"}, headers=AUTH).json()
+    statuses = client.get("/api/workflows/status", params={"fields": "status,name"}).json()
+
+    assert [set(wf) for wf in workflows] == [{"id", "name"}] * 3
+    assert statuses[0] == {"id": statuses[0]["id"], "name": "wf-0", "status": "HEALTHY"}
+
+
+def test_unknown_field_is_rejected(client, db):
+    seed(db)
+
+    response = client.get("/api/workflows/", params={"fields": "name,secret"}, headers=AUTH)
+
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+
+def test_large_responses_are_compressed(client, db):
+    seed(db, workflow_count=200)
+
+    large = client.get("/api/workflows/status", headers={"Accept-Encoding": "gzip"})
+    small = client.get("/api/workflows/status", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert int(large.headers["Content-Length"]) < len(large.content) / 4
+    assert len(large.json()) == 200
+    assert "Content-Encoding" not in small.headers
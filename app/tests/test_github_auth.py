@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from app.services import github_auth
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    github_auth._installation_tokens.clear()
+    yield
+    github_auth._installation_tokens.clear()
+
+
+@pytest.fixture
+def mint_calls(monkeypatch):
+    calls = []
+
+    def fake_mint(installation_id):
+        calls.append(installation_id)
+        time.sleep(0.05)  # keep the mint in flight while other callers arrive
+        return f"token-{installation_id}-{len(calls)}", time.time() + 3600
+
+    monkeypatch.setattr(github_auth, "_mint_installation_token", fake_mint)
+    return calls
+
+
+def test_installation_token_is_cached(mint_calls):
+    first = github_auth.get_installation_token(1)
+    second = github_auth.get_installation_token(1)
+    other = github_auth.get_installation_token(2)
+
+    assert first == second == "token-1-1"
+    assert other == "token-2-2"
+    assert mint_calls == [1, 2]
+
+
+def test_concurrent_callers_share_one_mint(mint_calls):
+    tokens = []
+    threads = [
+        threading.Thread(target=lambda: tokens.append(github_auth.get_installation_token(7)))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert mint_calls == [7]
+    assert set(tokens) == {"token-7-1"}
+
+
+def test_token_refreshed_before_expiry(mint_calls):
+    github_auth._installation_tokens[3] = ("stale", time.time() + 60)
+
+    assert github_auth.get_installation_token(3) == "token-3-1"
+    assert mint_calls == [3]
+
+
+def test_invalidate_forces_new_mint(mint_calls):
+    github_auth.get_installation_token(4)
+    github_auth.invalidate_installation_token(4)
+    github_auth.get_installation_token(4)
+
+    assert mint_calls == [4, 4]
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.services import github_client
+from app.services.github_client import GitHubClient, RateLimitBudget
+
+
+def rate_limit_headers(remaining: int, limit: int = 5000, reset_in: int = 600) -> dict:
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time()) + reset_in),
+    }
+
+
+async def test_conditional_get_replays_cached_body_on_304():
+    seen_etags = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_etags.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers=rate_limit_headers(4999))
+        return httpx.Response(200, json={"total_count": 1}, headers={"ETag": '"v1"', **rate_limit_headers(4999)})
+
+    async with GitHubClient(transport=httpx.MockTransport(handler)) as client:
+        first = await client.get("/installation/repositories", token="t")
+        second = await client.get("/installation/repositories", token="t")
+
+    assert seen_etags == [None, '"v1"']
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"total_count": 1}
+
+
+async def test_etag_cache_is_limited_by_size(monkeypatch):
+    monkeypatch.setattr(github_client, "ETAG_CACHE_MAX_BYTES", 3000)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"x" * 1000, headers={"ETag": f'"{request.url.path}"'})
+
+    async with GitHubClient(transport=httpx.MockTransport(handler)) as client:
+        for path in ("/a", "/b", "/c", "/d"):
+            await client.get(path, token="t")
+
+    assert [url for _, url in client._etags] == ["/c", "/d"]
+    assert client._etag_bytes == sum(entry.size for entry in client._etags.values()) <= 3000
+
+
+async def test_pool_of_previous_loop_is_closed():
+    client = GitHubClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(client.get("/user", token="t"), other_loop).result()
+        previous = client._async_client
+
+        await client.get("/user", token="t")
+        for _ in range(50):
+            if previous.is_closed:
+                break
+            await asyncio.sleep(0.01)
+
+        assert previous.is_closed
+        assert not client._async_client.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+        await client.aclose()
+
+
+async def test_secondary_rate_limit_is_retried_after_retry_after():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(403, headers={"Retry-After": "0"}, json={"message": "secondary rate limit"})
+        return httpx.Response(200, json={"ok": True})
+
+    async with GitHubClient(transport=httpx.MockTransport(handler)) as client:
+        response = await client.get("/user", token="t")
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+
+async def test_budgets_are_tracked_per_key():
+    def handler(request: httpx.Request) -> httpx.Response:
+        remaining = 10 if request.headers["Authorization"] == "Bearer low" else 4000
+        return httpx.Response(200, json={}, headers=rate_limit_headers(remaining))
+
+    async with GitHubClient(transport=httpx.MockTransport(handler)) as client:
+        await client.get("/a", token="low", budget_key="installation:1")
+        await client.get("/a", token="high", budget_key="installation:2")
+
+    assert client.budget("installation:1").remaining == 10
+    assert client.budget("installation:2").remaining == 4000
+
+
+def test_budget_throttles_ahead_of_exhaustion():
+    budget = RateLimitBudget()
+    now = time.time()
+
+    budget.update(httpx.Headers(rate_limit_headers(4000)))
+    assert budget.reserve_slot(now) == 0
+
+    # below 10% of the limit: spread the remaining requests over the window
+    budget.update(httpx.Headers(rate_limit_headers(300, reset_in=500)))
+    first = budget.reserve_slot(now)
+    second = budget.reserve_slot(now)
+    assert first == 0
+    assert 1 < second < 3
+
+    # only the reserve left: hold until the reset
+    budget.update(httpx.Headers(rate_limit_headers(20, reset_in=500)))
+    assert 495 < budget.reserve_slot(now) <= 500
+
+
+def test_reserve_is_left_to_interactive_requests():
+    budget = RateLimitBudget()
+    now = time.time()
+    budget.update(httpx.Headers(rate_limit_headers(20, reset_in=500)))
+
+    assert 495 < budget.reserve_slot(now, background=True) <= 500
+    assert budget.reserve_slot(now, background=False) == 0
+
+    budget.update(httpx.Headers(rate_limit_headers(0, reset_in=500)))
+    assert 495 < budget.reserve_slot(now, background=False) <= 500
+
+
+async def test_interactive_request_fails_fast_when_rate_limited():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(403, headers=rate_limit_headers(0, reset_in=600), json={"message": "rate limited"})
+
+    async with GitHubClient(transport=httpx.MockTransport(handler)) as client:
+        start = time.monotonic()
+        try:
+            await client.get("/user", token="t")
+        except github_client.GitHubRateLimitError as e:
+            assert 590 < e.retry_after <= 601
+        else:
+            raise AssertionError("expected GitHubRateLimitError")
+
+    assert time.monotonic() - start < 1
+
+
+def test_budgets_are_capped(monkeypatch):
+    monkeypatch.setattr(github_client, "BUDGETS_MAX_ENTRIES", 2)
+    client = GitHubClient()
+    for key in ("installation:1", "installation:2", "installation:1", "installation:3"):
+        client.budget(key)
+
+    assert list(client._budgets) == ["installation:1", "installation:3"]
@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+
+from app.models.workflow import Organization
+from app.services import github_identity
+from app.services.github_client import GitHubClient
+from app.services.github_identity import get_identity
+
+USER = {"Authorization": "Bearer user-octocat"}
+
+
+def test_repeat_me_is_served_from_cache(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+
+    first = client.get("/api/auth/me", headers=USER)
+    requests_after_first = fake_github_api.request_count
+    second = client.get("/api/auth/me", headers=USER)
+
+    assert first.json() == second.json()
+    assert requests_after_first == 2
+    assert fake_github_api.request_count == 2
+
+
+def test_token_rejected_by_github_is_401(client, fake_github_api):
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer inst-1"})
+
+    assert response.status_code == 401
+
+
+def test_installation_endpoints_check_access(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+    db.add_all([
+        Organization(github_org_id=1, installation_id=42, name="acme"),
+        Organization(github_org_id=2, installation_id=99, name="other"),
+    ])
+    db.commit()
+
+    assert client.get("/api/settings/42", headers=USER).status_code == 200
+    assert client.get("/api/settings/99", headers=USER).status_code == 403
+    assert client.get("/api/alerts/", params={"installation_id": 99}, headers=USER).status_code == 403
+
+
+def test_new_installation_is_picked_up_before_refusing(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+    db.add(Organization(github_org_id=2, installation_id=43, name="beta"))
+    db.commit()
+    assert client.get("/api/auth/me", headers=USER).status_code == 200
+
+    # Installed after the identity was cached
+    fake_github_api.add_installation(43, "beta")
+
+    assert client.get("/api/settings/43", headers=USER).status_code == 200
+
+
+def test_stale_identity_served_while_refreshed_in_background(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/user":
+            return httpx.Response(200, json={"id": 1, "login": "octocat"})
+        return httpx.Response(200, json={"installations": [{"id": len(calls)}]})
+
+    github = GitHubClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(github_identity.settings, "IDENTITY_REFRESH_AFTER_SECONDS", 0)
+    github_identity.clear_identity_cache()
+
+    async def scenario():
+        first = await get_identity("token", github)
+        stale = await get_identity("token", github)
+        await asyncio.sleep(0.05)
+        refreshed = await get_identity("token", github)
+        return first, stale, refreshed
+
+    first, stale, refreshed = asyncio.run(scenario())
+    github_identity.clear_identity_cache()
+
+    assert stale is first
+    assert refreshed is not first
+    assert refreshed.installation_ids != first.installation_ids
+
+
+def test_refused_installation_is_not_rechecked_every_request(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+    db.add(Organization(github_org_id=2, installation_id=99, name="other"))
+    db.commit()
+
+    assert client.get("/api/settings/99", headers=USER).status_code == 403
+    requests_after_first = fake_github_api.request_count
+    for _ in range(5):
+        assert client.get("/api/settings/99", headers=USER).status_code == 403
+
+    assert fake_github_api.request_count == requests_after_first
+    assert github_identity.identity_stats()["denied_hits"] == 5
@@ -0,0 +1,271 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.models.workflow import Repository, Workflow
+from app.services import github_client, github_sync
+from app.services.github_client import GitHubRateLimitError
+from app.services.github_graphql import parse_workflow_files, workflow_files_query
+from app.services.github_sync import discover_and_sync_workflows_async, sync_cron_expressions_async
+from app.tests.fake_github import FakeGitHub, fake_installation_token
+
+NIGHTLY = """
+name: Nightly
+on:
+  schedule:
+    - cron: "0 3 * * *"
+jobs:
+  build:
+    runs-on: ubuntu-latest
+"""
+
+CI = """
+name: CI
+on: [push]
+jobs:
+  test:
+    runs-on: ubuntu-latest
+"""
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    monkeypatch.setattr(github_sync, "get_installation_token", fake_installation_token)
+    github_sync._cron_by_sha.clear()
+    return FakeGitHub()
+
+
+async def test_discover_stores_every_repo_and_workflow(db, fake_github):
+    fake_github.add_installation(1, "acme")
+    for i in range(150):
+        fake_github.add_repo(1, f"repo-{i}", {"nightly.yml": NIGHTLY, "ci.yml": CI})
+
+    async with fake_github.client() as client:
+        stats = await discover_and_sync_workflows_async(db, [1], client=client)
+
+    assert stats["errors"] == []
+    assert stats["repos_found"] == 150
+    assert stats["workflows_found"] == 300
+    assert db.query(Repository).count() == 150
+    assert db.query(Workflow).count() == 300
+    crons = {wf.path: wf.cron_expression for wf in db.query(Workflow).filter(Workflow.repo_id == 1)}
+    assert crons == {".github/workflows/nightly.yml": "0 3 * * *", ".github/workflows/ci.yml": None}
+
+
+async def test_known_file_shas_are_scoped_to_the_installations(db, fake_github):
+    fake_github.add_installation(1, "acme")
+    fake_github.add_installation(2, "beta")
+    fake_github.add_repo(1, "api", {"nightly.yml": NIGHTLY})
+    fake_github.add_repo(2, "web", {"ci.yml": CI})
+
+    async with fake_github.client() as client:
+        await discover_and_sync_workflows_async(db, [1, 2], client=client)
+
+    known = github_sync._known_file_shas(db, [2])
+    assert [list(paths) for paths in known.values()] == [[".github/workflows/ci.yml"]]
+
+
+async def test_crons_survive_cron_cache_eviction(db, fake_github, monkeypatch):
+    monkeypatch.setattr(github_sync, "CRON_CACHE_MAX_ENTRIES", 2)
+    fake_github.add_installation(1, "acme")
+    fake_github.add_repo(1, "api", {
+        f"nightly-{hour}.yml": NIGHTLY.replace("0 3", f"0 {hour}") for hour in range(6)
+    })
+
+    async with fake_github.client() as client:
+        await discover_and_sync_workflows_async(db, [1], client=client)
+
+    crons = {wf.path: wf.cron_expression for wf in db.query(Workflow)}
+    assert crons == {f".github/workflows/nightly-{hour}.yml": f"0 {hour} * * *" for hour in range(6)}
+    assert len(github_sync._cron_by_sha) == 2
+
+
+async def test_prefetched_files_are_parsed_in_parallel(db, fake_github, monkeypatch):
+    busy, most_busy = [0], [0]
+    lock = threading.Lock()
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            def run():
+                with lock:
+                    busy[0] += 1
+                    most_busy[0] = max(most_busy[0], busy[0])
+                time.sleep(0.02)
+                with lock:
+                    busy[0] -= 1
+                return fn(*args)
+            return super().submit(run)
+
+    pool = RecordingPool(max_workers=4)
+    monkeypatch.setattr(github_sync, "get_parse_pool", lambda: pool)
+    fake_github.add_installation(1, "acme")
+    for i in range(8):
+        fake_github.add_repo(1, f"repo-{i}", {"nightly.yml": NIGHTLY.replace("0 3", f"{i} 3")})
+
+    try:
+        async with fake_github.client() as client:
+            stats = await discover_and_sync_workflows_async(db, [1], client=client)
+    finally:
+        pool.shutdown()
+
+    assert stats["files_fetched"] == 8
+    assert most_busy[0] > 1
+
+
+async def test_discover_reports_token_failures(db, fake_github, monkeypatch):
+    def failing_token(installation_id):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(github_sync, "get_installation_token", failing_token)
+    fake_github.add_installation(1, "acme")
+
+    async with fake_github.client() as client:
+        stats = await discover_and_sync_workflows_async(db, [1], client=client)
+
+    assert stats["installations_processed"] == 0
+    assert stats["errors"] == ["Failed to get token for inst 1: boom"]
+
+
+async def test_resync_of_unchanged_org_costs_one_call_per_repo(db, fake_github):
+    fake_github.add_installation(1, "acme")
+    for i in range(20):
+        fake_github.add_repo(1, f"repo-{i}", {"nightly.yml": NIGHTLY, "ci.yml": CI})
+
+    async with fake_github.client() as client:
+        await discover_and_sync_workflows_async(db, [1], client=client)
+        fake_github.reset_counts()
+        stats = await sync_cron_expressions_async(db, client=client)
+
+    assert stats["repos_scanned"] == 20
+    assert stats["files_fetched"] == 0
+    assert stats["workflows_updated"] == 0
+    assert fake_github.request_count == 20
+    assert all("/git/trees/" in path for path in fake_github.request_paths)
+
+
+async def test_resync_fetches_only_changed_files(db, fake_github):
+    fake_github.add_installation(1, "acme")
+    fake_github.add_repo(1, "api", {"nightly.yml": NIGHTLY, "ci.yml": CI})
+    fake_github.add_repo(1, "web", {"nightly.yml": NIGHTLY})
+
+    async with fake_github.client() as client:
+        stats = await discover_and_sync_workflows_async(db, [1], client=client)
+        # Identical nightly.yml in both repos is parsed once
+        assert stats["files_fetched"] == 2
+
+        fake_github.set_file("acme/api", ".github/workflows/nightly.yml", NIGHTLY.replace("0 3", "30 4"))
+        stats = await sync_cron_expressions_async(db, client=client)
+
+    assert stats["files_fetched"] == 1
+    assert stats["workflows_updated"] == 1
+    crons = {
+        (wf.repository.name, wf.path): wf.cron_expression
+        for wf in db.query(Workflow).all()
+    }
+    assert crons[("api", ".github/workflows/nightly.yml")] == "30 4 * * *"
+    assert crons[("web", ".github/workflows/nightly.yml")] == "0 3 * * *"
+
+
+async def test_discover_stores_every_schedule(db, fake_github):
+    twice_daily = NIGHTLY.replace('- cron: "0 3 * * *"', '- cron: "0 3 * * *"\n    - cron: "0 15 * * *"')
+    fake_github.add_installation(1, "acme")
+    fake_github.add_repo(1, "api", {"nightly.yml": twice_daily})
+
+    async with fake_github.client() as client:
+        await discover_and_sync_workflows_async(db, [1], client=client)
+
+    wf = db.query(Workflow).one()
+    assert wf.cron_expression == "0 3 * * *"
+    assert wf.schedules == ["0 3 * * *", "0 15 * * *"]
+
+
+async def test_rediscovery_updates_in_place_and_deactivates_removed_workflows(db, fake_github):
+    fake_github.add_installation(1, "acme")
+    fake_github.add_repo(1, "api", {"nightly.yml": NIGHTLY, "ci.yml": CI, "lint.yml": CI})
+
+    async with fake_github.client() as client:
+        await discover_and_sync_workflows_async(db, [1], client=client)
+        fake_github.remove_file("acme/api", ".github/workflows/ci.yml")
+        fake_github.set_file("acme/api", ".github/workflows/nightly.yml", NIGHTLY.replace("0 3", "45 2"))
+        stats = await discover_and_sync_workflows_async(db, [1], client=client)
+
+    assert stats["errors"] == []
+    assert db.query(Repository).count() == 1
+    workflows = {wf.path: wf for wf in db.query(Workflow).all()}
+    assert len(workflows) == 3
+    assert workflows[".github/workflows/ci.yml"].active is False
+    assert workflows[".github/workflows/lint.yml"].active is True
+    assert workflows[".github/workflows/nightly.yml"].cron_expression == "45 2 * * *"
+
+
+async def test_first_sync_fetches_workflow_files_in_graphql_batches(db, fake_github):
+    fake_github.add_installation(1, "acme")
+    for i in range(150):
+        fake_github.add_repo(1, f"repo-{i}", {"nightly.yml": NIGHTLY.replace("0 3", f"{i % 60} 3"), "ci.yml": CI})
+
+    async with fake_github.client() as client:
+        stats = await discover_and_sync_workflows_async(db, [1], client=client)
+
+    assert stats["errors"] == []
+    assert stats["files_fetched"] == 61  # 60 distinct nightly files + ci.yml
+    paths = fake_github.request_paths
+    assert paths.count("/graphql") == 3  # 50 repos per query
+    assert not any("/git/" in path for path in paths)
+    # 2 repo pages + 3 GraphQL + one workflow listing per repo
+    assert len(paths) == 155
+    wf = db.query(Workflow).filter(Workflow.path == ".github/workflows/nightly.yml").first()
+    assert wf.cron_expression.endswith(" 3 * * *")
+
+
+def test_graphql_repos_that_errored_are_left_to_rest():
+    repos = [
+        {"id": 1, "name": "api", "owner": {"login": "acme"}},
+        {"id": 2, "name": "gone", "owner": {"login": "acme"}},
+        {"id": 3, "name": "empty", "owner": {"login": "acme"}},
+    ]
+    query, variables = workflow_files_query(repos)
+    assert "r2: repository(owner: $o2, name: $n2)" in query
+    assert variables["n1"] == "gone"
+
+    data = {
+        "r0": {"object": {"entries": [
+            {"name": "ci.yml", "type": "blob", "oid": "a1", "object": {"text": CI, "isBinary": False}},
+            {"name": "big.yml", "type": "blob", "oid": "b2", "object": {"text": None, "isBinary": False}},
+            {"name": "README.md", "type": "blob", "oid": "c3", "object": {"text": "", "isBinary": False}},
+        ]}},
+        "r1": None,
+        "r2": {"object": None},
+    }
+    assert parse_workflow_files(repos, data) == {
+        1: {".github/workflows/ci.yml": ("a1", CI), ".github/workflows/big.yml": ("b2", None)},
+        3: {},
+    }
+
+
+def test_sync_mints_tokens_and_survives_injected_failures(db, fake_github_api):
+    fake_github_api.add_installation(1, "acme")
+    for i in range(5):
+        fake_github_api.add_repo(1, f"repo-{i}", {"nightly.yml": NIGHTLY})
+    fake_github_api.inject_failure(r"/repos/acme/repo-3/actions/workflows", status=502)
+
+    stats = github_sync.discover_and_sync_workflows(db, [1])
+
+    assert fake_github_api.tokens_minted == 1
+    assert stats["errors"] == ["Failed to fetch workflows for acme/repo-3: 502"]
+    assert db.query(Workflow).count() == 4
+
+
+async def test_exhausted_rate_limit_is_reported(fake_github_api, monkeypatch):
+    monkeypatch.setattr(github_client.settings, "GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS", 60)
+    fake_github_api.rate_limit = 3
+    fake_github_api.add_installation(1, "acme")
+
+    async with fake_github_api.client() as client:
+        for _ in range(3):
+            resp = await client.get("/installation/repositories", token="inst-1", budget_key="installation:1")
+            assert resp.status_code == 200
+        assert client.budget("installation:1").remaining == 0
+        with pytest.raises(GitHubRateLimitError):
+            await client.get("/installation/repositories", token="inst-1", budget_key="installation:1", background=True)
@@ -0,0 +1,109 @@
+import pytest
+
+from app.models.workflow import Workflow
+from app.services import github_sync
+
+NIGHTLY = """
+on:
+  schedule:
+    - cron: "0 3 * * *"
+"""
+
+
+@pytest.fixture
+def fake_github(fake_github_api):
+    fake = fake_github_api
+    fake.add_installation(1, "acme")
+    fake.add_repo(1, "api", {"nightly.yml": NIGHTLY, "ci.yml": "on: [push]\n"})
+    return fake
+
+
+def push_payload(fake, commits, ref="refs/heads/main"):
+    repo = fake.repos["acme/api"]
+    return {
+        "ref": ref,
+        "after": "abc123",
+        "commits": commits,
+        "repository": {"id": repo["id"], "full_name": repo["full_name"], "default_branch": "main"},
+        "installation": {"id": 1},
+    }
+
+
+def test_push_resyncs_only_touched_workflow_files(client, db, fake_github):
+    github_sync.discover_and_sync_workflows(db, [1])
+
+    fake_github.set_file("acme/api", ".github/workflows/nightly.yml", NIGHTLY.replace("0 3", "15 6"))
+    fake_github.set_file("acme/api", ".github/workflows/weekly.yml", NIGHTLY.replace("0 3 * * *", "0 0 * * 0"))
+    fake_github.remove_file("acme/api", ".github/workflows/ci.yml")
+    fake_github.reset_counts()
+
+    response = client.post(
+        "/api/github/webhook",
+        headers={"X-GitHub-Event": "push"},
+        json=push_payload(fake_github, [{
+            "added": [".github/workflows/weekly.yml"],
+            "modified": [".github/workflows/nightly.yml", "README.md"],
+            "removed": [".github/workflows/ci.yml"],
+        }]),
+    )
+
+    assert response.json() == {"status": "ok", "workflows_updated": 3}
+    workflows = {wf.path: wf for wf in db.query(Workflow).all()}
+    assert workflows[".github/workflows/nightly.yml"].cron_expression == "15 6 * * *"
+    assert workflows[".github/workflows/weekly.yml"].cron_expression == "0 0 * * 0"
+    assert workflows[".github/workflows/ci.yml"].active is False
+
+    # one tree listing, one workflow listing for the new file, one blob per changed file
+    paths = fake_github.request_paths
+    assert len(paths) == 4
+    assert sum("/git/trees/" in p for p in paths) == 1
+    assert sum("/actions/workflows" in p for p in paths) == 1
+    assert sum("/git/blobs/" in p for p in paths) == 2
+
+
+def test_workflow_file_deleted_then_re_added_is_active_again(client, db, fake_github):
+    github_sync.discover_and_sync_workflows(db, [1])
+    nightly = ".github/workflows/nightly.yml"
+
+    def push(change):
+        return client.post(
+            "/api/github/webhook",
+            headers={"X-GitHub-Event": "push"},
+            json=push_payload(fake_github, [{"added": [], "modified": [], "removed": [], **change}]),
+        )
+
+    fake_github.remove_file("acme/api", nightly)
+    assert push({"removed": [nightly]}).status_code == 200
+    db.expire_all()
+    assert db.query(Workflow).filter_by(path=nightly).one().active is False
+
+    fake_github.set_file("acme/api", nightly, NIGHTLY)
+    assert push({"added": [nightly]}).status_code == 200
+    db.expire_all()
+    wf = db.query(Workflow).filter_by(path=nightly).one()
+    assert wf.active is True
+    assert wf.cron_expression == "0 3 * * *"
+
+
+def test_push_without_workflow_changes_is_ignored(client, db, fake_github):
+    github_sync.discover_and_sync_workflows(db, [1])
+    fake_github.reset_counts()
+
+    response = client.post(
+        "/api/github/webhook",
+        headers={"X-GitHub-Event": "push"},
+        json=push_payload(fake_github, [{"added": [], "modified": ["src/app.py"], "removed": []}]),
+    )
+
+    assert response.json() == {"status": "ignored", "reason": "no_workflow_changes"}
+    assert fake_github.request_count == 0
+
+
+def test_push_to_other_branch_is_ignored(client, db, fake_github):
+    response = client.post(
+        "/api/github/webhook",
+        headers={"X-GitHub-Event": "push"},
+        json=push_payload(fake_github, [{"modified": [".github/workflows/nightly.yml"]}], ref="refs/heads/feature"),
+    )
+
+    assert response.json() == {"status": "ignored", "reason": "not_default_branch"}
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.models.alert import AlertSeverity, AlertType
+from app.models.workflow import Organization, Repository, Workflow
+from app.services.alert_logger import create_alert
+from app.services.live_events import event_stream, hub, queue_event
+from app.services.workflow_runs import upsert_workflow_runs
+
+
+def make_workflow(db):
+    org = Organization(github_org_id=1, installation_id=7, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=10, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.flush()
+    wf = Workflow(github_workflow_id=100, repo_id=repo.id, name="Nightly", path="n.yml", cron_expression="0 3 * * *")
+    db.add(wf)
+    db.commit()
+    return org, wf
+
+
+def drain(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait())
+    return messages
+
+
+def test_fan_out_to_installation_subscribers():
+    async def scenario():
+        a, b, other = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+        hub.publish(1, "status", {"workflow_id": 5})
+        result = [drain(s) for s in (a, b, other)]
+        for s in (a, b, other):
+            hub.unsubscribe(s)
+        return result
+
+    a, b, other = asyncio.run(scenario())
+    assert [m["data"] for m in a] == [{"workflow_id": 5}]
+    assert a == b
+    assert other == []
+
+
+def test_slow_consumer_dropped_with_reset():
+    async def scenario():
+        before = hub.subscriber_count()
+        subscriber = hub.subscribe(1, buffer_size=2)
+        for i in range(3):
+            hub.publish(1, "status", {"n": i})
+        dropped_count = hub.subscriber_count()
+
+        stream = event_stream(subscriber, heartbeat_seconds=1)
+        chunks = [chunk async for chunk in stream]
+        return before, dropped_count, subscriber.dropped, chunks
+
+    before, dropped_count, dropped, chunks = asyncio.run(scenario())
+    assert dropped
+    assert dropped_count == before
+    assert chunks[0].startswith("retry:")
+    assert chunks[-1].startswith("id: reset\nevent: reset\n")
+
+
+def test_events_published_on_commit_only(db):
+    async def scenario():
+        subscriber = hub.subscribe(3)
+        queue_event(db, 3, "status", {"n": 1})
+        db.rollback()
+        queue_event(db, 3, "status", {"n": 2})
+        after_rollback = drain(subscriber)
+        db.commit()
+        after_commit = drain(subscriber)
+        hub.unsubscribe(subscriber)
+        return after_rollback, after_commit
+
+    after_rollback, after_commit = asyncio.run(scenario())
+    assert after_rollback == []
+    assert [m["data"] for m in after_commit] == [{"n": 2}]
+
+
+def test_status_transitions_and_alerts_streamed(db):
+    org, wf = make_workflow(db)
+    now = datetime.now(timezone.utc)
+
+    async def scenario():
+        subscriber = hub.subscribe(org.installation_id)
+        for run_id, conclusion in ((1, "success"), (2, "success"), (3, "failure")):
+            upsert_workflow_runs(db, [{
+                "github_run_id": run_id,
+                "workflow_id": wf.id,
+                "status": "completed",
+                "conclusion": conclusion,
+                "started_at": now - timedelta(hours=4 - run_id),
+                "completed_at": now - timedelta(hours=4 - run_id) + timedelta(minutes=5),
+                "duration_ms": None,
+                "raw_payload": None,
+            }])
+            db.commit()
+        alert = create_alert(db, org.id, AlertType.STUCK, "Nightly stuck", wf.id, AlertSeverity.CRITICAL)
+        messages = drain(subscriber)
+        hub.unsubscribe(subscriber)
+        return alert, messages
+
+    alert, messages = asyncio.run(scenario())
+    # Successes keep a workflow HEALTHY, which isn't a transition
+    assert [(m["event"], m["data"].get("status")) for m in messages] == [
+        ("status", "AT_RISK"),
+        ("alert", None),
+    ]
+    assert messages[0]["data"]["previous_status"] == "HEALTHY"
+    assert messages[1]["data"]["id"] == alert.id
+    assert messages[1]["data"]["alert_type"] == AlertType.STUCK.value
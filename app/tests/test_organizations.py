@@ -0,0 +1,54 @@
+import pytest
+
+from app.models.workflow import Organization
+from app.services import organizations
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def acme(db):
+    org = Organization(github_org_id=1, installation_id=42, name="acme", alert_threshold_minutes=15)
+    db.add(org)
+    db.commit()
+    return org
+
+
+def test_organization_is_resolved_once_across_requests(client, acme, async_queries):
+    for _ in range(3):
+        assert client.get("/api/settings/42", headers=AUTH).json()["alert_threshold_minutes"] == 15
+    client.get("/api/alerts/", params={"installation_id": 42}, headers=AUTH)
+    client.get("/api/analytics/success-rate", params={"installation_id": 42}, headers=AUTH)
+
+    assert len([q for q in async_queries if "FROM organizations" in q]) == 1
+    assert organizations.stats["hits"] >= 4
+
+
+def test_settings_update_invalidates_cached_organization(client, acme):
+    assert client.get("/api/settings/42", headers=AUTH).json()["alert_threshold_minutes"] == 15
+
+    client.patch("/api/settings/42", json={"alert_threshold_minutes": 30}, headers=AUTH)
+
+    assert client.get("/api/settings/42", headers=AUTH).json()["alert_threshold_minutes"] == 30
+
+
+def test_installation_deleted_webhook_invalidates_cached_organization(client, acme):
+    assert client.get("/api/settings/42", headers=AUTH).status_code == 200
+
+    client.post(
+        "/api/github/webhook",
+        json={"action": "deleted", "installation": {"id": 42, "account": {"id": 1, "login": "acme"}}},
+        headers={"X-GitHub-Event": "installation"},
+    )
+
+    assert client.get("/api/settings/42", headers=AUTH).status_code == 404
+
+
+def test_missing_organization_is_not_cached(client, db, fake_github_api):
+    fake_github_api.add_installation(42, "acme")
+    assert client.get("/api/settings/42", headers=AUTH).status_code == 404
+
+    db.add(Organization(github_org_id=1, installation_id=42, name="acme"))
+    db.commit()
+
+    assert client.get("/api/settings/42", headers=AUTH).status_code == 200
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from app.models.alert import Alert, AlertSeverity, AlertType
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+def seed(db):
+    org = Organization(github_org_id=1, installation_id=5, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=10, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.flush()
+    workflows = [
+        Workflow(github_workflow_id=100 + i, repo_id=repo.id, name=f"wf-{i}", path=f"{i}.yml") for i in range(5)
+    ]
+    db.add_all(workflows)
+    db.flush()
+    return org, workflows
+
+
+def walk(client, url, limit, params=None, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page_params = {**(params or {}), "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=page_params, **kwargs)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_workflow_runs_pages_cover_ties_in_order(client, db):
+    _, workflows = seed(db)
+    base = datetime(2026, 1, 1)
+    # Pairs of runs sharing a start time, so ordering falls back to id
+    db.add_all([
+        WorkflowRun(github_run_id=i, workflow_id=workflows[0].id, status="completed", started_at=base + timedelta(hours=i // 2))
+        for i in range(7)
+    ])
+    db.commit()
+
+    pages = walk(client, f"/api/workflows/{workflows[0].id}/runs", limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    run_ids = [run["github_run_id"] for page in pages for run in page]
+    assert run_ids == [6, 5, 4, 3, 2, 1, 0]
+
+
+def test_workflows_listing_is_paged_by_id(client, db):
+    _, workflows = seed(db)
+    db.commit()
+
+    pages = walk(client, "/api/workflows/", limit=2, headers=AUTH)
+
+    assert [[wf["name"] for wf in page] for page in pages] == [["wf-0", "wf-1"], ["wf-2", "wf-3"], ["wf-4"]]
+    assert pages[0][0]["repo_full_name"] == "acme/api"
+
+
+def test_alerts_pages_with_filters(client, db):
+    org, workflows = seed(db)
+    detected = datetime(2026, 1, 1)
+    db.add_all([
+        Alert(
+            organization_id=org.id,
+            workflow_id=workflows[0].id,
+            alert_type=AlertType.MISSED if i % 2 else AlertType.STUCK,
+            severity=AlertSeverity.ERROR,
+            message=f"alert {i}",
+            detected_at=detected + timedelta(minutes=i),
+        )
+        for i in range(6)
+    ])
+    db.commit()
+
+    pages = walk(client, "/api/alerts/", limit=2, headers=AUTH, params={"installation_id": 5, "alert_type": "missed"})
+
+    messages = [alert["message"] for page in pages for alert in page]
+    assert messages == ["alert 5", "alert 3", "alert 1"]
+    assert pages[0][0]["workflow_name"] == "wf-0"
+    assert pages[0][0]["repository_name"] == "acme/api"
+
+
+def test_invalid_cursor_is_rejected(client, db):
+    _, workflows = seed(db)
+    db.commit()
+
+    response = client.get(f"/api/workflows/{workflows[0].id}/runs", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
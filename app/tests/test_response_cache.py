@@ -0,0 +1,112 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.models.workflow import Organization, Repository, Workflow
+from app.services import response_cache
+from app.services.response_cache import bump_data_version, cached_response
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear_response_cache()
+    yield
+    response_cache.clear_response_cache()
+
+
+def counting(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": value, "calls": len(calls)}
+
+    return compute, calls
+
+
+def test_cached_until_installation_data_changes():
+    compute, calls = counting("a")
+
+    async def scenario():
+        first = await cached_response("ep", 1, {"q": None}, compute)
+        second = await cached_response("ep", 1, {"q": None}, compute)
+        bump_data_version(2)  # another installation
+        third = await cached_response("ep", 1, {"q": None}, compute)
+        bump_data_version(1)
+        fourth = await cached_response("ep", 1, {"q": None}, compute)
+        return [json.loads(r.body)["calls"] for r in (first, second, third, fourth)]
+
+    assert asyncio.run(scenario()) == [1, 1, 1, 2]
+    assert response_cache.stats["hits"] == 2
+    assert response_cache.stats["misses"] == 2
+
+
+def test_unscoped_entries_invalidated_by_any_installation():
+    compute, calls = counting("a")
+
+    async def scenario():
+        await cached_response("ep", None, {}, compute)
+        bump_data_version(7)
+        await cached_response("ep", None, {}, compute)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_computation():
+    def slow():
+        time.sleep(0.05)
+        return {"ok": True}
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return slow()
+
+    async def scenario():
+        return await asyncio.gather(*(cached_response("ep", 1, {}, compute) for _ in range(10)))
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert {r.body for r in responses} == {b'{"ok":true}'}
+    assert response_cache.stats["coalesced"] == 9
+
+
+def test_failures_are_not_cached():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        return {"ok": True}
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cached_response("ep", 1, {}, flaky)
+        return await cached_response("ep", 1, {}, flaky)
+
+    assert json.loads(asyncio.run(scenario()).body) == {"ok": True}
+
+
+def test_summary_refreshes_after_ingest(client, db):
+    org = Organization(github_org_id=1, installation_id=5, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=10, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.commit()
+
+    assert client.get("/api/summary", params={"installation_id": 5}).json()["total_workflows"] == 0
+
+    db.add(Workflow(github_workflow_id=100, repo_id=repo.id, name="Nightly", path="n.yml"))
+    db.commit()
+    # Still the cached response until the installation's data version moves
+    assert client.get("/api/summary", params={"installation_id": 5}).json()["total_workflows"] == 0
+
+    bump_data_version(5)
+    assert client.get("/api/summary", params={"installation_id": 5}).json()["total_workflows"] == 1
+    assert client.get("/api/debug/cache-stats").json()["hits"] == 1
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.workflow import Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+from app.services.github_sync import discover_and_sync_workflows_async
+from app.services.run_reconcile import reconcile_workflow_runs_async
+
+NIGHTLY = """
+on:
+  schedule:
+    - cron: "0 3 * * *"
+"""
+NIGHTLY_PATH = ".github/workflows/nightly.yml"
+
+
+@pytest.fixture
+def fake_github(fake_github_api):
+    fake = fake_github_api
+    fake.add_installation(1, "acme")
+    fake.add_repo(1, "api", {"nightly.yml": NIGHTLY})
+    return fake
+
+
+async def test_backfill_pulls_recent_history_and_sets_cursor(db, fake_github):
+    now = datetime.utcnow()
+    for day in range(1, 151):
+        fake_github.add_run("acme/api", NIGHTLY_PATH, now - timedelta(hours=2 * day))
+    fake_github.add_run("acme/api", NIGHTLY_PATH, now - timedelta(days=30))  # outside the window
+
+    async with fake_github.client() as client:
+        await discover_and_sync_workflows_async(db, [1], client=client)
+        stats = await reconcile_workflow_runs_async(db, client=client, backfill_days=14)
+
+    assert stats["errors"] == []
+    assert stats["runs_upserted"] == 150
+    assert db.query(WorkflowRun).count() == 150
+    wf = db.query(Workflow).one()
+    assert abs(wf.last_run_at - (now - timedelta(hours=2) + timedelta(minutes=5))) < timedelta(seconds=1)
+    assert db.query(Repository).one().runs_cursor >= now.replace(microsecond=0)
+
+
+async def test_reconcile_fills_gaps_without_duplicating_webhook_runs(client, db, fake_github):
+    now = datetime.utcnow()
+    async with fake_github.client() as gh:
+        await discover_and_sync_workflows_async(db, [1], client=gh)
+        await reconcile_workflow_runs_async(db, client=gh)
+
+        # one run arrives by webhook, one is missed, one is still going
+        delivered = fake_github.add_run("acme/api", NIGHTLY_PATH, now)
+        fake_github.add_run("acme/api", NIGHTLY_PATH, now)
+        running = fake_github.add_run("acme/api", NIGHTLY_PATH, now, status="in_progress")
+        repo = fake_github.repos["acme/api"]
+        client.post(
+            "/api/github/webhook",
+            headers={"X-GitHub-Event": "workflow_run"},
+            json={
+                "workflow_run": delivered,
+                "repository": {k: repo[k] for k in ("id", "name", "full_name", "owner")},
+                "installation": {"id": 1},
+            },
+        )
+        assert db.query(WorkflowRun).count() == 1
+
+        stats = await reconcile_workflow_runs_async(db, client=gh)
+        assert stats["runs_upserted"] == 3
+        assert db.query(WorkflowRun).count() == 3
+        # the unfinished run holds the cursor, so it's picked up again once it completes
+        db.expire_all()
+        assert db.query(Repository).one().runs_cursor <= now
+
+        running["status"], running["conclusion"] = "completed", "failure"
+        await reconcile_workflow_runs_async(db, client=gh)
+
+    db.expire_all()
+    stored = db.query(WorkflowRun).filter(WorkflowRun.github_run_id == running["id"]).one()
+    assert (stored.status, stored.conclusion) == ("completed", "failure")
+    assert db.query(WorkflowRun).count() == 3
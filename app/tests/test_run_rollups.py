@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.core.quantile_sketch import RELATIVE_ACCURACY, QuantileSketch
+from app.models.workflow_run_daily import WorkflowRunDaily
+from app.services.run_rollups import rebuild_run_rollups
+from app.services.workflow_runs import upsert_workflow_runs
+from app.tests.test_workflow_status import make_workflow
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+def run_row(wf, run_id, conclusion, started_at, duration_ms=60_000, status="completed"):
+    return {
+        "github_run_id": run_id,
+        "workflow_id": wf.id,
+        "status": status,
+        "conclusion": conclusion,
+        "started_at": started_at,
+        "completed_at": started_at + timedelta(milliseconds=duration_ms) if status == "completed" else None,
+        "duration_ms": duration_ms,
+        "raw_payload": None,
+    }
+
+
+def rollups(db):
+    db.expire_all()
+    return {
+        (row.workflow_id, row.day): (
+            row.success, row.failure, row.total, row.duration_count,
+            row.sum_duration_ms, row.min_duration_ms, row.max_duration_ms, row.duration_sketch,
+        )
+        for row in db.query(WorkflowRunDaily)
+    }
+
+
+def test_incremental_rollups_match_rebuild(db):
+    wf = make_workflow(db)
+    day = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=2)
+
+    upsert_workflow_runs(db, [
+        run_row(wf, 1, "success", day, 60_000),
+        run_row(wf, 2, "failure", day + timedelta(hours=1), 120_000),
+        run_row(wf, 3, None, day + timedelta(days=1), 5_000, status="in_progress"),
+        run_row(wf, 4, "missed", day + timedelta(days=1)),
+    ])
+    db.commit()
+    assert rollups(db)[(wf.id, day.date())][:3] == (1, 1, 2)
+    assert (wf.id, (day + timedelta(days=1)).date()) not in rollups(db)
+
+    # Completes; re-seen unchanged; re-run with a new conclusion
+    upsert_workflow_runs(db, [run_row(wf, 3, "success", day + timedelta(days=1), 90_000)])
+    upsert_workflow_runs(db, [run_row(wf, 1, "success", day, 60_000)])
+    upsert_workflow_runs(db, [run_row(wf, 2, "success", day + timedelta(hours=1), 30_000)])
+    db.commit()
+    incremental = rollups(db)
+
+    assert incremental[(wf.id, day.date())][:7] == (2, 0, 2, 2, 90_000, 30_000, 60_000)
+    assert incremental[(wf.id, (day + timedelta(days=1)).date())][:3] == (1, 0, 1)
+    assert rebuild_run_rollups(db) == 2
+    assert rollups(db) == incremental
+
+
+def test_analytics_read_rollups(client, db):
+    wf = make_workflow(db)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=30, second=0, microsecond=0)
+    upsert_workflow_runs(db, [
+        run_row(wf, i, "success" if i % 4 else "failure", today - timedelta(days=i % 2), 1000 * i)
+        for i in range(1, 101)
+    ])
+    db.commit()
+
+    rates = client.get("/api/analytics/success-rate", params={"installation_id": 1}, headers=AUTH).json()
+    trends = client.get("/api/analytics/runtime-trends", params={"installation_id": 1}, headers=AUTH).json()
+    stats = client.get("/api/analytics/duration-stats", params={"installation_id": 1}, headers=AUTH).json()
+
+    assert [(r["success"], r["failure"], r["total"]) for r in rates] == [(50, 0, 50), (25, 25, 50)]
+    assert [t["run_count"] for t in trends] == [50, 50]
+    assert [t["avg_duration_seconds"] for t in trends] == [50.0, 51.0]
+    assert stats["total_runs"] == 100
+    assert (stats["min_duration_ms"], stats["max_duration_ms"], stats["avg_duration_ms"]) == (1000, 100_000, 50_500)
+    for name, exact in (("p50", 50_000), ("p90", 90_000), ("p95", 95_000), ("p99", 99_000)):
+        assert abs(stats[f"{name}_duration_ms"] - exact) <= exact * RELATIVE_ACCURACY
+
+
+def test_merged_sketches_are_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(11, 1) for _ in range(5000)]
+    merged = QuantileSketch()
+    for start in range(0, len(values), 500):
+        day = QuantileSketch()
+        for value in values[start:start + 500]:
+            day.add(value)
+        merged.merge(QuantileSketch.decode(day.encode()))
+
+    values.sort()
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(merged.quantile(q) - exact) <= exact * RELATIVE_ACCURACY
+    assert len(merged.buckets) < 500
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from app.models.workflow import Workflow
+from app.services import sync_jobs
+from app.tests.conftest import TestingSessionLocal
+
+NIGHTLY = """
+on:
+  schedule:
+    - cron: "0 3 * * *"
+"""
+
+
+@pytest.fixture
+def fake_github(fake_github_api, monkeypatch):
+    fake = fake_github_api
+    fake.latency = 0.02
+    monkeypatch.setattr(sync_jobs, "SessionLocal", TestingSessionLocal)
+    sync_jobs._jobs.clear()
+    sync_jobs._active_by_installation.clear()
+
+    fake.add_installation(1, "acme")
+    for i in range(20):
+        fake.add_repo(1, f"repo-{i}", {"nightly.yml": NIGHTLY})
+    return fake
+
+
+def wait_for_job(client, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/github/sync-jobs/{job_id}", headers={"Authorization": "Bearer user"}).json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"sync job {job_id} did not finish")
+
+
+def test_sync_runs_in_background_and_reports_progress(client, db, fake_github):
+    headers = {"Authorization": "Bearer user"}
+
+    first = client.post("/api/github/sync-workflows", headers=headers)
+    second = client.post("/api/github/sync-workflows", headers=headers)
+
+    assert first.status_code == 202
+    [job] = first.json()["jobs"]
+    assert job["installation_id"] == 1
+    assert job["status"] in ("queued", "running")
+    # a second trigger while the first is in flight joins the same job
+    assert [j["id"] for j in second.json()["jobs"]] == [job["id"]]
+
+    finished = wait_for_job(client, job["id"])
+    assert finished["status"] == "completed"
+    assert finished["progress"]["repos_found"] == 20
+    assert finished["progress"]["repos_scanned"] == 20
+    assert finished["progress"]["workflows_found"] == 20
+    assert finished["finished_at"] is not None
+
+    db.expire_all()
+    assert db.query(Workflow).filter(Workflow.cron_expression == "0 3 * * *").count() == 20
+
+    # once finished, a new trigger starts a fresh job
+    third = client.post("/api/github/sync-workflows", headers=headers)
+    assert third.json()["jobs"][0]["id"] != job["id"]
+    wait_for_job(client, third.json()["jobs"][0]["id"])
+
+
+def test_unknown_sync_job_is_404(client):
+    response = client.get("/api/github/sync-jobs/nope", headers={"Authorization": "Bearer user"})
+    assert response.status_code == 404
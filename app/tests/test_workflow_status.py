@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app.models.alert import Alert, AlertSeverity, AlertType
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+from app.models.workflow_status import WorkflowState
+from app.services.workflow_runs import upsert_workflow_runs
+from app.services.workflow_status import (
+    rebuild_workflow_status,
+    record_miss,
+    record_warning,
+    refresh_expired_workflow_status,
+)
+
+
+def make_workflow(db):
+    org = Organization(github_org_id=1, installation_id=1, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=10, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.flush()
+    wf = Workflow(github_workflow_id=100, repo_id=repo.id, name="Nightly", path="n.yml", cron_expression="0 3 * * *")
+    db.add(wf)
+    db.commit()
+    return wf
+
+
+def run_row(wf, run_id, conclusion, started_at, status="completed"):
+    return {
+        "github_run_id": run_id,
+        "workflow_id": wf.id,
+        "status": status,
+        "conclusion": conclusion,
+        "started_at": started_at,
+        "completed_at": started_at + timedelta(minutes=5) if status == "completed" else None,
+        "duration_ms": None,
+        "raw_payload": None,
+    }
+
+
+def state_of(db, wf):
+    db.expire_all()
+    return db.get(WorkflowState, wf.id)
+
+
+def test_runs_update_last_run_and_status(db):
+    wf = make_workflow(db)
+    now = datetime.now(timezone.utc)
+
+    upsert_workflow_runs(db, [run_row(wf, 1, "success", now - timedelta(hours=2))])
+    db.commit()
+    assert state_of(db, wf).status == "HEALTHY"
+
+    upsert_workflow_runs(db, [run_row(wf, 2, "failure", now - timedelta(hours=1))])
+    db.commit()
+    state = state_of(db, wf)
+    assert state.status == "AT_RISK"
+    assert state.last_conclusion == "failure"
+    assert state.last_success_at.replace(tzinfo=timezone.utc) > now - timedelta(hours=2)
+
+    # An update of an older run doesn't replace the latest conclusion
+    upsert_workflow_runs(db, [run_row(wf, 1, "success", now - timedelta(hours=2))])
+    db.commit()
+    assert state_of(db, wf).last_conclusion == "failure"
+
+
+def test_last_run_at_is_bound_as_naive_utc(db):
+    wf = make_workflow(db)
+    started_at = datetime(2026, 3, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    bound = []
+
+    def record(conn, clauseelement, multiparams, params, execution_options):
+        # Before type processing, i.e. the values a driver like asyncpg encodes
+        if str(clauseelement).startswith("UPDATE workflows"):
+            bound.extend(values["run_at"] for values in multiparams or [params])
+
+    event.listen(db.get_bind(), "before_execute", record)
+    try:
+        upsert_workflow_runs(db, [run_row(wf, 1, "success", started_at)])
+    finally:
+        event.remove(db.get_bind(), "before_execute", record)
+    db.commit()
+
+    assert bound == [datetime(2026, 3, 1, 10, 5)]
+    assert bound[0].tzinfo is None
+    db.expire_all()
+    assert db.get(Workflow, wf.id).last_run_at == datetime(2026, 3, 1, 10, 5)
+
+
+def test_miss_counted_once_per_expected_time(db):
+    wf = make_workflow(db)
+    now = datetime.now(timezone.utc)
+    expected = now - timedelta(minutes=30)
+
+    record_miss(db, wf.id, expected, now)
+    record_miss(db, wf.id, expected, now + timedelta(minutes=1))
+    record_miss(db, wf.id, expected - timedelta(hours=1), now)
+    db.commit()
+
+    state = state_of(db, wf)
+    assert state.status == "MISSED"
+    assert state.missed_count_24h == 2
+    assert state.last_missed_at.replace(tzinfo=timezone.utc) == expected
+
+
+def test_expired_window_is_refreshed(db):
+    wf = make_workflow(db)
+    now = datetime.now(timezone.utc)
+    record_miss(db, wf.id, now - timedelta(hours=23), now)
+    record_warning(db, wf.id, now - timedelta(hours=2))
+    db.commit()
+
+    assert refresh_expired_workflow_status(db, now) == 0
+    assert refresh_expired_workflow_status(db, now + timedelta(hours=2)) == 1
+    db.commit()
+    state = state_of(db, wf)
+    assert state.missed_count_24h == 0
+    assert state.status == "AT_RISK"
+
+    refresh_expired_workflow_status(db, now + timedelta(hours=23))
+    db.commit()
+    state = state_of(db, wf)
+    assert state.status == "HEALTHY"
+    assert state.expires_at is None
+
+
+def test_rebuild_from_runs_and_alerts(db):
+    wf = make_workflow(db)
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        WorkflowRun(github_run_id=1, workflow_id=wf.id, status="completed", conclusion="success",
+                    started_at=now - timedelta(hours=3)),
+        WorkflowRun(github_run_id=2, workflow_id=wf.id, status="completed", conclusion="missed",
+                    started_at=now - timedelta(hours=1)),
+        Alert(organization_id=wf.repository.org_id, workflow_id=wf.id, alert_type=AlertType.MISSED,
+              severity=AlertSeverity.ERROR, message="missed", detected_at=datetime.utcnow()),
+    ])
+    db.commit()
+
+    assert rebuild_workflow_status(db, now) == 1
+
+    state = state_of(db, wf)
+    assert state.status == "MISSED"
+    assert state.missed_count_24h == 2
+    assert state.last_conclusion == "success"
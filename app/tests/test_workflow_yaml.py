@@ -0,0 +1,35 @@
+from app.services.workflow_yaml import extract_crons, may_have_schedule
+
+MULTI = """
+name: Nightly
+on:
+  schedule:
+    - cron: "0 3 * * *"
+    - cron: '30 12 * * 1-5'
+    - cron: "0 3 * * *"
+  workflow_dispatch:
+jobs:
+  build:
+    runs-on: ubuntu-latest
+"""
+
+
+def test_returns_every_cron_once_in_file_order():
+    assert extract_crons(MULTI) == ["0 3 * * *", "30 12 * * 1-5"]
+
+
+def test_flow_style_and_quoted_triggers():
+    assert extract_crons('on: {schedule: [{cron: "5 4 * * 0"}], push: {}}') == ["5 4 * * 0"]
+    assert extract_crons('{"on": {"schedule": [{"cron": "0 0 1 * *"}]}}') == ["0 0 1 * *"]
+
+
+def test_files_without_schedule_skip_parsing():
+    ci = "on: [push, pull_request]\njobs:\n  test:\n    runs-on: ubuntu-latest\n"
+    assert not may_have_schedule(ci)
+    # the word alone (e.g. in a step name) doesn't count
+    assert not may_have_schedule("name: Update schedule docs\non: push\n")
+    assert extract_crons(ci) == []
+
+
+def test_invalid_yaml_yields_no_crons():
+    assert extract_crons("on:\n  schedule:\n    - cron: [unclosed\n") == []
@@ -0,0 +1,153 @@
+"""
+Benchmark the analytics queries over raw runs against the daily rollups.
+
+Seeds a year of run history, builds the rollups from it and times a 365-day
+success-rate and duration-stats computation both ways: grouping and sorting
+the raw runs, as the endpoints did, and reading workflow_run_daily (at most
+one row per workflow and day, percentiles from the merged sketches). Also
+times keeping the rollups current while ingesting runs.
+
+    python -m benchmarks.bench_analytics --runs 100000 1000000
+    python -m benchmarks.bench_analytics --database-url postgresql://...
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.db import Base
+from app.core.quantile_sketch import QuantileSketch
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+from app.models.workflow_run_daily import WorkflowRunDaily
+from app.services.run_rollups import rebuild_run_rollups
+from app.services.workflow_runs import upsert_workflow_runs
+
+WORKFLOWS = 50
+DAYS = 365
+
+
+def seed(db, runs: int) -> list:
+    rnd = random.Random(0)
+    now = datetime.now(timezone.utc)
+    org = Organization(github_org_id=1, installation_id=1, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=1, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.flush()
+    workflows = [Workflow(github_workflow_id=w, repo_id=repo.id, name=f"wf-{w}", path=f"{w}.yml") for w in range(WORKFLOWS)]
+    db.add_all(workflows)
+    db.flush()
+
+    batch = []
+    for i in range(runs):
+        batch.append({
+            "github_run_id": i,
+            "workflow_id": workflows[i % WORKFLOWS].id,
+            "status": "completed",
+            "conclusion": "success" if rnd.random() < 0.9 else "failure",
+            "started_at": now - timedelta(minutes=rnd.randint(0, 60 * 24 * (DAYS - 1))),
+            "duration_ms": int(rnd.lognormvariate(11, 0.8)),
+        })
+        if len(batch) == 50_000:
+            db.execute(WorkflowRun.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(WorkflowRun.__table__.insert(), batch)
+    db.commit()
+    return [wf.id for wf in workflows]
+
+
+def raw_analytics(db, workflow_ids):
+    start = datetime.now(timezone.utc) - timedelta(days=DAYS)
+    in_window = (WorkflowRun.workflow_id.in_(workflow_ids), WorkflowRun.started_at >= start)
+    days = db.execute(
+        select(
+            func.date(WorkflowRun.started_at),
+            func.count().filter(WorkflowRun.conclusion == "success"),
+            func.count().filter(WorkflowRun.conclusion == "failure"),
+            func.count(),
+        ).where(*in_window).group_by(func.date(WorkflowRun.started_at))
+    ).all()
+    durations = db.scalars(
+        select(WorkflowRun.duration_ms).where(*in_window, WorkflowRun.duration_ms.isnot(None)).order_by(WorkflowRun.duration_ms)
+    ).all()
+    return len(days), durations[len(durations) // 2] if durations else None
+
+
+def rollup_analytics(db, workflow_ids):
+    start = (datetime.now(timezone.utc) - timedelta(days=DAYS)).date()
+    in_window = (WorkflowRunDaily.workflow_id.in_(workflow_ids), WorkflowRunDaily.day >= start)
+    days = db.execute(
+        select(
+            WorkflowRunDaily.day,
+            func.sum(WorkflowRunDaily.success),
+            func.sum(WorkflowRunDaily.failure),
+            func.sum(WorkflowRunDaily.total),
+        ).where(*in_window).group_by(WorkflowRunDaily.day)
+    ).all()
+    sketch = QuantileSketch()
+    for encoded in db.scalars(select(WorkflowRunDaily.duration_sketch).where(*in_window)):
+        sketch.merge_encoded(encoded)
+    return len(days), sketch.quantile(0.5)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--ingest", type=int, default=2000, help="runs upserted one by one, as webhooks arrive")
+    parser.add_argument("--database-url", default="sqlite://", help="empty database to seed (default: in-memory SQLite)")
+    args = parser.parse_args()
+
+    for runs in args.runs:
+        if args.database_url.startswith("sqlite"):
+            engine = create_engine(args.database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        else:
+            engine = create_engine(args.database_url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        workflow_ids = seed(db, runs)
+
+        rebuild_s, rollup_rows = timed(lambda: rebuild_run_rollups(db))
+        raw_s, (raw_days, raw_p50) = timed(lambda: raw_analytics(db, workflow_ids))
+        rollup_s, (rollup_days, rollup_p50) = timed(lambda: rollup_analytics(db, workflow_ids))
+        print(
+            f"{runs:>9} runs ({rollup_rows} rollup rows, rebuilt in {rebuild_s:.2f}s): "
+            f"raw {raw_s * 1000:8.1f}ms   rollups {rollup_s * 1000:7.1f}ms   "
+            f"p50 {raw_p50} vs {rollup_p50:.0f}"
+        )
+
+        now = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        for i in range(args.ingest):
+            upsert_workflow_runs(db, [{
+                "github_run_id": runs + i,
+                "workflow_id": workflow_ids[i % WORKFLOWS],
+                "status": "completed",
+                "conclusion": "success",
+                "started_at": now,
+                "completed_at": now,
+                "duration_ms": 60_000 + i,
+                "raw_payload": None,
+            }])
+            db.commit()
+        print(f"{'':>9} ingest: {(time.perf_counter() - start) / args.ingest * 1000:.2f}ms per run with rollups")
+
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
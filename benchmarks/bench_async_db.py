@@ -0,0 +1,179 @@
+"""
+Benchmark request latency and throughput with slow and fast requests mixed.
+
+A few clients keep requesting the slow duration-stats analytics (a scan and
+sort of every run in the window) while others poll a fast endpoint (the
+installation's settings). Runs the mix twice on one worker's event loop:
+
+- sync: `async def` handlers querying the sync Session, as before the async
+  DB layer; each query blocks the loop, so fast requests queue behind slow ones
+- async: the app's handlers on AsyncSession (duration-stats now reads the
+  daily rollups, see bench_analytics, so it's no longer slow there)
+
+The app runs in-process (no startup), so DATABASE_URL selects the database
+and is wiped and seeded:
+
+    DATABASE_URL=sqlite:////tmp/bench_async.db python -m benchmarks.bench_async_db --runs 200000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.api.auth import get_current_user
+from app.core.db import Base, SessionLocal, async_engine, engine, get_db
+from app.main import app
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+from app.services.github_identity import Identity
+from app.services.run_rollups import rebuild_run_rollups
+
+INSTALLATION_ID = 1
+AUTH = {"Authorization": "Bearer bench"}
+
+
+async def bench_user():
+    # A user of the benchmark installation, without asking GitHub
+    return {"token": "bench", "identity": Identity({"id": 1, "login": "bench"}, [{"id": INSTALLATION_ID}])}
+
+
+def seed(runs: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    org = Organization(github_org_id=1, installation_id=INSTALLATION_ID, name="acme")
+    db.add(org)
+    db.flush()
+    repo = Repository(github_repo_id=1, org_id=org.id, name="api", full_name="acme/api")
+    db.add(repo)
+    db.flush()
+    workflows = [Workflow(github_workflow_id=w, repo_id=repo.id, name=f"wf-{w}", path=f"{w}.yml") for w in range(50)]
+    db.add_all(workflows)
+    db.flush()
+
+    rnd = random.Random(0)
+    now = datetime.now(timezone.utc)
+    db.execute(WorkflowRun.__table__.insert(), [
+        {
+            "github_run_id": i,
+            "workflow_id": workflows[i % len(workflows)].id,
+            "status": "completed",
+            "conclusion": "success",
+            "started_at": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 29)),
+            "duration_ms": rnd.randint(10_000, 600_000),
+        }
+        for i in range(runs)
+    ])
+    db.commit()
+    rebuild_run_rollups(db)
+    db.close()
+
+
+# The handlers' previous pattern: `async def` on the sync Session
+sync_router = APIRouter()
+
+
+@sync_router.get("/duration-stats")
+async def sync_duration_stats(installation_id: int, db: Session = Depends(get_db)):
+    start_date = datetime.now(timezone.utc) - timedelta(days=30)
+    workflows = (
+        select(Workflow.id).join(Repository).join(Organization).where(Organization.installation_id == installation_id)
+    )
+    in_window = and_(
+        WorkflowRun.workflow_id.in_(workflows),
+        WorkflowRun.started_at >= start_date,
+        WorkflowRun.duration_ms.isnot(None),
+    )
+    # The same two queries as /api/analytics/duration-stats
+    stats = db.execute(
+        select(func.min(WorkflowRun.duration_ms), func.max(WorkflowRun.duration_ms), func.count()).where(in_window)
+    ).first()
+    durations = db.scalars(select(WorkflowRun.duration_ms).where(in_window).order_by(WorkflowRun.duration_ms)).all()
+    return {"total_runs": stats[2], "p50_duration_ms": durations[len(durations) // 2] if durations else None}
+
+
+@sync_router.get("/settings")
+async def sync_settings(installation_id: int, db: Session = Depends(get_db)):
+    org = db.query(Organization).filter(Organization.installation_id == installation_id).first()
+    return {"alert_threshold_minutes": org.alert_threshold_minutes}
+
+
+sync_app = FastAPI()
+sync_app.include_router(sync_router, prefix="/sync")
+
+
+async def client_loop(client, url: str, params: dict, deadline: float, latencies: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(url, params=params, headers=AUTH)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_mix(asgi_app, slow_url: str, fast_url: str, slow_clients: int, fast_clients: int, seconds: float):
+    slow, fast = [], []
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + seconds
+        params = {"installation_id": INSTALLATION_ID}
+        await asyncio.gather(
+            *(client_loop(client, slow_url, params, deadline, slow) for _ in range(slow_clients)),
+            *(client_loop(client, fast_url, params, deadline, fast) for _ in range(fast_clients)),
+        )
+    return slow, fast
+
+
+def report(label: str, slow: list, fast: list, seconds: float):
+    fast_sorted = sorted(fast)
+    print(
+        f"  {label:<6} fast {len(fast) / seconds:7.1f} req/s  p50 {statistics.median(fast):7.1f}ms  "
+        f"p95 {fast_sorted[int(len(fast_sorted) * 0.95)]:7.1f}ms   "
+        f"slow {len(slow) / seconds:5.1f} req/s  p50 {statistics.median(slow):7.1f}ms"
+    )
+
+
+async def main_async(args):
+    print(
+        f"{args.runs} runs, {args.slow_clients} slow + {args.fast_clients} fast clients, "
+        f"{args.seconds:.0f}s per mode:"
+    )
+    results = await run_mix(
+        sync_app, "/sync/duration-stats", "/sync/settings", args.slow_clients, args.fast_clients, args.seconds
+    )
+    report("sync", *results, args.seconds)
+    app.dependency_overrides[get_current_user] = bench_user
+    results = await run_mix(
+        app,
+        "/api/analytics/duration-stats",
+        f"/api/settings/{INSTALLATION_ID}",
+        args.slow_clients,
+        args.fast_clients,
+        args.seconds,
+    )
+    app.dependency_overrides.clear()
+    report("async", *results, args.seconds)
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200_000)
+    parser.add_argument("--slow-clients", type=int, default=2)
+    parser.add_argument("--fast-clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    seed(args.runs)
+    asyncio.run(main_async(args))
+    Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
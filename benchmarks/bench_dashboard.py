@@ -0,0 +1,167 @@
+"""
+Benchmark the dashboard's /workflows/status query as the workflow count grows.
+
+Compares the original per-workflow implementation (a missed-runs query and a
+lazy repository load per workflow), the single aggregated query over runs
+that followed it, and the read of the materialized workflow_status table.
+
+    python -m benchmarks.bench_dashboard --workflows 1000 10000
+    python -m benchmarks.bench_dashboard --workflows 10000 --runs-per-workflow 100
+    python -m benchmarks.bench_dashboard --database-url postgresql://...
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.dashboard import workflow_status_items
+from app.core.db import Base
+from app.models.workflow import Organization, Repository, Workflow
+from app.models.workflow_run import WorkflowRun
+from app.schemas.dashboard import WorkflowStatus
+from app.services.workflow_status import rebuild_workflow_status
+
+WORKFLOWS_PER_REPO = 20
+MISSED_FRACTION = 0.05
+
+
+def seed(db, workflows: int, runs_per_workflow: int):
+    rnd = random.Random(0)
+    now = datetime.now(timezone.utc)
+
+    org = Organization(github_org_id=1, installation_id=1, name="acme")
+    db.add(org)
+    db.flush()
+
+    repo_rows = [
+        {"github_repo_id": r, "org_id": org.id, "name": f"repo-{r}", "full_name": f"acme/repo-{r}"}
+        for r in range(workflows // WORKFLOWS_PER_REPO + 1)
+    ]
+    db.execute(Repository.__table__.insert(), repo_rows)
+    repo_ids = [row.id for row in db.query(Repository.id).order_by(Repository.id)]
+
+    db.execute(Workflow.__table__.insert(), [
+        {
+            "github_workflow_id": w,
+            "repo_id": repo_ids[w // WORKFLOWS_PER_REPO],
+            "name": f"wf-{w}",
+            "path": f".github/workflows/wf-{w}.yml",
+            "cron_expression": "0 3 * * *",
+            "active": True,
+        }
+        for w in range(workflows)
+    ])
+    workflow_ids = [row.id for row in db.query(Workflow.id)]
+
+    run_rows = []
+    for wf_id in workflow_ids:
+        missed = rnd.random() < MISSED_FRACTION
+        for i in range(runs_per_workflow):
+            run_rows.append({
+                "github_run_id": len(run_rows),
+                "workflow_id": wf_id,
+                "status": "completed",
+                "conclusion": "missed" if missed and i < 2 else "success",
+                "started_at": now - timedelta(hours=i),
+            })
+    db.execute(WorkflowRun.__table__.insert(), run_rows)
+    db.commit()
+    rebuild_workflow_status(db)
+
+
+def legacy_status(db):
+    """The per-workflow implementation this benchmark replaces."""
+    since_24h = datetime.now(timezone.utc) - timedelta(hours=24)
+    items = []
+    for wf in db.query(Workflow).join(Workflow.repository).all():
+        missed_runs = (
+            db.query(WorkflowRun)
+            .filter(WorkflowRun.workflow_id == wf.id)
+            .filter(WorkflowRun.conclusion == "missed")
+            .filter(WorkflowRun.started_at >= since_24h)
+            .order_by(WorkflowRun.started_at.desc())
+            .all()
+        )
+        items.append((wf.id, wf.repository.full_name, len(missed_runs)))
+    return items
+
+
+def aggregated_status(db):
+    """The aggregated query over raw runs that the status table replaces."""
+    since_24h = datetime.now(timezone.utc) - timedelta(hours=24)
+    misses = (
+        db.query(
+            WorkflowRun.workflow_id,
+            func.count().label("missed_count"),
+            func.max(WorkflowRun.started_at).label("last_missed_at"),
+        )
+        .filter(WorkflowRun.conclusion == "missed")
+        .filter(WorkflowRun.started_at >= since_24h)
+        .group_by(WorkflowRun.workflow_id)
+        .subquery()
+    )
+    return [
+        WorkflowStatus(
+            id=row.id,
+            repo_full_name=row.full_name,
+            name=row.name,
+            cron_expression=row.cron_expression,
+            last_run_at=row.last_run_at,
+            last_missed_at=row.last_missed_at,
+            missed_count_24h=row.missed_count or 0,
+            status="MISSED" if row.last_missed_at else "HEALTHY",
+        )
+        for row in (
+            db.query(
+                Workflow.id, Workflow.name, Workflow.cron_expression, Workflow.last_run_at,
+                Repository.full_name, misses.c.missed_count, misses.c.last_missed_at,
+            )
+            .join(Repository, Workflow.repo_id == Repository.id)
+            .outerjoin(misses, misses.c.workflow_id == Workflow.id)
+            .order_by(Workflow.id)
+        )
+    ]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workflows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs-per-workflow", type=int, default=10, help="run history per workflow (hourly)")
+    parser.add_argument("--database-url", default="sqlite://", help="empty database to seed (default: in-memory SQLite)")
+    args = parser.parse_args()
+
+    for count in args.workflows:
+        if args.database_url.startswith("sqlite"):
+            engine = create_engine(args.database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        else:
+            engine = create_engine(args.database_url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, count, args.runs_per_workflow)
+
+        legacy_s = timed(lambda: legacy_status(db))
+        db.expunge_all()
+        aggregated_s = timed(lambda: aggregated_status(db))
+        table_s = timed(lambda: workflow_status_items(db))
+        print(
+            f"{count:>7} workflows: per-workflow {legacy_s:7.3f}s   "
+            f"aggregated {aggregated_s:7.3f}s   status table {table_s:7.3f}s"
+        )
+
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark discover_and_sync_workflows_async against the in-process fake GitHub API.
+
+Runs the same discovery once fully serialised (concurrency 1) and once with the
+configured concurrency limits, with simulated per-request latency and
+optionally a number of failing workflow listings per run.
+
+    python -m benchmarks.bench_discovery --repos 200 --latency 0.02 --failures 5
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import get_settings
+from app.core.db import Base
+from app.models import workflow_run  # noqa: F401  (Workflow.runs resolves WorkflowRun by name, so it must be imported)
+from app.services import github_sync
+from app.tests.fake_github import FakeGitHub, fake_installation_token
+
+WORKFLOW_YAML = """
+name: Nightly
+on:
+  schedule:
+    - cron: "0 3 * * *"
+jobs:
+  build:
+    runs-on: ubuntu-latest
+"""
+
+
+def build_fake(installations: int, repos: int, workflows: int, latency: float) -> FakeGitHub:
+    fake = FakeGitHub(latency=latency)
+    for inst in range(1, installations + 1):
+        fake.add_installation(inst, f"org-{inst}")
+        for r in range(repos):
+            fake.add_repo(inst, f"repo-{r}", {f"wf-{w}.yml": WORKFLOW_YAML for w in range(workflows)})
+    return fake
+
+
+async def run_once(
+    fake: FakeGitHub, installations: int, max_concurrency: int, per_installation: int, failures: int
+) -> tuple[float, int, int]:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    fake.reset_counts()
+    if failures:
+        fake.inject_failure(r"/actions/workflows$", status=502, times=failures)
+    github_sync._cron_by_sha.clear()
+
+    start = time.perf_counter()
+    async with fake.client() as client:
+        stats = await github_sync.discover_and_sync_workflows_async(
+            db,
+            list(range(1, installations + 1)),
+            client=client,
+            max_concurrency=max_concurrency,
+            max_concurrency_per_installation=per_installation,
+        )
+    elapsed = time.perf_counter() - start
+
+    db.close()
+    return elapsed, fake.request_count, len(stats["errors"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--installations", type=int, default=2)
+    parser.add_argument("--repos", type=int, default=100, help="repos per installation")
+    parser.add_argument("--workflows", type=int, default=2, help="workflows per repo")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake API request")
+    parser.add_argument("--failures", type=int, default=0, help="workflow listings answered with a 502 per run")
+    args = parser.parse_args()
+
+    github_sync.get_installation_token = fake_installation_token
+    settings = get_settings()
+    fake = build_fake(args.installations, args.repos, args.workflows, args.latency)
+
+    for label, limit, per_inst in [
+        ("serial", 1, 1),
+        ("concurrent", settings.GITHUB_SYNC_MAX_CONCURRENCY, settings.GITHUB_SYNC_MAX_CONCURRENCY_PER_INSTALLATION),
+    ]:
+        elapsed, requests, errors = asyncio.run(run_once(fake, args.installations, limit, per_inst, args.failures))
+        print(
+            f"{label:>10}: {elapsed:7.2f}s  {requests} requests  {errors} errors"
+            f"  (global={limit}, per-installation={per_inst})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark sparse fieldsets and compression on the large list endpoints.
+
+Requests a page of alerts (with multi-line messages) and the workflow
+listings through the app, with every field and with the few the dashboard
+tables show, and reports the time per request and the bytes sent as is and
+compressed. The app starts up as usual, so DATABASE_URL must point at a
+reachable database; the benchmark data itself lives in a temporary SQLite
+file, which both the sync and the async sessions read.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.bench_fields --alerts 200 --workflows 5000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api.auth import get_current_user
+from app.core.db import Base, async_database_url, get_async_db, get_db
+from app.main import app
+from app.models.alert import Alert, AlertSeverity, AlertType
+from app.models.workflow import Organization, Repository, Workflow
+from app.services import response_cache
+from app.services.github_identity import Identity
+
+REPEATS = 20
+MESSAGE = (
+    "Workflow 'nightly-build' in acme/service-{i} missed its scheduled run.\n"
+    "Expected at 03:00 UTC (cron: 0 3 * * *); no run started within the grace period.\n"
+    "Last successful run: 2 days ago. Check the workflow file and the repository's Actions settings.\n"
+)
+
+
+def seed(db, alerts: int, workflows: int):
+    org = Organization(github_org_id=1, installation_id=1, name="acme")
+    db.add(org)
+    db.flush()
+    db.execute(Repository.__table__.insert(), [
+        {"github_repo_id": r, "org_id": org.id, "name": f"service-{r}", "full_name": f"acme/service-{r}"}
+        for r in range(workflows // 10 + 1)
+    ])
+    db.execute(Workflow.__table__.insert(), [
+        {
+            "github_workflow_id": w,
+            "repo_id": w // 10 + 1,
+            "name": f"nightly-build-{w}",
+            "path": f".github/workflows/nightly-{w}.yml",
+            "cron_expression": "0 3 * * *",
+            "active": True,
+        }
+        for w in range(workflows)
+    ])
+    detected = datetime(2026, 1, 1)
+    db.execute(Alert.__table__.insert(), [
+        {
+            "organization_id": org.id,
+            "workflow_id": i % workflows + 1,
+            "alert_type": AlertType.MISSED.name,
+            "severity": AlertSeverity.ERROR.name,
+            "message": MESSAGE.format(i=i),
+            "detected_at": detected + timedelta(minutes=i),
+            "acknowledged": False,
+        }
+        for i in range(alerts)
+    ])
+    db.commit()
+
+
+async def bench_user():
+    # A user of the benchmark installation, without asking GitHub
+    return {"token": "bench", "identity": Identity({"id": 1, "login": "bench"}, [{"id": 1}])}
+
+
+def measure(client, label: str, url: str, params: dict):
+    timings = []
+    for _ in range(REPEATS):
+        response_cache.clear_response_cache()
+        start = time.perf_counter()
+        plain = client.get(url, params=params, headers={"Authorization": "Bearer bench", "Accept-Encoding": "identity"})
+        timings.append((time.perf_counter() - start) * 1000)
+        assert plain.status_code == 200, f"{url}: {plain.status_code} {plain.text}"
+    compressed = client.get(url, params=params, headers={"Authorization": "Bearer bench", "Accept-Encoding": "gzip, br"})
+    assert compressed.status_code == 200, f"{url}: {compressed.status_code} {compressed.text}"
+    print(
+        f"  {label:<34} {statistics.median(timings):7.2f}ms   {len(plain.content) / 1024:8.1f} KiB   "
+        f"{compressed.headers.get('Content-Encoding', 'identity'):>4} "
+        f"{int(compressed.headers.get('Content-Length', len(compressed.content))) / 1024:7.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--workflows", type=int, default=5000)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_fields.db')}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.alerts, args.workflows)
+    # No pooling: the TestClient runs the app on its own event loop
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_async_db():
+        async with AsyncSessionLocal() as async_db:
+            yield async_db
+
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = get_bench_async_db
+    app.dependency_overrides[get_current_user] = bench_user
+    with TestClient(app) as client:
+        print(f"{'':<36}{'median':>9}   {'plain':>12}   {'compressed':>12}")
+        alerts = {"installation_id": 1, "limit": min(args.alerts, 200)}
+        measure(client, "alerts, all fields", "/api/alerts/", alerts)
+        measure(client, "alerts, id,alert_type,detected_at", "/api/alerts/", {**alerts, "fields": "alert_type,detected_at"})
+        measure(client, "workflows, all fields", "/api/workflows/", {"limit": 500})
+        measure(client, "workflows, id,name", "/api/workflows/", {"limit": 500, "fields": "name"})
+        measure(client, "workflows/status, all fields", "/api/workflows/status", {})
+        measure(client, "workflows/status, id,name,status", "/api/workflows/status", {"fields": "name,status"})
+    app.dependency_overrides.clear()
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the live event hub with many idle SSE subscribers.
+
+Opens N streams (as `/api/live/{installation_id}/events` does) spread over
+installations, measures the memory they hold while idle, then the time to
+publish events to them and for every stream to yield its event.
+
+    python -m benchmarks.bench_live --subscribers 10000 --installations 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from app.services.live_events import event_stream, hub
+
+
+async def run(subscribers: int, installations: int, events: int):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    streams = []
+    for i in range(subscribers):
+        stream = event_stream(hub.subscribe(i % installations), heartbeat_seconds=3600)
+        await stream.__anext__()  # the retry line
+        streams.append((i % installations, asyncio.ensure_future(stream.__anext__()), stream))
+    await asyncio.sleep(0)
+    idle = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"{subscribers} idle subscribers over {installations} installations: "
+          f"{idle / 1024 / 1024:.1f} MiB ({idle / subscribers / 1024:.1f} KiB each)")
+
+    timings = []
+    for n in range(events):
+        installation = n % installations
+        waiting = [task for inst, task, _ in streams if inst == installation]
+        start = time.perf_counter()
+        hub.publish(installation, "status", {"workflow_id": n, "status": "AT_RISK"})
+        await asyncio.gather(*waiting)
+        timings.append((time.perf_counter() - start) * 1000)
+        streams = [
+            (inst, asyncio.ensure_future(stream.__anext__()) if inst == installation else task, stream)
+            for inst, task, stream in streams
+        ]
+    print(f"publish to {subscribers // installations} subscribers and stream it: "
+          f"median {statistics.median(timings):.2f}ms   max {max(timings):.2f}ms")
+
+    for _, task, stream in streams:
+        task.cancel()
+    await asyncio.gather(*(task for _, task, _ in streams), return_exceptions=True)
+    for _, _, stream in streams:
+        await stream.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--installations", type=int, default=100)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.installations, args.events))
+    print(f"subscribers left: {hub.subscriber_count()}")
+
+
+if __name__ == "__main__":
+    main()
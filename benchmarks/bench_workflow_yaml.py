@@ -0,0 +1,246 @@
+"""
+Benchmark cron extraction over a corpus of workflow files.
+
+Compares the previous extractor (pure-Python `yaml.safe_load` + full tree walk
+on every file) with `workflow_yaml.extract_crons` inline and in a process pool.
+
+    python -m benchmarks.bench_workflow_yaml --corpus path/to/checkouts
+    python -m benchmarks.bench_workflow_yaml --files 3000
+
+`--corpus` reads every `.github/workflows/*.yml|yaml` below a directory (e.g.
+a folder of cloned repos). Without it, a corpus is generated from templates
+shaped like common real-world workflows (CI matrices, releases, scheduled
+jobs, reusable-workflow callers), roughly one in five of them scheduled.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from app.services.workflow_yaml import extract_crons
+
+CI = """
+name: CI {n}
+on:
+  push:
+    branches: [main, "release/**"]
+  pull_request:
+    paths-ignore: ["docs/**", "*.md"]
+concurrency:
+  group: ${{{{ github.workflow }}}}-${{{{ github.ref }}}}
+  cancel-in-progress: true
+permissions:
+  contents: read
+jobs:
+  test:
+    runs-on: ${{{{ matrix.os }}}}
+    strategy:
+      fail-fast: false
+      matrix:
+        os: [ubuntu-latest, macos-latest, windows-latest]
+        python: ["3.9", "3.10", "3.11", "3.12"]
+        exclude:
+          - os: windows-latest
+            python: "3.9"
+    steps:
+      - uses: actions/checkout@v4
+      - uses: actions/setup-python@v5
+        with:
+          python-version: ${{{{ matrix.python }}}}
+          cache: pip
+      - name: Install
+        run: |
+          python -m pip install --upgrade pip
+          pip install -e ".[test]"
+      - name: Test
+        run: pytest -q --cov --cov-report=xml
+      - uses: codecov/codecov-action@v4
+        with:
+          token: ${{{{ secrets.CODECOV_TOKEN }}}}
+  lint:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - run: pipx run ruff check .
+"""
+
+RELEASE = """
+name: Release {n}
+on:
+  push:
+    tags: ["v*"]
+  workflow_dispatch:
+    inputs:
+      dry_run:
+        description: Build without publishing
+        type: boolean
+        default: false
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    outputs:
+      version: ${{{{ steps.version.outputs.version }}}}
+    steps:
+      - uses: actions/checkout@v4
+        with:
+          fetch-depth: 0
+      - id: version
+        run: echo "version=${{GITHUB_REF#refs/tags/v}}" >> "$GITHUB_OUTPUT"
+      - uses: docker/setup-buildx-action@v3
+      - uses: docker/build-push-action@v5
+        with:
+          push: ${{{{ !inputs.dry_run }}}}
+          tags: ghcr.io/acme/app-{n}:${{{{ steps.version.outputs.version }}}}
+  notes:
+    needs: build
+    uses: acme/shared/.github/workflows/release-notes.yml@main
+    secrets: inherit
+"""
+
+SCHEDULED = """
+name: Nightly {n}
+on:
+  schedule:
+    - cron: "{minute} {hour} * * *"
+    - cron: '0 {hour} * * 0'
+  workflow_dispatch:
+jobs:
+  e2e:
+    runs-on: ubuntu-latest
+    timeout-minutes: 60
+    env:
+      BASE_URL: https://staging-{n}.example.com
+    steps:
+      - uses: actions/checkout@v4
+      - uses: actions/setup-node@v4
+        with:
+          node-version: 20
+          cache: npm
+      - run: npm ci
+      - run: npx playwright install --with-deps
+      - run: npx playwright test --reporter=github
+      - if: failure()
+        uses: slackapi/slack-github-action@v1
+        with:
+          payload: '{{"text": "Nightly {n} failed"}}'
+        env:
+          SLACK_WEBHOOK_URL: ${{{{ secrets.SLACK_WEBHOOK_URL }}}}
+"""
+
+STALE = """
+name: Close stale issues {n}
+on:
+  schedule: [{{cron: "{minute} 1 * * 1-5"}}]
+jobs:
+  stale:
+    runs-on: ubuntu-latest
+    permissions:
+      issues: write
+      pull-requests: write
+    steps:
+      - uses: actions/stale@v9
+        with:
+          days-before-stale: 60
+          stale-issue-message: This issue has had no activity and will be closed on schedule.
+"""
+
+DEPS = """
+name: Dependency review {n}
+on: [pull_request]
+jobs:
+  review:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - uses: actions/dependency-review-action@v4
+        with:
+          fail-on-severity: high
+"""
+
+# Weighted so about one file in five has a schedule
+TEMPLATES = [CI] * 4 + [RELEASE] * 2 + [DEPS] * 2 + [SCHEDULED, STALE]
+
+
+def generate_corpus(files: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    return [
+        rnd.choice(TEMPLATES).format(n=i, minute=rnd.randrange(60), hour=rnd.randrange(24))
+        for i in range(files)
+    ]
+
+
+def load_corpus(root: str) -> list[str]:
+    paths = [
+        p for p in Path(root).rglob("*")
+        if p.suffix in (".yml", ".yaml") and p.parent.name == "workflows" and p.parent.parent.name == ".github"
+    ]
+    return [p.read_text(encoding="utf-8", errors="replace") for p in paths]
+
+
+def legacy_extract(content: str):
+    """The extractor this benchmark replaces: first cron via a full pure-Python parse and walk."""
+    try:
+        parsed = yaml.safe_load(content)
+    except Exception:
+        return None
+
+    def find_cron(node):
+        if isinstance(node, dict):
+            if "schedule" in node:
+                block = node["schedule"]
+                if isinstance(block, list):
+                    for item in block:
+                        if isinstance(item, dict) and "cron" in item:
+                            return item["cron"]
+                if isinstance(block, dict) and "cron" in block:
+                    return block["cron"]
+            for value in node.values():
+                cron = find_cron(value)
+                if cron:
+                    return cron
+        if isinstance(node, list):
+            for item in node:
+                cron = find_cron(item)
+                if cron:
+                    return cron
+        return None
+
+    return find_cron(parsed)
+
+
+def timed(fn) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory to collect .github/workflows files from")
+    parser.add_argument("--files", type=int, default=3000, help="size of the generated corpus")
+    parser.add_argument("--processes", type=int, default=None, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(args.files)
+    print(f"{len(corpus)} workflow files, {sum(map(len, corpus)) / 1e6:.1f} MB")
+
+    legacy_s, legacy = timed(lambda: [legacy_extract(c) for c in corpus])
+    inline_s, inline = timed(lambda: [extract_crons(c) for c in corpus])
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        pool.submit(extract_crons, "").result()  # start the workers outside the timing
+        pool_s, pooled = timed(lambda: list(pool.map(extract_crons, corpus, chunksize=64)))
+
+    assert pooled == inline
+    assert [crons[0] if crons else None for crons in inline] == legacy
+
+    scheduled = sum(1 for crons in inline if crons)
+    print(f"{scheduled} scheduled, {sum(map(len, inline))} cron entries")
+    for label, seconds in [("legacy", legacy_s), ("inline", inline_s), ("pool", pool_s)]:
+        print(f"{label:>8}: {seconds:7.3f}s  ({len(corpus) / seconds:9.0f} files/s, {legacy_s / seconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
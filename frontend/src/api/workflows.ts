@@ -12,15 +12,28 @@ export interface Workflow {
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000/api';
 
+// Page size of /workflows/; the server caps it at 500
+const WORKFLOWS_PAGE_SIZE = 500;
+
 export async function fetchWorkflows(
     _installationId: number,
 ): Promise<Workflow[]> {
-    const url = new URL(`${API_BASE}/workflows/`);
     // In a real app we might use installationId param, 
     // but for now the backend determines access via cookies/token
     // url.searchParams.set('installationId', String(installationId));
 
-    const res = await fetch(url.toString(), { credentials: 'include' });
-    if (!res.ok) throw new Error('Failed to load workflows');
-    return res.json();
+    // The list is paginated: follow X-Next-Cursor until the last page
+    const workflows: Workflow[] = [];
+    let cursor: string | null = null;
+    do {
+        const url = new URL(`${API_BASE}/workflows/`);
+        url.searchParams.set('limit', String(WORKFLOWS_PAGE_SIZE));
+        if (cursor) url.searchParams.set('cursor', cursor);
+
+        const res = await fetch(url.toString(), { credentials: 'include' });
+        if (!res.ok) throw new Error('Failed to load workflows');
+        workflows.push(...(await res.json()));
+        cursor = res.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return workflows;
 }
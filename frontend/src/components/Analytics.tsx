@@ -34,7 +34,9 @@ interface DurationStats {
     max_duration_ms: number | null;
     avg_duration_ms: number | null;
     p50_duration_ms: number | null;
+    p90_duration_ms: number | null;
     p95_duration_ms: number | null;
+    p99_duration_ms: number | null;
     total_runs: number;
 }
 